@@ -0,0 +1,127 @@
+"""
+Micro-benchmark for the detection of transform changes. World objects
+use change-tracked vectors, so that an object knows when it moved, and
+unchanged subtrees are skipped by ``update_matrix_world()``. Before, the
+components of the position, rotation and scale of each object were
+hashed in each frame. This compares the two approaches, for a frame in
+which nothing moved, a frame in which a few objects moved, and setting
+the position of all objects.
+
+With a TransformStore, the transforms are stored in numpy arrays, and
+updated in a batch. This is timed for animating all objects, by setting
+their positions via the objects, or via the array directly.
+"""
+
+import time
+
+import pygfx as gfx
+from pygfx.linalg import Vector3, Quaternion
+
+
+class HashedTransform:
+    """The transform of a world object, with change detection by hashing,
+    like WorldObject did before.
+    """
+
+    def __init__(self):
+        self.position = Vector3()
+        self.rotation = Quaternion()
+        self.scale = Vector3(1, 1, 1)
+        self._transform_hash = ()
+
+    def update_matrix(self):
+        p, r, s = self.position, self.rotation, self.scale
+        hash = p.x, p.y, p.z, r.x, r.y, r.z, r.w, s.x, s.y, s.z
+        if hash != self._transform_hash:
+            self._transform_hash = hash
+            return True
+        return False
+
+
+def timeit(func, frames=20):
+    t0 = time.perf_counter()
+    for frame in range(frames):
+        func(frame)
+    return (time.perf_counter() - t0) / frames * 1000
+
+
+def benchmark_hashed(n):
+    objects = [HashedTransform() for i in range(n)]
+
+    def update(frame):
+        for ob in objects:
+            ob.update_matrix()
+
+    def move_few(frame):
+        for ob in objects[:10]:
+            ob.position.set(frame, 0, 0)
+        update(frame)
+
+    def move_all(frame):
+        for ob in objects:
+            ob.position.set(frame, 0, 0)
+
+    return timeit(update), timeit(move_few), timeit(move_all)
+
+
+def benchmark_tracked(n):
+    scene = gfx.Scene()
+    objects = [gfx.WorldObject() for i in range(n)]
+    for ob in objects:
+        scene.add(ob)
+    scene.update_matrix_world()
+
+    def update(frame):
+        scene.update_matrix_world()
+
+    def move_few(frame):
+        for ob in objects[:10]:
+            ob.position.set(frame, 0, 0)
+        update(frame)
+
+    def move_all(frame):
+        for ob in objects:
+            ob.position.set(frame, 0, 0)
+
+    return timeit(update), timeit(move_few), timeit(move_all)
+
+
+def benchmark_store(n, use_store=True):
+    scene = gfx.Scene()
+    objects = [gfx.WorldObject() for i in range(n)]
+    for ob in objects:
+        scene.add(ob)
+    store = gfx.TransformStore(scene) if use_store else None
+    scene.update_matrix_world()
+
+    def animate_objects(frame):
+        for i, ob in enumerate(objects):
+            ob.position.set(frame, i, 0)
+        scene.update_matrix_world()
+
+    slots = store.get_slots(objects) if use_store else None
+
+    def animate_array(frame):
+        store.positions[slots, 0] = frame
+        store.mark_changed(slots)
+        scene.update_matrix_world()
+
+    if store is None:
+        return timeit(animate_objects, 5), float("nan")
+    return timeit(animate_objects, 5), timeit(animate_array, 5)
+
+
+if __name__ == "__main__":
+    n = 10_000
+    print(f"Times in ms for {n} objects:")
+    print(f"{'':>10}  {'static':>8}  {'move 10':>8}  {'set all':>8}")
+    for name, func in [("hashed", benchmark_hashed), ("tracked", benchmark_tracked)]:
+        times = func(n)
+        print(f"{name:>10}  " + "  ".join(f"{t:8.3f}" for t in times))
+
+    n = 100_000
+    print(f"Times in ms to animate {n} objects:")
+    print(f"{'':>10}  {'objects':>8}  {'array':>8}")
+    for name, use_store in [("tracked", False), ("store", True)]:
+        times = benchmark_store(n, use_store)
+        print(f"{name:>10}  " + "  ".join(f"{t:8.1f}" for t in times))
@@ -9,6 +9,7 @@ from .materials import *
 from .cameras import *
 from .helpers import *
 from .controls import *
+from . import spatial
 
 from .renderers import *
 
@@ -4,6 +4,11 @@ from ..objects._base import ResourceContainer
 from ..resources import Buffer
 
 
+# The bounds are tracked per chunk of this many items, so that they can
+# be updated incrementally when a part of the positions is updated.
+BOUNDS_CHUNK_SIZE = 4096
+
+
 class Geometry(ResourceContainer):
     """A geometry represents the (input) data of mesh, line, or point
     geometry. It can include vertex positions, normals, colors, uvs,
@@ -21,6 +26,7 @@ class Geometry(ResourceContainer):
 
     def __init__(self, **data):
         super().__init__()
+        self._bounds = None
         for name, val in data.items():
             if not isinstance(val, np.ndarray):
                 val = np.asanyarray(val, dtype=np.float32)
@@ -48,3 +54,157 @@ class Geometry(ResourceContainer):
             else:
                 usage = "vertex|storage"
             setattr(self, name, Buffer(val, usage=usage))
+
+    def bounding_box(self):
+        """Get the axis-aligned bounding box of the positions, as a (2, 3)
+        array with the minimum and maximum, or None if there are no
+        (finite) positions. The result is cached, and when only a part
+        of the positions is updated (via ``update_range()``) only that
+        part is processed. NaN values are ignored.
+        """
+        bounds = self._get_bounds()
+        if bounds is None:
+            return None
+        return bounds.get_box()
+
+    def bounding_sphere(self):
+        """Get a bounding sphere of the positions, as a (center, radius)
+        tuple, or None if there are no (finite) positions. The center is
+        the center of the bounding box. The result is cached like
+        ``bounding_box()``.
+        """
+        bounds = self._get_bounds()
+        if bounds is None:
+            return None
+        return bounds.get_sphere()
+
+    def _get_bounds(self):
+        positions = getattr(self, "positions", None)
+        if positions is None or positions.data is None:
+            return None
+        if self._bounds is None or self._bounds.buffer is not positions:
+            self._bounds = ChunkedBounds(positions)
+        self._bounds.update()
+        return self._bounds
+
+
+class ChunkedBounds:
+    """Class used internally to keep track of the bounds of a positions
+    buffer. The minimum, maximum and (for the sphere) the squared
+    distance to the center are stored per chunk, so that an update of
+    a part of the buffer only needs that part to be processed.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.rev = None
+        self.nitems = 0
+        self.mins = self.maxs = np.zeros((0, 3))
+        self.dirty = set()  # dirty chunks
+        self.box = None
+        self.sphere_center = None
+        self.sphere_dist2 = np.zeros((0,))
+        self.sphere_dirty = set()
+        self.sphere = None
+
+    def _get_data(self):
+        # Use nitems, because growable and ring buffers can have unused items
+        return np.asarray(self.buffer.data)[: self.buffer.nitems, :3]
+
+    def update(self):
+        """Process the changes of the buffer since the last call."""
+        buffer = self.buffer
+        nitems = buffer.nitems
+        if self.rev == buffer.rev and self.nitems == nitems:
+            return
+        # Get the changed ranges, or None if all must be recalculated
+        ranges = None
+        if self.rev is not None and nitems >= self.nitems:
+            ranges = buffer._get_ranges_updated_since(self.rev)
+        self.rev = buffer.rev
+        self.box = self.sphere = None
+        if ranges is None:
+            self._reset(nitems)
+            return
+        # Resize the per-chunk arrays. Chunks beyond the old nitems are dirty.
+        nchunks = -(-nitems // BOUNDS_CHUNK_SIZE)
+        chunks = set(range(self.nitems // BOUNDS_CHUNK_SIZE, nchunks))
+        if nchunks != len(self.mins):
+            self.mins = _resized(self.mins, nchunks)
+            self.maxs = _resized(self.maxs, nchunks)
+            self.sphere_dist2 = _resized(self.sphere_dist2, nchunks)
+        self.nitems = nitems
+        for offset, size in ranges:
+            end = min(offset + size, nitems)
+            if end > offset:
+                i1, i2 = offset // BOUNDS_CHUNK_SIZE, (end - 1) // BOUNDS_CHUNK_SIZE
+                chunks.update(range(i1, i2 + 1))
+        self.dirty.update(chunks)
+        self.sphere_dirty.update(chunks)
+
+    def _reset(self, nitems):
+        nchunks = -(-nitems // BOUNDS_CHUNK_SIZE)
+        self.nitems = nitems
+        self.mins = np.full((nchunks, 3), np.nan)
+        self.maxs = np.full((nchunks, 3), np.nan)
+        self.sphere_dist2 = np.full((nchunks,), np.nan)
+        self.dirty = set(range(nchunks))
+        self.sphere_dirty = set(range(nchunks))
+
+    def _dirty_chunks_as_slices(self, dirty):
+        """Get the dirty chunks as a list of (i1, i2) chunk ranges."""
+        slices = []
+        for i in sorted(dirty):
+            if slices and slices[-1][1] == i:
+                slices[-1][1] = i + 1
+            else:
+                slices.append([i, i + 1])
+        return slices
+
+    def get_box(self):
+        if self.box is None:
+            data = self._get_data()
+            for i1, i2 in self._dirty_chunks_as_slices(self.dirty):
+                sub = data[i1 * BOUNDS_CHUNK_SIZE : i2 * BOUNDS_CHUNK_SIZE]
+                starts = np.arange(0, len(sub), BOUNDS_CHUNK_SIZE)
+                # fmin/fmax ignore nan (unless all values are nan)
+                self.mins[i1:i2] = np.fmin.reduceat(sub, starts, 0)
+                self.maxs[i1:i2] = np.fmax.reduceat(sub, starts, 0)
+            self.dirty = set()
+            box = None
+            if len(self.mins):
+                box = np.array(
+                    [np.fmin.reduce(self.mins, 0), np.fmax.reduce(self.maxs, 0)]
+                )
+                if not np.isfinite(box).all():
+                    box = None
+            self.box = box
+        return self.box
+
+    def get_sphere(self):
+        if self.sphere is None:
+            box = self.get_box()
+            if box is None:
+                return None
+            center = 0.5 * (box[0] + box[1])
+            if self.sphere_center is None or (center != self.sphere_center).any():
+                # The center moved, so the distances must all be recalculated
+                self.sphere_center = center
+                self.sphere_dirty = set(range(len(self.sphere_dist2)))
+            data = self._get_data()
+            for i1, i2 in self._dirty_chunks_as_slices(self.sphere_dirty):
+                sub = data[i1 * BOUNDS_CHUNK_SIZE : i2 * BOUNDS_CHUNK_SIZE]
+                starts = np.arange(0, len(sub), BOUNDS_CHUNK_SIZE)
+                dist2 = ((sub - center) ** 2).sum(1)
+                self.sphere_dist2[i1:i2] = np.fmax.reduceat(dist2, starts)
+            self.sphere_dirty = set()
+            radius = float(np.sqrt(np.fmax.reduce(self.sphere_dist2)))
+            self.sphere = center, radius
+        return self.sphere
+
+
+def _resized(a, n):
+    """Get a copy of the array with the given length, padded with nan."""
+    new_a = np.full((n,) + a.shape[1:], np.nan)
+    new_a[: min(n, len(a))] = a[:n]
+    return new_a
@@ -426,5 +426,32 @@ class Vector3:
         # return self
 
 
+class TrackedVector3(Vector3):
+    """A Vector3 that notifies a callback (without arguments) when any of
+    its components is set, e.g. to let the object that owns it know that
+    it changed. The callback is called once, on the first change after
+    it is set. Use ``on_change()`` to set it again. This keeps the overhead
+    of setting components small.
+    """
+
+    _callback = None
+
+    def __init__(self, x: float = 0, y: float = 0, z: float = 0, callback=None) -> None:
+        super().__init__(x, y, z)
+        self.__dict__["_callback"] = callback
+
+    def on_change(self, callback):
+        """Set the callback to call on the next change (or None)."""
+        self.__dict__["_callback"] = callback
+
+    def __setattr__(self, name, value):
+        d = self.__dict__
+        d[name] = value
+        callback = d.get("_callback", None)
+        if callback is not None:
+            d["_callback"] = None
+            callback()
+
+
 _tmp_quaternion = Quaternion()
 _tmp_vector = Vector3()
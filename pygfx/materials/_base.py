@@ -11,7 +11,9 @@ class Material(ResourceContainer):
         """Given a 4 element tuple, sampled from the pick texture,
         return info about what was picked in the object. The first value
         refers to the object id. The use of the remaining values differs
-        per material.
+        per material. The values can also be arrays (one per channel),
+        to decode many samples at once, so implementations should only
+        use arithmetic that works elementwise.
         """
         # Note that this is a private friend-method of the renderer.
         return {}
@@ -7,3 +7,4 @@ from ._points import Points
 from ._line import Line
 from ._mesh import Mesh, InstancedMesh
 from ._volume import Volume
+from ._transforms import TransformStore
@@ -2,9 +2,11 @@ import gc
 import random
 import weakref
 
+import numpy as np
 from pyshader import Struct, mat4, i32
 
 from ..linalg import Vector3, Matrix4, Quaternion
+from ..linalg import TrackedVector3, TrackedQuaternion
 from ..resources import Resource, Buffer
 from ..utils import array_from_shadertype
 
@@ -12,7 +14,7 @@ from ..utils import array_from_shadertype
 # * 2_147_483_647 (2**31 -1) max number for signed i32.
 # *    16_777_216 max integer that can be stored exactly in f32
 # *     4_000_000 max integer that survives being passed as a varying (in my tests)
-_idmap = weakref.WeakKeyDictionary()
+_idmap = weakref.WeakValueDictionary()  # id -> WorldObject
 _idmax = 16_777_217  # non-inclusive
 
 
@@ -38,6 +40,7 @@ class ResourceContainer:
     def _bump_rev(self):
         """Bump the rev (and that of any "parents")"""
         self._rev += 1
+        Resource._bump_global_rev()
         for x in self._resource_parents:
             x._rev += 1
 
@@ -47,6 +50,7 @@ class ResourceContainer:
             value._resource_parents.add(self)
             self._bump_rev()
         elif isinstance(value, Resource):
+            value._resource_parents.add(self)
             self._bump_rev()
 
 
@@ -73,29 +77,47 @@ class WorldObject(ResourceContainer):
     _m = Matrix4()
     _q = Quaternion()
 
+    # The objects (e.g. a BVH) to notify when the world transform changes
+    _bounds_listeners = ()
+
+    # The TransformStore that holds the transform, if any
+    _transform_store = None
+
     def __init__(self):
         super().__init__()
         self.parent = None
         self._children = []
+        self._structure_rev = 0
+
+        # Whether this object or any of its descendants may need a
+        # transform update. If so, this is also set on all ancestors.
+        self._subtree_dirty = True
 
-        self.position = Vector3()
-        self.rotation = Quaternion()
-        self.scale = Vector3(1, 1, 1)
-        self._transform_hash = ()
+        # The transform notifies this object when it changes
+        self._transform_changed = True
+        callback = self._on_transform_change
+        self._position = TrackedVector3(callback=callback)
+        self._rotation = TrackedQuaternion(callback=callback)
+        self._scale = TrackedVector3(1, 1, 1, callback=callback)
 
         self.up = Vector3(0, 1, 0)
 
         self.matrix = Matrix4()
         self.matrix_auto_update = True
         self.matrix_world = Matrix4()
-        self.matrix_world_dirty = True
+        self._matrix_world_dirty = True
+        self._matrix_world_rev = 0
 
         self.uniform_buffer = Buffer(
             array_from_shadertype(self.uniform_type), usage="uniform"
         )
 
-        self.visible = True
-        self.render_order = 0
+        self._visible = True
+        self._render_order = 0
+
+        # Cached bounds, as (bounds, matrix_world rev, world bounds) tuples
+        self._world_bounding_box_cache = None, None, None
+        self._world_bounding_sphere_cache = None, None, None
 
         # See if we reached max number of objects. If so, try cleanup and try again.
         # Actually, stop earlier to prevent that while loop below to become slow.
@@ -106,9 +128,9 @@ class WorldObject(ResourceContainer):
                 raise RuntimeError("Max number of objects reached")
         # Set id
         self._id = random.randint(1, _idmax - 1)
-        while self._id in _idmap.values():
+        while self._id in _idmap:
             self._id = (self._id + 1) % _idmax
-        _idmap[self] = self._id
+        _idmap[self._id] = self
         self.uniform_buffer.data["id"] = self._id
 
     @property
@@ -116,6 +138,117 @@ class WorldObject(ResourceContainer):
         """An integer id smaller than 2**31."""
         return self._id
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name == "material":
+            self._bump_structure_rev()
+
+    @property
+    def structure_rev(self):
+        """Monotonically increasing integer that gets bumped when the
+        structure of the subtree of this object changes: when objects are
+        added or removed, their visibility changes, or a material is set.
+        Renderers can use this to cache the list of objects to render.
+        """
+        return self._structure_rev
+
+    def _bump_structure_rev(self):
+        """Bump the structure_rev of this object and its ancestors."""
+        obj = self
+        while obj is not None:
+            obj._structure_rev += 1
+            obj = obj.parent
+
+    @property
+    def visible(self):
+        """Whether this object is rendered. Note that the visibility
+        of the children is not affected.
+        """
+        return self._visible
+
+    @visible.setter
+    def visible(self, value):
+        value = bool(value)
+        if value != self._visible:
+            self._visible = value
+            self._bump_structure_rev()
+
+    @property
+    def render_order(self):
+        """A number that affects the order in which objects are rendered.
+        Objects with a higher render_order are rendered later. Default 0.
+        """
+        return self._render_order
+
+    @render_order.setter
+    def render_order(self, value):
+        if value != self._render_order:
+            self._render_order = value
+            Resource._bump_global_rev()
+
+    @property
+    def position(self):
+        """The position (a Vector3) relative to the parent. It can be
+        changed in-place. Setting it copies the given vector.
+        """
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position.copy(value)
+
+    @property
+    def rotation(self):
+        """The rotation (a Quaternion) relative to the parent. It can be
+        changed in-place. Setting it copies the given quaternion.
+        """
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self._rotation.copy(value)
+
+    @property
+    def scale(self):
+        """The scale (a Vector3) relative to the parent. It can be
+        changed in-place. Setting it copies the given vector.
+        """
+        return self._scale
+
+    @scale.setter
+    def scale(self, value):
+        self._scale.copy(value)
+
+    def _on_transform_change(self):
+        """Called by the position, rotation or scale on the first change
+        since the last ``update_matrix()``.
+        """
+        self._transform_changed = True
+        self._mark_subtree_dirty()
+
+    @property
+    def matrix_world_dirty(self):
+        """Whether the matrix_world must be recalculated. Set this when
+        changing the matrix directly (with matrix_auto_update off).
+        """
+        return self._matrix_world_dirty
+
+    @matrix_world_dirty.setter
+    def matrix_world_dirty(self, value):
+        self._matrix_world_dirty = bool(value)
+        if value:
+            self._mark_subtree_dirty()
+
+    def _mark_subtree_dirty(self):
+        """Flag this object and its ancestors, so that the next call to
+        ``update_matrix_world()`` visits this object. Subtrees that are not
+        flagged are skipped.
+        """
+        obj = self
+        while obj is not None and not obj._subtree_dirty:
+            obj._subtree_dirty = True
+            obj = obj.parent
+
     @property
     def children(self):
         return tuple(self._children)
@@ -128,13 +261,16 @@ class WorldObject(ResourceContainer):
         obj.parent = self
         self._children.append(obj)
         # flag world matrix as dirty
-        obj.matrix_world_dirty = True
+        obj._matrix_world_dirty = True
+        self._mark_subtree_dirty()
+        self._bump_structure_rev()
         return self
 
     def remove(self, obj):
         if obj in self._children:
             obj.parent = None
             self._children.remove(obj)
+            self._bump_structure_rev()
 
     def traverse(self, callback):
         callback(self)
@@ -142,12 +278,19 @@ class WorldObject(ResourceContainer):
             child.traverse(callback)
 
     def update_matrix(self):
-        p, r, s = self.position, self.rotation, self.scale
-        hash = p.x, p.y, p.z, r.x, r.y, r.z, r.w, s.x, s.y, s.z
-        if hash != self._transform_hash:
-            self._transform_hash = hash
-            self.matrix.compose(self.position, self.rotation, self.scale)
+        if self._transform_store is not None:
+            self._transform_store.update()
+            return
+        if self._transform_changed:
+            self._transform_changed = False
+            p, r, s = self._position, self._rotation, self._scale
+            self.matrix.compose(p, r, s)
             self.matrix_world_dirty = True
+            # Get notified of the next change
+            callback = self._on_transform_change
+            p.on_change(callback)
+            r.on_change(callback)
+            s.on_change(callback)
 
     def set_matrix(self, matrix):
         self.matrix.copy(matrix)
@@ -164,29 +307,147 @@ class WorldObject(ResourceContainer):
     def update_matrix_world(
         self, force=False, update_children=True, update_parents=False
     ):
+        """Update the matrix_world of this object, and optionally of its
+        children and parents. Children are only visited if their subtree
+        may have changed (or force is set), so the cost depends on the
+        number of changed objects rather than the size of the scene.
+
+        If this object is in a TransformStore, all objects in the store
+        are updated in a batch.
+        """
+        store = self._transform_store
+        if store is not None:
+            root = store.root
+            if update_parents and root.parent:
+                root.parent.update_matrix_world(
+                    force=force, update_children=False, update_parents=True
+                )
+            store.update(force=force)
+            return
         if update_parents and self.parent:
             self.parent.update_matrix_world(
                 force=force, update_children=False, update_parents=True
             )
         if self.matrix_auto_update:
             self.update_matrix()
-        if self.matrix_world_dirty or force:
+        if self._matrix_world_dirty or force:
             if self.parent is None:
                 self.matrix_world.copy(self.matrix)
             else:
                 self.matrix_world.multiply_matrices(
                     self.parent.matrix_world, self.matrix
                 )
-            self.uniform_buffer.data["world_transform"] = tuple(
-                self.matrix_world.elements
-            )
-            self.uniform_buffer.update_range(0, 1)
-            self.matrix_world_dirty = False
+            self._set_matrix_world(self.matrix_world.elements)
             for child in self._children:
-                child.matrix_world_dirty = True
+                child._matrix_world_dirty = True
         if update_children:
+            # Clear the flag first, so that changes made while updating
+            # the children are flagged again.
+            self._subtree_dirty = False
             for child in self._children:
-                child.update_matrix_world()
+                if child._subtree_dirty or child._matrix_world_dirty or force:
+                    child.update_matrix_world(force=force)
+
+    def _set_matrix_world(self, elements):
+        """Set the (updated) elements of the matrix_world, and pass it on
+        to the uniform buffer and the bounds listeners.
+        """
+        self.matrix_world.elements = elements
+        self.uniform_buffer.data["world_transform"] = tuple(elements)
+        self.uniform_buffer.update_range(0, 1)
+        self._matrix_world_dirty = False
+        self._matrix_world_rev += 1
+        for listener in self._bounds_listeners:
+            listener.mark_dirty(self)
+
+    def _get_matrix_world_rev(self):
+        """Get a value that changes when the matrix_world changes."""
+        if self._transform_store is not None:
+            return self._transform_store._get_world_rev(self)
+        return self._matrix_world_rev
+
+    def _add_bounds_listener(self, listener):
+        """Add an object (e.g. a BVH) of which ``mark_dirty(wobject)`` is
+        called when the world transform of this object changes.
+        """
+        if not isinstance(self._bounds_listeners, weakref.WeakSet):
+            self._bounds_listeners = weakref.WeakSet()
+        self._bounds_listeners.add(listener)
+        if self._transform_store is not None:
+            self._transform_store._track_bounds(self)
+
+    def _remove_bounds_listener(self, listener):
+        """Remove an object that was added with ``_add_bounds_listener()``."""
+        if isinstance(self._bounds_listeners, weakref.WeakSet):
+            self._bounds_listeners.discard(listener)
+
+    def _get_bounding_box(self):
+        """Get the bounding box in local coordinates as a (2, 3) array,
+        or None if the object has no (known) extent. Subclasses can
+        overload this.
+        """
+        geometry = getattr(self, "geometry", None)
+        if geometry is None:
+            return None
+        return geometry.bounding_box()
+
+    def _get_bounding_sphere(self):
+        """Get the bounding sphere in local coordinates as a (center,
+        radius) tuple, or None. Subclasses can overload this.
+        """
+        geometry = getattr(self, "geometry", None)
+        if geometry is None:
+            return None
+        return geometry.bounding_sphere()
+
+    def get_world_bounding_box(self):
+        """Get the axis-aligned bounding box in world coordinates as a
+        (2, 3) array with the minimum and maximum, or None if the object
+        has no (known) extent. The result is cached, and only recalculated
+        when the geometry or matrix_world changes.
+        """
+        bbox = self._get_bounding_box()
+        if bbox is None:
+            return None
+        rev = self._get_matrix_world_rev()
+        cache = self._world_bounding_box_cache
+        if cache[0] is not bbox or cache[1] != rev:
+            # Transform the 8 corners
+            corners = np.array(
+                [
+                    [bbox[i, 0], bbox[j, 1], bbox[k, 2], 1]
+                    for i in (0, 1)
+                    for j in (0, 1)
+                    for k in (0, 1)
+                ]
+            )
+            # column-major, so transposed
+            m = np.array(self.matrix_world.elements).reshape(4, 4)
+            world_corners = corners @ m
+            world_corners = world_corners[:, :3] / world_corners[:, 3:]
+            world_bbox = np.array([world_corners.min(0), world_corners.max(0)])
+            cache = self._world_bounding_box_cache = bbox, rev, world_bbox
+        return cache[2]
+
+    def get_world_bounding_sphere(self):
+        """Get the bounding sphere in world coordinates as a (center,
+        radius) tuple, or None if the object has no (known) extent. The
+        result is cached, and only recalculated when the geometry or
+        matrix_world changes.
+        """
+        sphere = self._get_bounding_sphere()
+        if sphere is None:
+            return None
+        rev = self._get_matrix_world_rev()
+        cache = self._world_bounding_sphere_cache
+        if cache[0] is not sphere or cache[1] != rev:
+            center, radius = sphere
+            m = np.array(self.matrix_world.elements).reshape(4, 4).T
+            world_center = m[:3, :3] @ center + m[:3, 3]
+            world_radius = radius * self.matrix_world.get_max_scale_on_axis()
+            world_sphere = world_center, world_radius
+            cache = self._world_bounding_sphere_cache = sphere, rev, world_sphere
+        return cache[2]
 
     def look_at(self, target: Vector3):
         self.update_matrix_world(update_parents=True, update_children=False)
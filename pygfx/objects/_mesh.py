@@ -33,6 +33,13 @@ class InstancedMesh(Mesh):
             matrices[:, i, i] = 1
         self.matrices = Buffer(matrices, usage="STORAGE", nitems=count)
 
+    def _get_bounding_box(self):
+        # The instances can be anywhere, so we don't know the extent
+        return None
+
+    def _get_bounding_sphere(self):
+        return None
+
     def set_matrix_at(self, index: int, matrix):
         matrix = np.array(matrix).reshape(4, 4)
         self.matrices.data[index] = matrix
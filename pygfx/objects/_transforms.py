@@ -0,0 +1,477 @@
+import numpy as np
+
+from ..linalg import Vector3, Matrix4, Quaternion
+from ..linalg import TrackedVector3, TrackedQuaternion
+from ..resources import Resource, Buffer
+
+
+class TransformStore:
+    """An (optional) store for the transforms of all world objects in a
+    tree, in contiguous float32 numpy arrays. With a store, the
+    ``update_matrix_world()`` of the root composes the local matrices of
+    all changed objects, and multiplies them with the world matrices of
+    their parents, in a few batched numpy operations (one per depth
+    level of the tree), instead of per object in Python.
+
+    The position, rotation and scale, the ``matrix`` and ``matrix_world``,
+    and the uniform buffer (if it has the standard layout) of the objects
+    become views onto the arrays of the store, so that the results are
+    also written (and marked for upload) in a batch. Only objects of which the bounds are tracked
+    (e.g. by a BVH) are notified one by one. The arrays can also be
+    modified directly, e.g. to move many objects at once, using
+    ``get_slots()`` and ``mark_changed()``. Objects that are added to the
+    tree are included on the next update. Objects that are removed are
+    released, which (like adding them) re-creates their uniform buffer.
+
+    Note that the values are stored as float32, so they are less precise
+    than normal (float64) transforms.
+
+    Parameters:
+        root (WorldObject): The root of the tree, e.g. the scene.
+    """
+
+    def __init__(self, root):
+        if root._transform_store is not None:
+            raise ValueError("The given object already has a transform store.")
+        self._root = root
+        self._uniform_dtype = root.uniform_buffer.data.dtype
+        self._uniform_blocks = []  # list of (first slot, array) tuples
+        self._objects = []  # slot -> WorldObject or None
+        self._slots = {}  # WorldObject -> slot
+        self._free_slots = []
+        self._capacity = 0
+        self._allocate(64)
+        self._structure_rev = None
+        self._order = np.zeros((0,), np.int64)  # slots in topological order
+        self._parents = np.zeros((0,), np.int64)  # slot -> parent slot or -1
+        self._levels = []  # list of slot arrays, per depth
+        self._sync()
+
+    @property
+    def root(self):
+        """The root object of the tree of which the transforms are stored."""
+        return self._root
+
+    @property
+    def positions(self):
+        """The (capacity, 3) float32 array with the positions, per slot."""
+        return self._positions
+
+    @property
+    def rotations(self):
+        """The (capacity, 4) float32 array with the rotations (quaternions
+        as x, y, z, w), per slot.
+        """
+        return self._rotations
+
+    @property
+    def scales(self):
+        """The (capacity, 3) float32 array with the scales, per slot."""
+        return self._scales
+
+    @property
+    def world_matrices(self):
+        """The (capacity, 16) float32 array with the world matrices, per
+        slot, in the same (column-major) order as ``Matrix4.elements``.
+        """
+        return self._world
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, wobject):
+        return wobject in self._slots
+
+    def get_slots(self, wobjects):
+        """Get the slots (indices into the arrays) of the given objects."""
+        self._sync()
+        return np.array([self._slots[wobject] for wobject in wobjects], np.int64)
+
+    def mark_changed(self, slots):
+        """Mark the transforms at the given slots as changed, after
+        modifying the arrays directly.
+        """
+        self._mark_changed(slots)
+
+    def _mark_changed(self, slots):
+        self._changed[slots] = True
+        # Make sure that the update of the parents reaches the root
+        self._root._mark_subtree_dirty()
+
+    def close(self):
+        """Release all objects, giving them a normal transform again."""
+        for wobject in list(self._slots):
+            self._release(wobject)
+        self._root = None
+
+    def update(self, force=False):
+        """Update the matrices of all objects of which the transform (or
+        that of an ancestor) has changed. Called by the root's
+        ``update_matrix_world()``.
+        """
+        self._sync()
+        objects = self._objects
+
+        # Collect objects that are flagged otherwise, e.g. because their
+        # matrix was set directly. The clean subtrees are skipped.
+        flagged = []
+        self._collect_flagged(self._root, flagged)
+        world_changed = np.zeros((self._capacity,), bool)
+        for wobject in flagged:
+            slot = self._slots[wobject]
+            world_changed[slot] = True
+            auto_update = wobject.matrix_auto_update
+            self._auto_update[slot] = auto_update
+            if auto_update:
+                self._changed[slot] = True
+            else:
+                self._local[slot] = wobject.matrix.elements
+            wobject._matrix_world_dirty = False
+
+        # Compose the local matrices
+        changed = self._changed & self._auto_update
+        if force:
+            changed[:] = self._auto_update
+            world_changed[self._order] = True
+        slots = np.flatnonzero(changed)
+        if len(slots):
+            self._local[slots] = compose_matrices(
+                self._positions[slots], self._rotations[slots], self._scales[slots]
+            )
+        world_changed |= self._changed
+        self._changed[:] = False
+
+        # Multiply with the parents' world matrix, level by level
+        local = self._local.reshape(-1, 4, 4)
+        world = self._world.reshape(-1, 4, 4)
+        for level in self._levels:
+            parents = self._parents[level]
+            if parents[0] < 0:
+                # The root. The matrices are transposed, because column-major.
+                parent = self._root.parent
+                if world_changed[level[0]] or (parent is not None and force):
+                    base = np.eye(4, dtype=np.float32)
+                    if parent is not None:
+                        base = np.array(parent.matrix_world.elements).reshape(4, 4)
+                    world[level] = local[level] @ base
+                    world_changed[level] = True
+                continue
+            world_changed[level] |= world_changed[parents]
+            level = level[world_changed[level]]
+            if len(level):
+                world[level] = local[level] @ world[self._parents[level]]
+
+        # Write the results into the uniform data, and mark these for upload
+        slots = self._order[world_changed[self._order]]
+        if not len(slots):
+            return
+        self._world_revs[slots] += 1
+        batched = slots[self._batched[slots]]
+        for first, block in self._uniform_blocks:
+            sub = batched[(batched >= first) & (batched < first + len(block))]
+            block["world_transform"][sub - first] = self._world[sub]
+        self._uniform_revs[batched] += 1
+        self._uniform_pending[batched] = True
+        Resource._bump_global_rev()
+        for slot in slots[~self._batched[slots]].tolist():
+            uniform_buffer = objects[slot].uniform_buffer
+            uniform_buffer.data["world_transform"] = tuple(self._world[slot])
+            uniform_buffer.update_range(0, 1)
+
+        # Notify the bounds listeners (e.g. a BVH) of the moved objects
+        for slot in slots[self._tracked[slots]].tolist():
+            wobject = objects[slot]
+            for listener in wobject._bounds_listeners:
+                listener.mark_dirty(wobject)
+
+    def _allocate(self, capacity):
+        """Grow the arrays to the given capacity."""
+        n = self._capacity
+        self._capacity = capacity
+
+        def grow(array, shape, fill=0):
+            new_array = np.full((capacity,) + shape, fill, array.dtype)
+            new_array[:n] = array[:n]
+            return new_array
+
+        if n == 0:
+            self._positions = np.zeros((capacity, 3), np.float32)
+            self._rotations = np.zeros((capacity, 4), np.float32)
+            self._rotations[:, 3] = 1
+            self._scales = np.ones((capacity, 3), np.float32)
+            self._local = np.tile(np.eye(4, dtype=np.float32).ravel(), (capacity, 1))
+            self._world = self._local.copy()
+            self._changed = np.zeros((capacity,), bool)
+            self._auto_update = np.ones((capacity,), bool)
+            self._batched = np.zeros((capacity,), bool)
+            self._tracked = np.zeros((capacity,), bool)
+            self._uniform_revs = np.zeros((capacity,), np.int64)
+            self._world_revs = np.zeros((capacity,), np.int64)
+            self._uniform_pending = np.zeros((capacity,), bool)
+        else:
+            self._positions = grow(self._positions, (3,))
+            self._rotations = grow(self._rotations, (4,))
+            self._scales = grow(self._scales, (3,), 1)
+            self._local = grow(self._local, (16,))
+            self._world = grow(self._world, (16,))
+            self._changed = grow(self._changed, ())
+            self._auto_update = grow(self._auto_update, (), True)
+            self._batched = grow(self._batched, ())
+            self._tracked = grow(self._tracked, ())
+            self._uniform_revs = grow(self._uniform_revs, ())
+            self._world_revs = grow(self._world_revs, ())
+            self._uniform_pending = grow(self._uniform_pending, ())
+        # The uniform data is not moved, because the buffers are views onto it
+        self._uniform_blocks.append((n, np.zeros((capacity - n,), self._uniform_dtype)))
+        self._objects.extend([None] * (capacity - n))
+        self._free_slots.extend(range(capacity - 1, n - 1, -1))
+
+    def _sync(self):
+        """Update the set of objects and the topological order, when the
+        structure of the tree has changed.
+        """
+        if self._root is None:
+            raise RuntimeError("The transform store is closed.")
+        if self._structure_rev == self._root.structure_rev:
+            return
+        self._structure_rev = self._root.structure_rev
+
+        # Traverse the tree, which gives the topological order
+        wobjects = []
+        depths = []
+
+        def visit(wobject, depth):
+            wobjects.append(wobject)
+            depths.append(depth)
+            for child in wobject._children:
+                visit(child, depth + 1)
+
+        visit(self._root, 0)
+
+        # Release objects that are no longer in the tree, and add new ones
+        current = set(wobjects)
+        for wobject in list(self._slots):
+            if wobject not in current:
+                self._release(wobject)
+        for wobject in wobjects:
+            if wobject not in self._slots:
+                self._take(wobject)
+
+        # Store the order, parents and levels
+        slots = self._slots
+        order = np.array([slots[wobject] for wobject in wobjects], np.int64)
+        parents = np.full((self._capacity,), -1, np.int64)
+        parents[order[1:]] = [slots[wobject.parent] for wobject in wobjects[1:]]
+        depths = np.array(depths)
+        self._order = order
+        self._parents = parents
+        self._levels = [order[depths == d] for d in range(depths.max() + 1)]
+        for wobject in wobjects:
+            self._auto_update[slots[wobject]] = wobject.matrix_auto_update
+
+    def _take(self, wobject):
+        """Include the given object, making its transform a view."""
+        if wobject._transform_store is not None:
+            raise ValueError("An object can only be in one transform store.")
+        if not self._free_slots:
+            self._allocate(2 * self._capacity)
+        slot = self._free_slots.pop()
+        self._objects[slot] = wobject
+        self._slots[wobject] = slot
+        self._positions[slot] = wobject._position.to_array()
+        self._rotations[slot] = wobject._rotation.to_array()
+        self._scales[slot] = wobject._scale.to_array()
+        self._local[slot] = wobject.matrix.elements
+        self._world[slot] = wobject.matrix_world.elements
+        self._changed[slot] = True
+        self._world_revs[slot] += 1  # the slot may have been used before
+        self._tracked[slot] = bool(wobject._bounds_listeners)
+        wobject._position = Vector3View(self, slot, "_positions")
+        wobject._rotation = QuaternionView(self, slot, "_rotations")
+        wobject._scale = Vector3View(self, slot, "_scales")
+        wobject.matrix = Matrix4View(self, slot, "_local")
+        wobject.matrix_world = Matrix4View(self, slot, "_world")
+        data = wobject.uniform_buffer.data
+        self._batched[slot] = batched = data.dtype == self._uniform_dtype
+        if batched:
+            view = self._get_uniform_data(slot)
+            view[()] = data
+            wobject.uniform_buffer = UniformBufferView(self, slot, view)
+        wobject._transform_store = self
+        wobject.matrix_world_dirty = True
+
+    def _release(self, wobject):
+        """Exclude the given object, giving it a normal transform again."""
+        slot = self._slots.pop(wobject)
+        self._objects[slot] = None
+        self._free_slots.append(slot)
+        callback = wobject._on_transform_change
+        wobject._position = TrackedVector3(*self._positions[slot].tolist())
+        wobject._rotation = TrackedQuaternion(*self._rotations[slot].tolist())
+        wobject._scale = TrackedVector3(*self._scales[slot].tolist())
+        wobject.matrix = Matrix4().from_array(self._local[slot].tolist())
+        wobject.matrix_world = Matrix4().from_array(self._world[slot].tolist())
+        if self._batched[slot]:
+            data = np.zeros((), self._uniform_dtype)
+            data[()] = wobject.uniform_buffer.data
+            wobject.uniform_buffer = Buffer(data, usage="uniform")
+        wobject._transform_store = None
+        wobject._matrix_world_rev += 1
+        callback()
+
+    def _track_bounds(self, wobject):
+        """Called when a bounds listener is added to the given object."""
+        slot = self._slots.get(wobject, None)
+        if slot is not None:
+            self._tracked[slot] = True
+
+    def _get_world_rev(self, wobject):
+        """Get a value that changes when the world matrix of the given
+        object changes.
+        """
+        slot = self._slots[wobject]
+        return self, slot, int(self._world_revs[slot])
+
+    def _get_uniform_data(self, slot):
+        """Get the uniform data for the given slot, as a view."""
+        for first, block in self._uniform_blocks:
+            if first <= slot < first + len(block):
+                return block[slot - first : slot - first + 1].reshape(())
+
+    def _collect_flagged(self, wobject, flagged):
+        if wobject._matrix_world_dirty:
+            flagged.append(wobject)
+        if wobject._subtree_dirty:
+            wobject._subtree_dirty = False
+            for child in wobject._children:
+                if child._subtree_dirty or child._matrix_world_dirty:
+                    self._collect_flagged(child, flagged)
+
+
+def compose_matrices(positions, rotations, scales):
+    """Compose (N, 16) matrices (in the column-major order of
+    ``Matrix4.elements``) from (N, 3) positions, (N, 4) quaternions and
+    (N, 3) scales. This is the vectorized version of ``Matrix4.compose()``.
+    """
+    x, y, z, w = rotations.T
+    x2, y2, z2 = x + x, y + y, z + z
+    xx, xy, xz = x * x2, x * y2, x * z2
+    yy, yz, zz = y * y2, y * z2, z * z2
+    wx, wy, wz = w * x2, w * y2, w * z2
+    sx, sy, sz = scales.T
+
+    te = np.zeros((len(positions), 16), positions.dtype)
+    te[:, 0] = (1 - (yy + zz)) * sx
+    te[:, 1] = (xy + wz) * sx
+    te[:, 2] = (xz - wy) * sx
+    te[:, 4] = (xy - wz) * sy
+    te[:, 5] = (1 - (xx + zz)) * sy
+    te[:, 6] = (yz + wx) * sy
+    te[:, 8] = (xz + wy) * sz
+    te[:, 9] = (yz - wx) * sz
+    te[:, 10] = (1 - (xx + yy)) * sz
+    te[:, 12:15] = positions
+    te[:, 15] = 1
+    return te
+
+
+class Matrix4View(Matrix4):
+    """A Matrix4 of which the elements are a row of an array of a
+    TransformStore. The elements are a (float32) numpy array.
+    """
+
+    def __init__(self, store, slot, name):
+        self.__dict__.update(_store=store, _slot=slot, _name=name)
+
+    @property
+    def elements(self):
+        return getattr(self._store, self._name)[self._slot]
+
+    @elements.setter
+    def elements(self, elements):
+        getattr(self._store, self._name)[self._slot] = elements
+
+
+class UniformBufferView(Buffer):
+    """A uniform Buffer of which the data is a row of an array of a
+    TransformStore. The store tracks the updates per slot, so that it
+    can mark the buffers of many objects for upload at once.
+    """
+
+    def __init__(self, store, slot, data):
+        self._store = store
+        self._slot = slot
+        self._rev_offset = int(store._uniform_revs[slot])
+        super().__init__(data, usage="uniform")
+
+    @property
+    def rev(self):
+        store_rev = int(self._store._uniform_revs[self._slot]) - self._rev_offset
+        return self._rev + store_rev
+
+    @property
+    def _pending_uploads(self):
+        # Take over the pending upload that the store marked
+        store = self._store
+        if store._uniform_pending[self._slot]:
+            store._uniform_pending[self._slot] = False
+            self._own_pending_uploads = [(0, 1)]
+            self._pending_nitems = 1
+        return self._own_pending_uploads
+
+    @_pending_uploads.setter
+    def _pending_uploads(self, pending_uploads):
+        self._store._uniform_pending[self._slot] = False
+        self._own_pending_uploads = pending_uploads
+
+
+class Vector3View(Vector3):
+    """A Vector3 of which the components are stored in a row of an
+    array of a TransformStore.
+    """
+
+    def __init__(self, store, slot, name):
+        self.__dict__.update(_store=store, _slot=slot, _name=name)
+
+    def _get(self, i):
+        return float(getattr(self._store, self._name)[self._slot, i])
+
+    def _set(self, i, value):
+        store = self._store
+        getattr(store, self._name)[self._slot, i] = value
+        store._mark_changed(self._slot)
+
+    x = property(lambda self: self._get(0), lambda self, v: self._set(0, v))
+    y = property(lambda self: self._get(1), lambda self, v: self._set(1, v))
+    z = property(lambda self: self._get(2), lambda self, v: self._set(2, v))
+
+    def set(self, x: float, y: float, z: float) -> "Vector3":
+        # Set all components at once
+        store = self._store
+        getattr(store, self._name)[self._slot] = x, y, z
+        store._mark_changed(self._slot)
+        return self
+
+
+class QuaternionView(Quaternion):
+    """A Quaternion of which the components are stored in a row of an
+    array of a TransformStore.
+    """
+
+    def __init__(self, store, slot, name):
+        self.__dict__.update(_store=store, _slot=slot, _name=name)
+
+    _get = Vector3View._get
+    _set = Vector3View._set
+
+    x = property(lambda self: self._get(0), lambda self, v: self._set(0, v))
+    y = property(lambda self: self._get(1), lambda self, v: self._set(1, v))
+    z = property(lambda self: self._get(2), lambda self, v: self._set(2, v))
+    w = property(lambda self: self._get(3), lambda self, v: self._set(3, v))
+
+    def set(self, x: float, y: float, z: float, w: float) -> "Quaternion":
+        # Set all components at once
+        store = self._store
+        getattr(store, self._name)[self._slot] = x, y, z, w
+        store._mark_changed(self._slot)
+        return self
@@ -1,3 +1,5 @@
+import numpy as np
+
 from ..objects import WorldObject
 from ..materials import Material
 
@@ -10,6 +12,30 @@ class Renderer:
     pass
 
 
+def depth_sort(wobjects, proj_screen_matrix):
+    """Sort the given world objects by render_order, and then from
+    back-to-front, based on the depth of their position after projection
+    with the given Matrix4 (the depth is larger further away). The
+    projection is done for all objects at once, using numpy. Returns a
+    new list.
+    """
+    n = len(wobjects)
+    if n == 0:
+        return []
+    # The translation is in the last column of the (column-major) matrix
+    positions = np.ones((n, 4), np.float64)
+    positions[:, :3] = [wobject.matrix_world.elements[12:15] for wobject in wobjects]
+    render_orders = np.array([wobject.render_order for wobject in wobjects])
+    # Because the Matrix4 is column-major, this multiplies with its transpose
+    m = np.array(proj_screen_matrix.elements, np.float64).reshape(4, 4)
+    clip = positions @ m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = clip[:, 2] / clip[:, 3]
+    # The last key is the primary key, and the sort is stable
+    order = np.lexsort((-z, render_orders))
+    return [wobjects[i] for i in order]
+
+
 class RenderFunctionRegistry:
     """A registry for render functions capable of rendering specific
     object-material combinations. This registry allows for a scalable
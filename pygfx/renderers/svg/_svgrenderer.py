@@ -2,10 +2,12 @@ import os
 import io
 
 from .. import Renderer, RenderFunctionRegistry
+from .._base import depth_sort
 
 from ...objects import WorldObject
 from ...cameras import Camera
-from ...linalg import Matrix4, Vector3
+from ...linalg import Matrix4
+from ...spatial import frustum_cull
 
 
 registry = RenderFunctionRegistry()
@@ -82,14 +84,8 @@ class SvgRenderer(Renderer):
 
         scene.traverse(visit)
 
+        # skip objects that are outside of the view frustum
+        q = frustum_cull(q, proj_screen_matrix)
+
         # next, sort them from back-to-front
-        def sort_func(wobject: WorldObject):
-            z = (
-                Vector3()
-                .set_from_matrix_position(wobject.matrix_world)
-                .apply_matrix4(proj_screen_matrix)
-                .z
-            )
-            return wobject.render_order, z
-
-        return list(sorted(q, key=sort_func))
+        return depth_sort(q, proj_screen_matrix)
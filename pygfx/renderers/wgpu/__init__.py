@@ -3,6 +3,7 @@
 from ._wgpurenderer import stdinfo_uniform_type
 from ._wgpurenderer import WgpuRenderer, registry, register_wgpu_render_function
 from .postprocessing import PostProcessingStep
+from ._renderstate import sort_by_state, sort_by_depth
 from . import meshrender
 from . import pointsrender
 from . import linerender
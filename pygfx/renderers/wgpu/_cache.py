@@ -0,0 +1,82 @@
+import weakref
+
+from ...resources import Buffer
+from ...utils import array_from_shadertype
+
+
+class GpuObjectCache:
+    """Class used internally to share wgpu objects (e.g. pipelines)
+    between world objects. Objects are stored by a hashable key that
+    describes everything that the object depends on. Keeps track of
+    the number of hits and misses, so we can see how well it works.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def get(self, key, create_func):
+        """Get the object for the given key. If it is not present,
+        create_func is called (without arguments) to create it.
+        """
+        try:
+            ob = self._objects[key]
+        except KeyError:
+            self.misses += 1
+            ob = self._objects[key] = create_func()
+        else:
+            self.hits += 1
+        return ob
+
+    def clear(self):
+        """Remove all objects from the cache (the counters are kept)."""
+        self._objects.clear()
+
+
+def make_hashable(ob):
+    """Convert a (nested) descriptor of dicts and lists into a hashable
+    tuple, so it can be used as (part of) a cache key.
+    """
+    if isinstance(ob, dict):
+        return tuple((key, make_hashable(ob[key])) for key in sorted(ob))
+    elif isinstance(ob, (list, tuple)):
+        return tuple(make_hashable(x) for x in ob)
+    else:
+        return ob
+
+
+# Uniform buffers that render functions keep per world object
+_object_uniforms = weakref.WeakKeyDictionary()
+
+
+def get_object_uniform(wobject, uniform_type):
+    """Get a uniform buffer of the given type for the given world object.
+    The same buffer is returned when the render function runs again, so
+    a render function can update it in place (see ``update_uniform()``),
+    without the need to re-create bind groups.
+    """
+    uniforms = _object_uniforms.setdefault(wobject, {})
+    try:
+        return uniforms[uniform_type]
+    except KeyError:
+        uniform_buffer = Buffer(array_from_shadertype(uniform_type), usage="UNIFORM")
+        uniforms[uniform_type] = uniform_buffer
+        return uniform_buffer
+
+
+def update_uniform(uniform_buffer, **values):
+    """Set the given fields of a uniform buffer. It is only marked for
+    upload if any of the values changed.
+    """
+    data = uniform_buffer.data
+    changed = False
+    for key, value in values.items():
+        if data[key] != value:
+            data[key] = value
+            changed = True
+    if changed:
+        uniform_buffer.update_range(0, 1)
@@ -0,0 +1,36 @@
+import numpy as np
+import wgpu  # only for flags/enums
+import pyshader
+from pyshader import python2shader
+from pyshader import vec4
+
+
+# The overdraw is counted in a float16 texture, which is blendable, and
+# can represent the counts exactly up to 2048.
+OVERDRAW_FORMAT = wgpu.TextureFormat.r16float
+
+
+@python2shader
+def overdraw_fragment_shader(
+    out_color: (pyshader.RES_OUTPUT, 0, vec4),
+):
+    out_color = vec4(1.0, 1.0, 1.0, 1.0)  # noqa - shader output
+
+
+# Each fragment adds one to the count of its pixel. This shader is used
+# instead of the material's fragment shader, so the discards of the
+# material (e.g. outside the circle of a round point) do not apply: it
+# counts the fragments of the rasterized primitives.
+overdraw_blend = {
+    "alpha": (wgpu.BlendFactor.one, wgpu.BlendFactor.one, wgpu.BlendOperation.add),
+    "color": (wgpu.BlendFactor.one, wgpu.BlendFactor.one, wgpu.BlendOperation.add),
+}
+
+
+def summarize_overdraw(counts):
+    """Get the number of fragments that passed the depth test, and the
+    number of pixels that these cover, from an array of counts per pixel.
+    The ratio is the average overdraw.
+    """
+    counts = np.asarray(counts, np.float64)
+    return int(counts.sum()), int((counts > 0).sum())
@@ -0,0 +1,241 @@
+from concurrent.futures import Future
+
+import numpy as np
+import wgpu  # only for flags/enums
+
+
+# The bytes_per_row of a texture-to-buffer copy must be a multiple of 256
+COPY_BYTES_PER_ROW_ALIGNMENT = 256
+
+
+def get_pixel_rect(float_pos1, float_pos2, size):
+    """Get the rectangle of pixels (x, y, w, h) of a texture of the given
+    size that is spanned by the two given positions (in the range 0..1,
+    at opposite corners). The rectangle contains at least one pixel.
+    """
+    w, h = size[0], size[1]
+    xs = sorted([float_pos1[0] * w, float_pos2[0] * w])
+    ys = sorted([float_pos1[1] * h, float_pos2[1] * h])
+    x1 = max(0, min(w - 1, int(xs[0])))
+    y1 = max(0, min(h - 1, int(ys[0])))
+    x2 = max(x1 + 1, min(w, int(np.ceil(xs[1]))))
+    y2 = max(y1 + 1, min(h, int(np.ceil(ys[1]))))
+    return x1, y1, x2 - x1, y2 - y1
+
+
+class RegionReadbackLayout:
+    """Class used internally to describe how the copies of a region of
+    multiple textures are laid out in a single readback buffer.
+    """
+
+    def __init__(self, rect, bytes_per_pixel_list):
+        self.rect = rect
+        self.sections = []  # list of (offset, bytes_per_row, bytes_per_pixel)
+        offset = 0
+        w, h = rect[2], rect[3]
+        for bytes_per_pixel in bytes_per_pixel_list:
+            bytes_per_row = _align(w * bytes_per_pixel)
+            self.sections.append((offset, bytes_per_row, bytes_per_pixel))
+            offset += bytes_per_row * h
+        self.nbytes = offset
+
+    def unpack(self, data, section_index, dtype, nchannels):
+        """Get the data of a section as an (h, w, nchannels) array."""
+        offset, bytes_per_row, bytes_per_pixel = self.sections[section_index]
+        w, h = self.rect[2], self.rect[3]
+        a = np.frombuffer(data, np.uint8, bytes_per_row * h, offset)
+        a = a.reshape(h, bytes_per_row)[:, : w * bytes_per_pixel]
+        return np.ascontiguousarray(a).view(dtype).reshape(h, w, nchannels)
+
+
+def decode_pick_values(pick_values, pick_map):
+    """Decode an (h, w, 4) array of pick values. Returns a list of
+    the unique world objects, and a dict that maps each of these to a
+    dict with the pick info for its pixels. This dict contains a "mask"
+    (an (h, w) bool array) and the material-specific fields, as arrays
+    with a value for each pixel in the mask (in row-major order).
+    """
+    ids = pick_values[..., 0]
+    wobjects = []
+    infos = {}
+    for id in np.unique(ids):
+        wobject = pick_map.get(int(id), None)
+        if wobject is None:
+            continue
+        mask = ids == id
+        info = {"mask": mask}
+        material = getattr(wobject, "material", None)
+        if material is not None:
+            # Pass the values per channel, so that the decoding is vectorized
+            columns = tuple(pick_values[mask].T)
+            info.update(material._wgpu_get_pick_info(columns))
+        wobjects.append(wobject)
+        infos[wobject] = info
+    return wobjects, infos
+
+
+def decode_pixel_info(data, float_pos, can_sample_color, pick_map):
+    """Decode the 32 bytes of pixel info of a single pixel, which contain
+    the depth (at offset 0), the color (at offset 8) and the pick value
+    (at offset 16), into the info dict of ``get_pick_info()``.
+    """
+    data = memoryview(data)
+    depth = data[0:4].cast("f")[0]
+    color = tuple(data[8:12].cast("B"))
+    pick_value = tuple(data[16:32].cast("i"))
+    wobject = pick_map.get(pick_value[0], None)
+    # Note: the position in world coordinates is not included because
+    # it depends on the camera, but we don't "own" the camera.
+
+    info = {
+        "ndc": (2 * float_pos[0] - 1, 2 * float_pos[1] - 1, depth),
+        "rgba": color if can_sample_color else (0, 0, 0, 0),
+        "world_object": wobject,
+    }
+
+    if wobject and hasattr(wobject, "material"):
+        pick_info = wobject.material._wgpu_get_pick_info(pick_value)
+        info.update(pick_info)
+    return info
+
+
+def empty_pixel_info(float_pos):
+    """Get the info dict of ``get_pick_info()`` for a pixel where there
+    is nothing, e.g. because no frame has been rendered yet.
+    """
+    return {
+        "ndc": (2 * float_pos[0] - 1, 2 * float_pos[1] - 1, 1.0),
+        "rgba": (0, 0, 0, 0),
+        "world_object": None,
+    }
+
+
+def empty_region_info():
+    """Get the info dict of ``get_pick_info_region()`` for an empty
+    region, e.g. because no frame has been rendered yet.
+    """
+    return {
+        "rect": (0, 0, 0, 0),
+        "depth": np.zeros((0, 0), np.float32),
+        "rgba": np.zeros((0, 0, 4), np.uint8),
+        "pick_values": np.zeros((0, 0, 4), np.int32),
+        "world_objects": [],
+        "pick_info": {},
+    }
+
+
+class PickReadbackQueue:
+    """Helper to read pick info without waiting for the current frame.
+    Requested pixels are copied into a readback buffer after a frame is
+    rendered, and the buffer is read a frame later. The buffers come from
+    a small pool that is rotated. Requests for the same pixel in the same
+    frame share a copy, and a request with a key cancels the unresolved
+    request with the same key (e.g. for hovering, only the result for the
+    latest position is of interest).
+
+    Note that ``map_read()`` (in wgpu-py) waits until the GPU has finished
+    *all* submitted work. So ``resolve()`` should be called before the
+    next frame is submitted; then it only waits for the previous frame,
+    which is usually done by then. Calling it right after a submit would
+    wait for that whole frame.
+
+    Parameters:
+        device: The wgpu device.
+        pool_size (int): The max number of readback buffers. Default 3.
+    """
+
+    pixels_per_buffer = 16
+    slot_size = 32  # depth, color and pick value
+
+    def __init__(self, device, pool_size=3):
+        self._device = device
+        self._pool_size = pool_size
+        self._nbuffers = 0
+        self._free_buffers = []
+        self._pending = []  # list of (float_pos, future)
+        self._keyed = {}  # key -> last future
+        self._in_flight = []  # list of (buffer, slots) tuples
+
+    def __len__(self):
+        """The number of requests that are not resolved or cancelled."""
+        futures = [f for _, f in self._pending]
+        for _, slots in self._in_flight:
+            futures += [f for _, group in slots for _, f in group]
+        return sum(not f.cancelled() for f in futures)
+
+    def request(self, float_pos, key=None):
+        """Request pick info for the given position (in the range 0..1).
+        Returns a ``concurrent.futures.Future``.
+        """
+        future = Future()
+        if key is not None:
+            old_future = self._keyed.pop(key, None)
+            if old_future is not None:
+                old_future.cancel()
+            self._keyed[key] = future
+        self._pending.append((float_pos, future))
+        return future
+
+    def resolve(self, decode):
+        """Resolve the requests whose pixels have been copied, by
+        reading the buffers and calling ``decode(data, float_pos)``.
+        This blocks until the GPU is done with the submitted work.
+        """
+        in_flight, self._in_flight = self._in_flight, []
+        for buffer, slots in in_flight:
+            data = buffer.map_read()
+            for i, (_, futures) in enumerate(slots):
+                pixel_data = data[i * self.slot_size : (i + 1) * self.slot_size]
+                for float_pos, future in futures:
+                    if not future.cancelled():
+                        future.set_result(decode(pixel_data, float_pos))
+            self._free_buffers.append(buffer)
+
+    def schedule(self, size, copy_pixel):
+        """Copy the pixels of the pending requests into readback buffers,
+        for a texture of the given size, using
+        ``copy_pixel(encoder, buffer, float_pos, offset)``. Returns the
+        command buffers to submit. Requests that do not fit in the pool
+        remain pending.
+        """
+        pending = [(p, f) for p, f in self._pending if not f.cancelled()]
+        self._pending = []
+        # Group by pixel
+        groups = {}
+        for float_pos, future in pending:
+            x = max(0, min(size[0] - 1, int(float_pos[0] * size[0])))
+            y = max(0, min(size[1] - 1, int(float_pos[1] * size[1])))
+            groups.setdefault((x, y), []).append((float_pos, future))
+        slots = list(groups.items())
+        # Copy
+        command_buffers = []
+        while slots:
+            buffer = self._get_buffer()
+            if buffer is None:
+                break  # try again next frame
+            slots_for_buffer = slots[: self.pixels_per_buffer]
+            slots = slots[self.pixels_per_buffer :]
+            encoder = self._device.create_command_encoder()
+            for i, (_, futures) in enumerate(slots_for_buffer):
+                copy_pixel(encoder, buffer, futures[0][0], i * self.slot_size)
+            command_buffers.append(encoder.finish())
+            self._in_flight.append((buffer, slots_for_buffer))
+        for _, futures in slots:
+            self._pending.extend(futures)
+        return command_buffers
+
+    def _get_buffer(self):
+        if self._free_buffers:
+            return self._free_buffers.pop(0)
+        elif self._nbuffers < self._pool_size:
+            self._nbuffers += 1
+            return self._device.create_buffer(
+                size=self.pixels_per_buffer * self.slot_size,
+                usage=wgpu.BufferUsage.COPY_DST | wgpu.BufferUsage.MAP_READ,
+            )
+        return None
+
+
+def _align(nbytes):
+    alignment = COPY_BYTES_PER_ROW_ALIGNMENT
+    return alignment * -(-nbytes // alignment)
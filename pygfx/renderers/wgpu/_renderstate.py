@@ -0,0 +1,113 @@
+class RenderPassState:
+    """Class used internally to record draw calls into a render pass,
+    while skipping calls that would not change the state of the pass.
+    Since a render pass keeps its pipeline, vertex buffers, index buffer
+    and bind groups until they are set again, consecutive objects that
+    share these do not need to set them. The number of calls that were
+    made and skipped are counted.
+    """
+
+    def __init__(self, render_pass):
+        self._render_pass = render_pass
+        self._pipeline = None
+        self._vertex_buffers = {}  # slot -> (buffer, offset, size)
+        self._bind_groups = {}  # index -> bind_group
+        self._index_buffer = None  # (buffer, offset, size)
+        self.changes = 0
+        self.skipped = 0
+
+    def set_pipeline(self, pipeline):
+        if pipeline is self._pipeline:
+            self.skipped += 1
+        else:
+            self._pipeline = pipeline
+            self._render_pass.set_pipeline(pipeline)
+            self.changes += 1
+
+    def set_vertex_buffer(self, slot, buffer, offset, size):
+        state = buffer, offset, size
+        if _same(state, self._vertex_buffers.get(slot, None)):
+            self.skipped += 1
+        else:
+            self._vertex_buffers[slot] = state
+            self._render_pass.set_vertex_buffer(slot, buffer, offset, size)
+            self.changes += 1
+
+    def set_bind_group(self, index, bind_group):
+        if bind_group is self._bind_groups.get(index, None):
+            self.skipped += 1
+        else:
+            self._bind_groups[index] = bind_group
+            self._render_pass.set_bind_group(index, bind_group, [], 0, 99)
+            self.changes += 1
+
+    def set_index_buffer(self, buffer, offset, size):
+        state = buffer, offset, size
+        if _same(state, self._index_buffer):
+            self.skipped += 1
+        else:
+            self._index_buffer = state
+            self._render_pass.set_index_buffer(buffer, offset, size)
+            self.changes += 1
+
+    def draw(self, *args):
+        self._render_pass.draw(*args)
+
+    def draw_indexed(self, *args):
+        self._render_pass.draw_indexed(*args)
+
+
+def _same(state1, state2):
+    if state2 is None:
+        return False
+    return state1[0] is state2[0] and state1[1:] == state2[1:]
+
+
+def is_transparent(wobject):
+    """Get whether the given world object is (semi-)transparent, based
+    on the alpha value of its material's color. Objects of which the
+    material has no color are considered opaque.
+    """
+    color = getattr(wobject.material, "color", None)
+    try:
+        return float(color[3]) < 1
+    except (TypeError, IndexError, ValueError):
+        return False
+
+
+def split_render_list(q):
+    """Split the given render list into a list of opaque objects and a
+    list of transparent objects, keeping the order.
+    """
+    opaque, transparent = [], []
+    for wobject in q:
+        if is_transparent(wobject):
+            transparent.append(wobject)
+        else:
+            opaque.append(wobject)
+    return opaque, transparent
+
+
+def sort_by_state(wobject, index, pipeline):
+    """The default sort key for the opaque objects. These are grouped by
+    pipeline and material, so that fewer state changes are needed to
+    draw them, and drawn front-to-back within each group.
+    """
+    return wobject.render_order, id(pipeline), id(wobject.material), -index
+
+
+def sort_by_depth(wobject, index, pipeline):
+    """A sort key to draw the opaque objects front-to-back, so that most
+    fragments of occluded objects are rejected by the depth test.
+    """
+    return wobject.render_order, -index
+
+
+def sort_render_list(q, key, get_pipeline):
+    """Sort the given render list (which is in back-to-front order)
+    using the given key function. It is called with the world object,
+    its index in the back-to-front order, and its (first) render pipeline.
+    """
+    items = [(key(wobject, i, get_pipeline(wobject)), i) for i, wobject in enumerate(q)]
+    items.sort()
+    return [q[i] for _, i in items]
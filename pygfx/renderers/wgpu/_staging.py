@@ -0,0 +1,260 @@
+import wgpu  # only for flags/enums
+from wgpu.backends.rs import ffi, lib, get_memoryview_from_address
+
+
+# Offsets and sizes for buffer copies must be a multiple of 4
+COPY_BUFFER_ALIGNMENT = 4
+
+STAGING_USAGE = wgpu.BufferUsage.MAP_WRITE | wgpu.BufferUsage.COPY_SRC
+
+
+# The public API of wgpu-py can only map a buffer by waiting for the GPU
+# to be idle. The staging belt needs to map buffers asynchronously, so
+# these functions use the native API directly.
+
+
+def create_mapped_buffer(device, size):
+    """Create a staging buffer that is mapped for writing at creation.
+    Returns the buffer and a memoryview of the mapped memory.
+    """
+    buffer = device._create_buffer("staging", size, STAGING_USAGE, True)
+    return buffer, get_mapped_memory(buffer)
+
+
+def get_mapped_memory(buffer):
+    """Get a memoryview of the mapped memory of the given buffer."""
+    # H: uint8_t *f(WGPUBufferId buffer_id, WGPUBufferAddress start, WGPUBufferSize size)
+    ptr = lib.wgpu_buffer_get_mapped_range(buffer._internal, 0, buffer.size)
+    return get_memoryview_from_address(int(ffi.cast("intptr_t", ptr)), buffer.size)
+
+
+def unmap_buffer(buffer):
+    """Unmap the given buffer, so the GPU can use it."""
+    buffer._unmap()
+
+
+def map_buffer_async(buffer, callback):
+    """Request the given buffer to be mapped for writing. The callback is
+    called with a bool (success) from ``poll_device()``, once the GPU is
+    done with the buffer. Returns an object that must be kept alive until
+    the callback is called.
+    """
+
+    @ffi.callback("void(WGPUBufferMapAsyncStatus, uint8_t*)")
+    def map_callback(status, user_data):
+        callback(status == 0)
+
+    # H: void f(WGPUBufferId buffer_id, WGPUBufferAddress start, WGPUBufferAddress size, WGPUBufferMapCallback callback, uint8_t *user_data)
+    lib.wgpu_buffer_map_write_async(
+        buffer._internal, 0, buffer.size, map_callback, ffi.NULL
+    )
+    return map_callback
+
+
+def poll_device(device):
+    """Call the callbacks of finished map requests, without waiting."""
+    # H: void f(WGPUDeviceId device_id, bool force_wait)
+    lib.wgpu_device_poll(device._internal, False)
+
+
+class StagingChunk:
+    """Class used internally to represent a staging buffer, and the
+    copies from it that are still to be recorded.
+    """
+
+    def __init__(self, device, size):
+        self.size = size
+        self.buffer, self.data = create_mapped_buffer(device, size)
+        self.offset = 0  # The part before this offset is in use
+        self.copies = []  # (offset, buffer, buffer_offset, nbytes) tuples
+        self.used = False  # Whether the chunk was used in this frame
+        self.ready = True  # Whether the chunk is mapped (can be written)
+        self._map_request = None
+
+    def allocate(self, nbytes):
+        """Sub-allocate nbytes from this chunk. Returns the offset,
+        or None if the chunk is too full.
+        """
+        offset = self.offset
+        if offset + nbytes > self.size:
+            return None
+        self.offset += _align(nbytes)
+        return offset
+
+    def close(self):
+        """Unmap the buffer, so that the copies from it can be executed."""
+        self.data = None
+        self.ready = False
+        unmap_buffer(self.buffer)
+
+    def reopen(self):
+        """Request the buffer to be mapped again. The chunk is ready
+        when the GPU is done with it, which is checked with a poll.
+        """
+        self.offset = 0
+        self.copies = []
+        self._map_request = map_buffer_async(self.buffer, self._on_mapped)
+
+    def _on_mapped(self, success):
+        self._map_request = None
+        if success:
+            self.data = get_mapped_memory(self.buffer)
+            self.ready = True
+
+
+class StagingBelt:
+    """Helper to upload data to buffers, using a pool of staging buffers
+    (chunks) that are re-used between frames. Each upload is written
+    directly into the mapped memory of a chunk (sub-allocated). When the
+    chunk is flushed, it is unmapped, and the copies from it to the target
+    buffers are recorded in the given command encoder. This avoids the
+    creation of a temporary buffer for each upload.
+
+    After the commands are submitted, the used chunks are mapped again,
+    asynchronously. A chunk is only re-used once a (non-blocking) poll
+    shows that the GPU is done with it; until then new chunks are created.
+    New chunks are mapped at creation, so nothing ever waits for the GPU.
+
+    The life cycle of a frame is: ``write()`` any number of times,
+    ``finish()`` before submitting the command encoder, and ``recall()``
+    after the submit. Use ``flush()`` before recording other commands
+    that must come after the copies, e.g. copying the target buffer.
+
+    Parameters:
+        device: The wgpu device.
+        chunk_size (int): The size of the chunks in bytes. Uploads larger
+            than this get a chunk of their own (rounded up to a multiple
+            of the chunk size).
+    """
+
+    def __init__(self, device, chunk_size=2 ** 20):
+        self._device = device
+        self._free_chunks = []  # Mapped chunks that can be used
+        self._active_chunks = []  # Chunks being filled
+        self._closed_chunks = []  # Flushed chunks, waiting for the submit
+        self._recalled_chunks = []  # Chunks being mapped again
+        self.chunk_size = chunk_size
+        self._bytes_used = self._bytes_active = 0  # Of the last frame
+        self._frame_bytes_used = self._frame_bytes_active = 0
+
+    @property
+    def chunk_size(self):
+        """The size (in bytes) of the chunks. Changing the chunk size
+        releases the currently free chunks.
+        """
+        return self._chunk_size
+
+    @chunk_size.setter
+    def chunk_size(self, value):
+        value = int(value)
+        if value <= 0 or value % COPY_BUFFER_ALIGNMENT:
+            raise ValueError("Staging chunk_size must be a positive multiple of 4.")
+        self._chunk_size = value
+        self._release(self._free_chunks)
+        self._free_chunks = []
+
+    @property
+    def stats(self):
+        """A dict with the number of chunks, the total size of these
+        chunks, the number of bytes uploaded during the last frame, and
+        the utilization (the fraction of the used chunks that was
+        actually filled with data).
+        """
+        chunks = (
+            self._free_chunks
+            + self._active_chunks
+            + self._closed_chunks
+            + self._recalled_chunks
+        )
+        return {
+            "chunks": len(chunks),
+            "nbytes": sum(chunk.size for chunk in chunks),
+            "bytes_uploaded": self._bytes_used,
+            "utilization": self._bytes_used / max(1, self._bytes_active),
+        }
+
+    def write(self, buffer, buffer_offset, data):
+        """Write the given data to the given (wgpu) buffer at the
+        given offset. The copy is recorded on the next flush.
+        """
+        mem = memoryview(data).cast("B")
+        nbytes = mem.nbytes
+        if nbytes == 0:
+            return
+        chunk, offset = self._allocate(nbytes)
+        chunk.data[offset : offset + nbytes] = mem
+        chunk.copies.append((offset, buffer, buffer_offset, nbytes))
+
+    def _allocate(self, nbytes):
+        # Try the chunks that are already in use, and then the free ones
+        for chunk in self._active_chunks:
+            offset = chunk.allocate(nbytes)
+            if offset is not None:
+                return chunk, offset
+        chunk = self._get_free_chunk(nbytes)
+        if chunk is None:
+            chunk = self._get_free_chunk(nbytes, poll=True)
+        if chunk is None:
+            size = self._chunk_size * -(-nbytes // self._chunk_size)
+            chunk = StagingChunk(self._device, size)
+        chunk.used = True
+        self._active_chunks.append(chunk)
+        return chunk, chunk.allocate(nbytes)
+
+    def _get_free_chunk(self, nbytes, poll=False):
+        if poll:
+            # Check (without waiting) which chunks the GPU is done with
+            poll_device(self._device)
+            self._free_chunks += [c for c in self._recalled_chunks if c.ready]
+            self._recalled_chunks = [c for c in self._recalled_chunks if not c.ready]
+        for i, chunk in enumerate(self._free_chunks):
+            if chunk.size >= nbytes:
+                return self._free_chunks.pop(i)
+        return None
+
+    def flush(self, encoder):
+        """Unmap the active chunks, and record the copies in the given
+        command encoder. New writes go to other chunks.
+        """
+        for chunk in self._active_chunks:
+            chunk.close()
+            for offset, buffer, buffer_offset, size in chunk.copies:
+                encoder.copy_buffer_to_buffer(
+                    chunk.buffer, offset, buffer, buffer_offset, size
+                )
+            self._frame_bytes_used += chunk.offset
+            self._frame_bytes_active += chunk.size
+        self._closed_chunks += self._active_chunks
+        self._active_chunks = []
+
+    def finish(self, encoder):
+        """Flush the chunks. Must be called before the command encoder
+        is submitted.
+        """
+        self.flush(encoder)
+        self._bytes_used, self._frame_bytes_used = self._frame_bytes_used, 0
+        self._bytes_active, self._frame_bytes_active = self._frame_bytes_active, 0
+
+    def recall(self):
+        """Map the submitted chunks again, so they can be re-used when the
+        GPU is done with them. Must be called after the command encoder is
+        submitted. Free chunks that were not used during the last frame
+        are released.
+        """
+        for chunk in self._closed_chunks:
+            chunk.reopen()
+        self._recalled_chunks += self._closed_chunks
+        self._closed_chunks = []
+        unused = [chunk for chunk in self._free_chunks if not chunk.used]
+        self._free_chunks = [chunk for chunk in self._free_chunks if chunk.used]
+        self._release(unused)
+        for chunk in self._free_chunks + self._recalled_chunks:
+            chunk.used = False
+
+    def _release(self, chunks):
+        for chunk in chunks:
+            chunk.buffer.destroy()
+
+
+def _align(nbytes):
+    return COPY_BUFFER_ALIGNMENT * -(-nbytes // COPY_BUFFER_ALIGNMENT)
@@ -0,0 +1,189 @@
+import weakref
+
+
+class PendingUploads:
+    """Class used internally to represent the upload slices that are
+    pending for a single resource (a buffer or texture).
+    """
+
+    def __init__(self, kind):
+        self.kind = kind  # "buffer" or "texture"
+        self.slices = []  # list of (offset, size, nbytes) tuples
+        self.nbytes_total = 0
+        self.nbytes_left = 0
+        self.last_used = -1  # The frame in which it was last used
+        self.order = 0  # The order of use in that frame
+
+
+class UploadScheduler:
+    """Helper to spread large uploads over multiple frames. Pending
+    uploads of buffers and textures are split into slices, which are
+    uploaded in order of priority until the budget for the current frame
+    is spent. Resources that are used in the current frame (i.e. by
+    visible objects) go first. At least one slice is uploaded per frame.
+
+    With the budget set to None (the default), everything is uploaded
+    right away.
+    """
+
+    def __init__(self):
+        self._budget = None
+        self._pending = weakref.WeakKeyDictionary()
+        self._frame = 0
+        self._order = 0
+        self._bytes_uploaded = 0
+
+    @property
+    def budget(self):
+        """The maximum number of bytes to upload per frame, or None."""
+        return self._budget
+
+    @budget.setter
+    def budget(self, value):
+        if value is None:
+            self._budget = None
+        elif isinstance(value, int) and value > 0:
+            self._budget = value
+        else:
+            raise ValueError("Upload budget must be None or a positive int.")
+
+    @property
+    def stats(self):
+        """A dict with the number of resources that have pending
+        uploads, the number of pending bytes, and the number of bytes
+        uploaded in the last flush.
+        """
+        pendings = list(self._pending.values())
+        return {
+            "pending_resources": len(pendings),
+            "pending_bytes": sum(p.nbytes_left for p in pendings),
+            "bytes_uploaded": self._bytes_uploaded,
+        }
+
+    def add_buffer_uploads(self, resource, ranges):
+        """Schedule the given (offset, size) ranges of the given Buffer."""
+        itemsize = max(1, resource.itemsize)
+        slices = []
+        for offset, size in ranges:
+            slices.extend(split_range(offset, size, itemsize, self._budget))
+        self._add(resource, "buffer", slices)
+
+    def add_texture_uploads(self, resource, boxes, bytes_per_pixel):
+        """Schedule the given (offset, size) boxes of the given Texture."""
+        slices = []
+        for offset, size in boxes:
+            slices.extend(split_box(offset, size, bytes_per_pixel, self._budget))
+        self._add(resource, "texture", slices)
+
+    def _add(self, resource, kind, slices):
+        if not slices:
+            return
+        try:
+            pending = self._pending[resource]
+        except KeyError:
+            pending = self._pending[resource] = PendingUploads(kind)
+        nbytes = sum(s[2] for s in slices)
+        pending.slices.extend(slices)
+        pending.nbytes_total += nbytes
+        pending.nbytes_left += nbytes
+
+    def touch(self, resource):
+        """Mark the resource as used in the current frame. Resources
+        are prioritized in the order that they are first touched.
+        """
+        pending = self._pending.get(resource, None)
+        if pending is not None and pending.last_used < self._frame:
+            pending.last_used = self._frame
+            pending.order = self._order
+            self._order += 1
+
+    def is_resident(self, resource):
+        """Get whether the resource has no pending uploads."""
+        return resource not in self._pending
+
+    def get_progress(self, resources=None):
+        """Get the fraction (0..1) of the scheduled bytes of the given
+        resources (or of all resources with pending uploads) that has
+        been uploaded.
+        """
+        if resources is None:
+            pendings = list(self._pending.values())
+        else:
+            pendings = [self._pending.get(resource, None) for resource in resources]
+        total = left = 0
+        for pending in pendings:
+            if pending is not None:
+                total += pending.nbytes_total
+                left += pending.nbytes_left
+        return 1.0 - left / total if total else 1.0
+
+    def flush(self, write_func):
+        """Upload slices in order of priority, until the budget is spent,
+        by calling ``write_func(kind, resource, offset, size)``.
+        """
+        budget = self._budget
+        nbytes_uploaded = 0
+        # Sort by most recently used, then by order of use
+        items = sorted(
+            self._pending.items(), key=lambda x: (-x[1].last_used, x[1].order)
+        )
+        for resource, pending in items:
+            slices = pending.slices
+            i = 0
+            while i < len(slices):
+                offset, size, nbytes = slices[i]
+                if budget is not None and nbytes_uploaded > 0:
+                    if nbytes_uploaded + nbytes > budget:
+                        break
+                write_func(pending.kind, resource, offset, size)
+                nbytes_uploaded += nbytes
+                pending.nbytes_left -= nbytes
+                i += 1
+            del slices[:i]
+            if not slices:
+                self._pending.pop(resource)
+            elif budget is not None:
+                break  # budget is spent
+        self._bytes_uploaded = nbytes_uploaded
+        self._frame += 1
+        self._order = 0
+
+
+def split_range(offset, size, itemsize, max_nbytes):
+    """Split a buffer range into slices of at most max_nbytes (but at
+    least one item). Returns a list of (offset, size, nbytes) tuples.
+    """
+    if max_nbytes is None:
+        return [(offset, size, size * itemsize)]
+    step = max(1, max_nbytes // itemsize)
+    slices = []
+    for i in range(offset, offset + size, step):
+        n = min(step, offset + size - i)
+        slices.append((i, n, n * itemsize))
+    return slices
+
+
+def split_box(offset, size, bytes_per_pixel, max_nbytes):
+    """Split a texture box into slices of at most max_nbytes (but at
+    least one row). A box is first split along the depth, and then along
+    the rows. Returns a list of ((x, y, z), (w, h, d), nbytes) tuples.
+    """
+    row_nbytes = size[0] * bytes_per_pixel
+    layer_nbytes = row_nbytes * size[1]
+    if max_nbytes is None or layer_nbytes * size[2] <= max_nbytes:
+        return [(offset, size, layer_nbytes * size[2])]
+    slices = []
+    x, y, z = offset
+    w, h, d = size
+    if layer_nbytes <= max_nbytes:
+        step = max_nbytes // layer_nbytes
+        for zi in range(z, z + d, step):
+            n = min(step, z + d - zi)
+            slices.append(((x, y, zi), (w, h, n), n * layer_nbytes))
+    else:
+        step = max(1, max_nbytes // row_nbytes)
+        for zi in range(z, z + d):
+            for yi in range(y, y + h, step):
+                n = min(step, y + h - yi)
+                slices.append(((x, yi, zi), (w, n, 1), n * row_nbytes))
+    return slices
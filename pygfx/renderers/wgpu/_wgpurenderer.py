@@ -1,5 +1,6 @@
 import time
 import weakref
+from types import SimpleNamespace
 
 import numpy as np
 import pyshader  # noqa
@@ -7,13 +8,25 @@ from pyshader import Struct, vec2, mat4
 import wgpu.backends.rs
 
 from .. import Renderer, RenderFunctionRegistry
-from ...linalg import Matrix4, Vector3
+from .._base import depth_sort
+from ...linalg import Matrix4
+from ...spatial import frustum_cull
 from ...objects import WorldObject
 from ...cameras import Camera
-from ...resources import Buffer, TextureView
+from ...resources import Resource, Buffer, TextureView
 from ...utils import array_from_shadertype
 
 from .postprocessing import RenderTexture, SSAAPostProcessingStep
+from ._cache import GpuObjectCache, make_hashable
+from ._staging import StagingBelt
+from ._uploads import UploadScheduler
+from ._picking import get_pixel_rect, RegionReadbackLayout, decode_pick_values
+from ._picking import decode_pixel_info, PickReadbackQueue
+from ._picking import empty_pixel_info, empty_region_info
+from ._renderstate import RenderPassState, sort_by_state, sort_render_list
+from ._renderstate import split_render_list
+from ._overdraw import OVERDRAW_FORMAT, overdraw_fragment_shader, overdraw_blend
+from ._overdraw import summarize_overdraw
 
 
 # Definition uniform struct with standard info related to transforms,
@@ -131,9 +144,70 @@ class WgpuRenderer(Renderer):
             usage=wgpu.BufferUsage.COPY_DST | wgpu.BufferUsage.MAP_READ,
         )
 
+        # For asynchronous picking
+        self._pick_readback_queue = PickReadbackQueue(self._device)
+        self._pick_readback_can_sample_color = False
+
+        # The pick texture can be rendered on demand, in a separate pass
+        # at logical resolution, using textures of its own.
+        self._render_pick_target = True
+        self._pick_color_texture = RenderTexture(wgpu.TextureFormat.rgba8unorm)
+        self._pick_depth_texture = RenderTexture(wgpu.TextureFormat.depth32float)
+        self._pick_pass_state = None
+        self._pick_pass_frame = -1
+        self._pick_passes = 0
+
+        # A buffer to read regions into, created (and grown) on demand
+        self._region_readback_buffer = None
+
         # Keep track of object ids
         self._pick_map = weakref.WeakValueDictionary()
 
+        # Pipelines are shared between world objects that have the same
+        # shaders, layouts, and render targets.
+        self._pipeline_cache = GpuObjectCache()
+        # Same for bind group layouts and pipeline layouts
+        self._layout_cache = GpuObjectCache()
+
+        # Uploads to buffers and textures are collected in a single
+        # command encoder, which is submitted along with the render commands.
+        # Buffer data is uploaded via a staging belt.
+        self._upload_encoder = None
+        self._staging_belt = StagingBelt(self._device)
+        self._buffers_to_destroy = []
+        # Large uploads can be spread over multiple frames
+        self._upload_scheduler = UploadScheduler()
+        self._draw_partially_uploaded = True
+        self._frame_submits = 0
+        self._last_frame_submits = 0
+
+        # The objects that are visible and have a material, per scene
+        self._renderables_cache = None, None, None
+
+        # Objects outside of the view are not rendered
+        self._frustum_culling = True
+        self._culled_objects = 0
+
+        # Frames for which nothing changed can be skipped
+        self._skip_unchanged_frames = True
+        self._frame_signature = None
+        self._last_frame_was_cached = False
+        self._frames_rendered = 0
+        self._frames_cached = 0
+
+        # The render list is sorted to reduce state changes
+        self._sort_key = sort_by_state
+        self._last_frame_state_changes = 0
+        self._last_frame_state_changes_skipped = 0
+
+        # The overdraw can be measured in a debug mode
+        self._overdraw_debug = False
+        self._overdraw_texture = RenderTexture(OVERDRAW_FORMAT)
+        self._overdraw_depth_texture = RenderTexture(wgpu.TextureFormat.depth32float)
+        self._overdraw_readback_buffer = None
+        self._last_frame_overdraw = 0, 0
+        self._overdraw_counts = None
+
     @property
     def device(self):
         """A reference to the used wgpu device."""
@@ -150,6 +224,201 @@ class WgpuRenderer(Renderer):
         # todo: is this the way to go?
         return self._postfx
 
+    @property
+    def stats(self):
+        """A dict with statistics about the internals of the renderer,
+        e.g. to check the effectiveness of caching. Intended for
+        debugging and performance tuning. The "submits_per_frame" is
+        the number of times that the renderer submitted commands to the
+        queue during the last frame (not counting post-processing). The
+        "staging_*" fields relate to the staging belt used to upload data.
+        The "upload_*" fields relate to the spreading of uploads over
+        frames (see ``upload_budget``). The "frames_rendered" and
+        "frames_cached" fields count the frames for which the scene was
+        rendered, and the frames that re-used the previous result. The
+        "culled_objects" is the number of objects that were outside of
+        the view in the last frame. The "pick_passes" is the number of
+        on-demand pick passes (see ``render_pick_target``). The
+        "state_changes_per_frame" is the number of pipelines, vertex
+        buffers, index buffers and bind groups that were set to draw the
+        last frame, and "state_changes_skipped_per_frame" the number of
+        these calls that were skipped because they were redundant (see
+        ``sort_key``). The "overdraw_fragments" and "overdraw_pixels" are
+        the number of fragments that passed the depth test in the last
+        frame, and the number of pixels that these cover (see
+        ``overdraw_debug``).
+        """
+        return {
+            "pipeline_cache_size": len(self._pipeline_cache),
+            "pipeline_cache_hits": self._pipeline_cache.hits,
+            "pipeline_cache_misses": self._pipeline_cache.misses,
+            "layouts_created": self._layout_cache.misses,
+            "layout_cache_hits": self._layout_cache.hits,
+            "submits_per_frame": self._last_frame_submits,
+            **{"staging_" + k: v for k, v in self._staging_belt.stats.items()},
+            **{"upload_" + k: v for k, v in self._upload_scheduler.stats.items()},
+            "frames_rendered": self._frames_rendered,
+            "frames_cached": self._frames_cached,
+            "culled_objects": self._culled_objects,
+            "pick_passes": self._pick_passes,
+            "state_changes_per_frame": self._last_frame_state_changes,
+            "state_changes_skipped_per_frame": self._last_frame_state_changes_skipped,
+            "overdraw_fragments": self._last_frame_overdraw[0],
+            "overdraw_pixels": self._last_frame_overdraw[1],
+        }
+
+    @property
+    def render_pick_target(self):
+        """Whether to render the pick texture along with each frame. If
+        False, the render pipelines are used without the pick target,
+        which saves 16 bytes of bandwidth per pixel in each frame. Picking
+        then renders the last frame's objects in a separate pass (at
+        logical resolution) when it's needed. Default True.
+        """
+        return self._render_pick_target
+
+    @render_pick_target.setter
+    def render_pick_target(self, value):
+        self._render_pick_target = bool(value)
+        self._frame_signature = None  # make sure the next frame is rendered
+        self._pick_pass_state = None
+        self._pick_pass_frame = -1
+
+    @property
+    def sort_key(self):
+        """The function to sort the opaque objects by, or None to draw
+        them in back-to-front order. It is called with the world object,
+        its index in the back-to-front order, and its (first) render
+        pipeline. The default groups objects by pipeline and material (to
+        reduce state changes), and draws them front-to-back within each
+        group. Use ``pygfx.renderers.wgpu.sort_by_depth`` to draw all
+        opaque objects front-to-back (to reduce overdraw). The
+        render_order of objects should be respected by custom functions.
+
+        The opaque objects are drawn first. The transparent objects
+        (of which the material color has an alpha smaller than 1) are
+        drawn after these, in back-to-front order, without writing depth.
+        """
+        return self._sort_key
+
+    @sort_key.setter
+    def sort_key(self, value):
+        if not (value is None or callable(value)):
+            raise TypeError("The sort_key must be None or a callable.")
+        self._sort_key = value
+        self._frame_signature = None  # make sure the next frame is rendered
+
+    @property
+    def overdraw_debug(self):
+        """Whether to measure the overdraw of each frame. If True, the
+        objects are drawn a second time into a texture that counts the
+        fragments per pixel, which is read back, and summarized in
+        ``stats``. This is slow, and intended for debugging only. The
+        counts of the last frame are available via ``get_overdraw()``.
+        Default False.
+
+        Note that the counting shader replaces the material's fragment
+        shader, so fragments that a material discards are counted too.
+        The counts therefore reflect the rasterized primitives, e.g. the
+        full quads of round points, and the quads around line joins.
+        """
+        return self._overdraw_debug
+
+    @overdraw_debug.setter
+    def overdraw_debug(self, value):
+        self._overdraw_debug = bool(value)
+        self._frame_signature = None  # make sure the next frame is rendered
+        self._last_frame_overdraw = 0, 0
+        self._overdraw_counts = None
+
+    @property
+    def frustum_culling(self):
+        """Whether to skip objects that are outside of the view frustum.
+        The test is based on each object's bounding sphere in world
+        coordinates (which is cached). Objects with an unknown extent
+        are always rendered. Default True.
+        """
+        return self._frustum_culling
+
+    @frustum_culling.setter
+    def frustum_culling(self, value):
+        self._frustum_culling = bool(value)
+        self._culled_objects = 0
+        self._frame_signature = None  # make sure the next frame is rendered
+
+    @property
+    def skip_unchanged_frames(self):
+        """Whether to skip rendering the scene when nothing has changed
+        since the last frame (the scene graph, transforms, resources,
+        camera, and sizes). In that case the previous result is presented
+        again. Default True. Set to False if e.g. a post-processing step
+        changes over time.
+        """
+        return self._skip_unchanged_frames
+
+    @skip_unchanged_frames.setter
+    def skip_unchanged_frames(self, value):
+        self._skip_unchanged_frames = bool(value)
+
+    @property
+    def last_frame_was_cached(self):
+        """Whether the last call to ``render()`` re-used the result of the
+        previous frame, because nothing had changed.
+        """
+        return self._last_frame_was_cached
+
+    @property
+    def staging_chunk_size(self):
+        """The size (in bytes) of the chunks of staging memory used to
+        upload buffer data. Chunks are re-used between frames, and
+        uploads are sub-allocated from them. Default 1 MiB.
+        """
+        return self._staging_belt.chunk_size
+
+    @staging_chunk_size.setter
+    def staging_chunk_size(self, value):
+        self._staging_belt.chunk_size = value
+
+    @property
+    def upload_budget(self):
+        """The maximum number of bytes to upload to the GPU per frame,
+        or None (default) for no limit. When set, large uploads (e.g. of
+        a big volume) are split in slices that are spread over multiple
+        frames, to keep the application responsive. Data of visible
+        objects is uploaded first. Small uniform buffers are not
+        subject to the budget. See also ``get_upload_progress()``.
+        """
+        return self._upload_scheduler.budget
+
+    @upload_budget.setter
+    def upload_budget(self, value):
+        self._upload_scheduler.budget = value
+        self._frame_signature = None  # make sure the next frame is rendered
+
+    @property
+    def draw_partially_uploaded(self):
+        """Whether objects for which the data is not fully uploaded yet
+        are drawn (with the data that they have so far). If False, these
+        objects are skipped until their data is complete. Default True.
+        """
+        return self._draw_partially_uploaded
+
+    @draw_partially_uploaded.setter
+    def draw_partially_uploaded(self, value):
+        self._draw_partially_uploaded = bool(value)
+        self._frame_signature = None  # make sure the next frame is rendered
+
+    def get_upload_progress(self, wobject=None):
+        """Get the fraction (0..1) of the data that has been uploaded
+        to the GPU, for the given world object, or for all pending
+        uploads if not given. Only relevant when an ``upload_budget``
+        is set.
+        """
+        if wobject is None:
+            return self._upload_scheduler.get_progress()
+        resources = [r for _, r in getattr(wobject, "_wgpu_pipeline_res", [])]
+        return self._upload_scheduler.get_progress(resources)
+
     @property
     def pixel_ratio(self):
         """Configure the size of the render texture relative to the
@@ -232,7 +501,8 @@ class WgpuRenderer(Renderer):
         for t in render_textures:
             t.ensure_size(device, scene_size + (1,))
         self._depth_texture.ensure_size(device, scene_size + (1,))
-        self._pick_texture.ensure_size(device, scene_size + (1,))
+        if self._render_pick_target:
+            self._pick_texture.ensure_size(device, scene_size + (1,))
 
         # Ensure that matrices are up-to-date
         scene.update_matrix_world()
@@ -240,6 +510,48 @@ class WgpuRenderer(Renderer):
         camera.update_matrix_world()  # camera may not be a member of the scene
         camera.update_projection_matrix()
 
+        # Read back the pick requests that were copied after the previous
+        # frame. This is done before this frame is submitted, so that the
+        # wait (see PickReadbackQueue) only covers the previous frame.
+        self._resolve_pick_requests()
+
+        # Detect whether anything has changed since the last frame. If not,
+        # we can skip rendering the scene, and present the previous result.
+        signature = self._get_frame_signature(
+            scene, camera, logical_size, scene_size, final_size
+        )
+        self._last_frame_was_cached = (
+            self._skip_unchanged_frames
+            and signature == self._frame_signature
+            and not self._upload_scheduler.stats["pending_resources"]
+        )
+        if self._last_frame_was_cached:
+            self._frames_cached += 1
+        else:
+            self._frames_rendered += 1
+            self._render_frame(scene, camera, scene_size, logical_size)
+
+        # Copy the pixels for the asynchronous pick requests
+        self._schedule_pick_requests()
+
+        # Changes made while rendering the frame do not count
+        self._frame_signature = signature[:-1] + (Resource._global_rev,)
+
+        # If we have a canvas, we render into it, applying SSAA if possible
+        if self._canvas:
+            with self._swap_chain as texture_view_target:
+                self._canvas_texture.set_texture_view(texture_view_target)
+                self._ssa_post_processing_step.render(
+                    render_textures[0], self._canvas_texture
+                )
+
+    def _render_frame(self, scene, camera, scene_size, logical_size):
+        """Render the scene into the render textures, and apply post-processing."""
+
+        device = self._device
+        render_textures = self._render_textures
+        pp_steps = self._postfx
+
         # Get the list of objects to render (visible and having a material)
         q = self.get_render_list(scene, camera)
         for wobject in q:
@@ -252,14 +564,54 @@ class WgpuRenderer(Renderer):
         for wobject in q:
             self._ensure_up_to_date(wobject)
 
+        # Upload phase: all pending uploads are recorded in one command
+        # buffer, which is submitted together with (and before) the
+        # render commands. Writes to the queue are flushed by the submit.
+        # The data of visible objects goes first, and if there is an
+        # upload budget, uploads may be spread over multiple frames.
+        scheduler = self._upload_scheduler
+        for wobject in q:
+            for kind, resource in wobject._wgpu_pipeline_res:
+                scheduler.touch(resource)
+        scheduler.flush(self._write_upload)
+        command_buffers = self._finish_uploads()
+
         # Filter out objects that we cannot render
         q = [wobject for wobject in q if wobject._wgpu_pipeline_objects is not None]
+        if not self._draw_partially_uploaded:
+            q = [
+                wobject
+                for wobject in q
+                if all(scheduler.is_resident(r) for _, r in wobject._wgpu_pipeline_res)
+            ]
+
+        # Opaque objects are drawn first, sorted e.g. to group objects
+        # that share a pipeline. Then the transparent objects back-to-front.
+        q_opaque, q_transparent = split_render_list(q)
+        if self._sort_key is not None:
+            q_opaque = sort_render_list(
+                q_opaque, self._sort_key, self._get_first_pipeline
+            )
+        q = q_opaque, q_transparent
+
+        # Keep what we need to render the pick texture on demand. This is
+        # dropped when the pick pass is done.
+        if not self._render_pick_target:
+            camera_state = SimpleNamespace(
+                matrix_world_inverse=camera.matrix_world_inverse.clone(),
+                projection_matrix=camera.projection_matrix.clone(),
+            )
+            self._pick_pass_state = q, camera_state, logical_size
 
         # Render the scene graph (to the first texture)
         command_encoder = device.create_command_encoder()
         self._render_recording(command_encoder, q)
-        command_buffers = [command_encoder.finish()]
-        device.queue.submit(command_buffers)
+        command_buffers.append(command_encoder.finish())
+        self._submit(command_buffers)
+        self._last_frame_submits, self._frame_submits = self._frame_submits, 0
+
+        if self._overdraw_debug:
+            self._render_overdraw(q, scene_size)
 
         # Render each texture into the next
         for i in range(len(pp_steps)):
@@ -270,15 +622,8 @@ class WgpuRenderer(Renderer):
             )
             render_textures.insert(0, render_textures.pop(1))  # cycle
 
-        # If we have a canvas, we render into it, applying SSAA if possible
-        if self._canvas:
-            with self._swap_chain as texture_view_target:
-                self._canvas_texture.set_texture_view(texture_view_target)
-                self._ssa_post_processing_step.render(
-                    render_textures[0], self._canvas_texture
-                )
-
-    def _render_recording(self, command_encoder, q):
+    def _render_recording(self, command_encoder, q, pick_pass=False):
+        q_opaque, q_transparent = q
 
         # You might think that this is slow for large number of world
         # object. But it is actually pretty good. It does iterate over
@@ -288,42 +633,56 @@ class WgpuRenderer(Renderer):
 
         # ----- compute pipelines
 
-        compute_pass = command_encoder.begin_compute_pass()
+        # In a pick pass, the results of the compute pipelines are still there
+        if not pick_pass:
+            compute_pass = command_encoder.begin_compute_pass()
 
-        for wobject in q:
-            wgpu_data = wobject._wgpu_pipeline_objects
-            for pinfo in wgpu_data["compute_pipelines"]:
-                compute_pass.set_pipeline(pinfo["pipeline"])
-                for bind_group_id, bind_group in enumerate(pinfo["bind_groups"]):
-                    compute_pass.set_bind_group(
-                        bind_group_id, bind_group, [], 0, 999999
-                    )
-                compute_pass.dispatch(*pinfo["index_args"])
+            for wobject in q_opaque + q_transparent:
+                wgpu_data = wobject._wgpu_pipeline_objects
+                for pinfo in wgpu_data["compute_pipelines"]:
+                    compute_pass.set_pipeline(pinfo["pipeline"])
+                    for bind_group_id, bind_group in enumerate(pinfo["bind_groups"]):
+                        compute_pass.set_bind_group(
+                            bind_group_id, bind_group, [], 0, 999999
+                        )
+                    compute_pass.dispatch(*pinfo["index_args"])
 
-        compute_pass.end_pass()
+            compute_pass.end_pass()
 
         # ----- render pipelines rendering to the default target
 
-        assert self._render_textures[0].texture_view
-        assert self._depth_texture.texture_view
-        assert self._pick_texture.texture_view
-        render_pass = command_encoder.begin_render_pass(
-            color_attachments=[
-                {
-                    "view": self._render_textures[0].texture_view,
-                    "resolve_target": None,
-                    "load_value": (0, 0, 0, 0),  # LoadOp.load or color
-                    "store_op": wgpu.StoreOp.store,
-                },
+        if pick_pass:
+            color_texture = self._pick_color_texture
+            depth_texture = self._pick_depth_texture
+        else:
+            color_texture = self._render_textures[0]
+            depth_texture = self._depth_texture
+        with_pick = pick_pass or self._render_pick_target
+
+        assert color_texture.texture_view
+        assert depth_texture.texture_view
+        color_attachments = [
+            {
+                "view": color_texture.texture_view,
+                "resolve_target": None,
+                "load_value": (0, 0, 0, 0),  # LoadOp.load or color
+                "store_op": wgpu.StoreOp.store,
+            }
+        ]
+        if with_pick:
+            assert self._pick_texture.texture_view
+            color_attachments.append(
                 {
                     "view": self._pick_texture.texture_view,
                     "resolve_target": None,
                     "load_value": (0, 0, 0, 0),  # LoadOp.load or color
                     "store_op": wgpu.StoreOp.store,
-                },
-            ],
+                }
+            )
+        render_pass = command_encoder.begin_render_pass(
+            color_attachments=color_attachments,
             depth_stencil_attachment={
-                "view": self._depth_texture.texture_view,
+                "view": depth_texture.texture_view,
                 "depth_load_value": 2.0,  # depth is 0..1, make initial value > 1
                 "depth_store_op": wgpu.StoreOp.store,
                 "stencil_load_value": wgpu.LoadOp.load,
@@ -332,29 +691,139 @@ class WgpuRenderer(Renderer):
             occlusion_query_set=None,
         )
 
-        for wobject in q:
+        # The opaque objects are drawn first, with depth writes. Then the
+        # transparent objects, without depth writes, so that these do not
+        # occlude each-other. In a pick pass, all objects write depth.
+        state = RenderPassState(render_pass)
+        self._record_draws(state, q_opaque, with_pick)
+        self._record_draws(state, q_transparent, with_pick, depth_write=pick_pass)
+        render_pass.end_pass()
+
+        if not pick_pass:
+            self._last_frame_state_changes = state.changes
+            self._last_frame_state_changes_skipped = state.skipped
+
+    def _record_draws(self, state, wobjects, with_pick, **variant):
+        """Record the draw calls for the render pipelines of the given
+        objects, via the given RenderPassState (which skips setting state
+        that has not changed since the previous draw).
+        """
+        for wobject in wobjects:
             wgpu_data = wobject._wgpu_pipeline_objects
             for pinfo in wgpu_data["render_pipelines"]:
-                render_pass.set_pipeline(pinfo["pipeline"])
+                state.set_pipeline(pinfo["get_pipeline"](with_pick, **variant))
                 for slot, vbuffer in pinfo["vertex_buffers"].items():
-                    render_pass.set_vertex_buffer(
+                    state.set_vertex_buffer(
                         slot,
                         vbuffer._wgpu_buffer[1],
                         vbuffer.vertex_byte_range[0],
                         vbuffer.vertex_byte_range[1],
                     )
                 for bind_group_id, bind_group in enumerate(pinfo["bind_groups"]):
-                    render_pass.set_bind_group(bind_group_id, bind_group, [], 0, 99)
+                    state.set_bind_group(bind_group_id, bind_group)
                 # Draw with or without index buffer
                 if pinfo["index_buffer"] is not None:
                     ibuffer = pinfo["index_buffer"]
-                    render_pass.set_index_buffer(ibuffer, 0, ibuffer.size)
-                    render_pass.draw_indexed(*pinfo["index_args"])
+                    state.set_index_buffer(ibuffer, 0, ibuffer.size)
+                    state.draw_indexed(*pinfo["index_args"])
                 else:
-                    render_pass.draw(*pinfo["index_args"])
+                    state.draw(*pinfo["index_args"])
 
+    def _render_overdraw(self, q, size):
+        """Draw the given objects (opaque and transparent, like a normal
+        frame) into a texture that counts the fragments per pixel, and
+        read it back to measure the overdraw.
+        """
+        device = self._device
+        size = tuple(size) + (1,)
+        self._overdraw_texture.ensure_size(device, size)
+        self._overdraw_depth_texture.ensure_size(device, size)
+
+        command_encoder = device.create_command_encoder()
+        render_pass = command_encoder.begin_render_pass(
+            color_attachments=[
+                {
+                    "view": self._overdraw_texture.texture_view,
+                    "resolve_target": None,
+                    "load_value": (0, 0, 0, 0),
+                    "store_op": wgpu.StoreOp.store,
+                }
+            ],
+            depth_stencil_attachment={
+                "view": self._overdraw_depth_texture.texture_view,
+                "depth_load_value": 2.0,
+                "depth_store_op": wgpu.StoreOp.store,
+                "stencil_load_value": wgpu.LoadOp.load,
+                "stencil_store_op": wgpu.StoreOp.store,
+            },
+            occlusion_query_set=None,
+        )
+        state = RenderPassState(render_pass)
+        self._record_draws(state, q[0], False, overdraw=True)
+        self._record_draws(state, q[1], False, depth_write=False, overdraw=True)
         render_pass.end_pass()
 
+        # Read back the counts
+        rect = 0, 0, size[0], size[1]
+        layout = RegionReadbackLayout(rect, [self._overdraw_texture.bytes_per_pixel])
+        buffer = self._overdraw_readback_buffer
+        if buffer is None or buffer.size < layout.nbytes:
+            buffer = self._overdraw_readback_buffer = device.create_buffer(
+                size=layout.nbytes,
+                usage=wgpu.BufferUsage.COPY_DST | wgpu.BufferUsage.MAP_READ,
+            )
+        command_encoder.copy_texture_to_buffer(
+            {
+                "texture": self._overdraw_texture.texture,
+                "mip_level": 0,
+                "origin": (0, 0, 0),
+            },
+            {
+                "buffer": buffer,
+                "offset": 0,
+                "bytes_per_row": layout.sections[0][1],
+                "rows_per_image": size[1],
+            },
+            copy_size=size,
+        )
+        device.queue.submit([command_encoder.finish()])
+        counts = layout.unpack(buffer.map_read(), 0, np.float16, 1)[:, :, 0]
+        self._overdraw_counts = counts.astype(np.int32)
+        self._last_frame_overdraw = summarize_overdraw(counts)
+
+    def get_overdraw(self):
+        """Get the number of fragments that passed the depth test for
+        each pixel in the last frame, as an (h, w) int32 array. Returns
+        None if ``overdraw_debug`` is off, or no frame has been rendered.
+        """
+        return self._overdraw_counts
+
+    def _get_first_pipeline(self, wobject):
+        """Get the first render pipeline of the given world object, as
+        used in the next frame, or None.
+        """
+        for pinfo in wobject._wgpu_pipeline_objects["render_pipelines"]:
+            return pinfo["get_pipeline"](self._render_pick_target)
+        return None
+
+    def _get_frame_signature(self, scene, camera, *sizes):
+        """Get an object that represents the state of everything that
+        affects the rendered image. If the signatures of two frames are
+        equal, the second frame would look the same. This does not walk
+        the scene: changes to the structure are tracked by the scene's
+        structure_rev, and changes to transforms, resources and objects by
+        a global revision counter. The last element is that counter.
+        """
+        return (
+            sizes,
+            tuple(camera.matrix_world_inverse.elements),
+            tuple(camera.projection_matrix.elements),
+            tuple(id(step) for step in self._postfx),
+            id(scene),
+            scene.structure_rev,
+            Resource._global_rev,
+        )
+
     def _update_stdinfo_buffer(self, camera, physical_size, logical_size):
         # Make sure we have a buffer object
         if not hasattr(self, "_wgpu_stdinfo_buffer"):
@@ -367,37 +836,46 @@ class WgpuRenderer(Renderer):
         stdinfo_data["projection_transform"] = tuple(camera.projection_matrix.elements)
         stdinfo_data["physical_size"] = physical_size
         stdinfo_data["logical_size"] = logical_size
-        # Upload to GPU
-        self._wgpu_stdinfo_buffer.update_range(0, 1)
+        # Upload to GPU. This is not marked with update_range(), because
+        # that bumps the global rev, which would mark the next frame as
+        # changed, e.g. after a pick pass.
+        self._wgpu_stdinfo_buffer._add_pending_range(0, 1)
         self._update_buffer(self._wgpu_stdinfo_buffer)
 
     def get_render_list(self, scene: WorldObject, camera: Camera):
         """Given a scene object, get a flat list of objects to render."""
 
-        # Collect items
-        def visit(wobject):
-            nonlocal q
-            if wobject.visible and hasattr(wobject, "material"):
-                q.append(wobject)
+        # Collect items. The result is re-used until the structure of the
+        # scene changes (e.g. objects being added or hidden).
+        cache = self._renderables_cache
+        if (
+            cache[0] is None
+            or cache[0]() is not scene
+            or cache[1] != scene.structure_rev
+        ):
 
-        q = []
-        scene.traverse(visit)
+            def visit(wobject):
+                if wobject.visible and hasattr(wobject, "material"):
+                    renderables.append(wobject)
 
-        # Next, sort them from back-to-front
-        def sort_func(wobject: WorldObject):
-            z = (
-                Vector3()
-                .set_from_matrix_position(wobject.matrix_world)
-                .apply_matrix4(proj_screen_matrix)
-                .z
-            )
-            return wobject.render_order, z
+            renderables = []
+            scene.traverse(visit)
+            cache = weakref.ref(scene), scene.structure_rev, renderables
+            self._renderables_cache = cache
+        q = list(cache[2])
 
         proj_screen_matrix = Matrix4().multiply_matrices(
             camera.projection_matrix, camera.matrix_world_inverse
         )
-        q.sort(key=sort_func)
-        return q
+
+        # Skip objects that are outside of the view frustum
+        if self._frustum_culling:
+            n = len(q)
+            q = frustum_cull(q, proj_screen_matrix)
+            self._culled_objects = n - len(q)
+
+        # Next, sort them from back-to-front
+        return depth_sort(q, proj_screen_matrix)
 
     def _ensure_up_to_date(self, wobject, force=False):
         """Update the GPU objects associated with the given wobject. Returns
@@ -408,6 +886,11 @@ class WgpuRenderer(Renderer):
         if force or wobject.rev > getattr(wobject, "_wgpu_rev", 0):
             wobject._wgpu_rev = wobject.rev
             wobject._wgpu_pipeline_infos = self._create_pipeline_infos(wobject)
+            wobject._wgpu_pipeline_updates = [
+                info["update"]
+                for info in wobject._wgpu_pipeline_infos or ()
+                if info.get("update", None) is not None
+            ]
             wobject._wgpu_pipeline_res = self._collect_pipeline_resources(wobject)
             wobject._wgpu_pipeline_objects = None  # Invalidate
 
@@ -415,6 +898,11 @@ class WgpuRenderer(Renderer):
         if not wobject._wgpu_pipeline_infos:
             return
 
+        # Update state that can change without re-creating the pipeline
+        # objects, e.g. the ring start of a ring buffer.
+        for update in wobject._wgpu_pipeline_updates:
+            update()
+
         # Check if we need to update any resources. The number of
         # resources should typically be small. We could implement a
         # hook in the resource's rev setter so we only have to check
@@ -430,6 +918,12 @@ class WgpuRenderer(Renderer):
         if wobject._wgpu_pipeline_objects is None:
             wobject._wgpu_pipeline_objects = self._create_pipeline_objects(wobject)
 
+        # The number of items to draw can change, e.g. when appending to
+        # a buffer. If so, the render function provides a callable.
+        for pinfo in wobject._wgpu_pipeline_objects["dynamic_render_pipelines"]:
+            indices = pinfo["get_indices"]()
+            pinfo["index_args"] = self._get_index_args(indices, pinfo["index_buffer"])
+
     def _create_pipeline_infos(self, wobject):
         """Use the render function for this wobject and material,
         and return a list of dicts representing pipelines in an abstract way.
@@ -531,6 +1025,9 @@ class WgpuRenderer(Renderer):
             "compute_pipelines": compute_pipelines,
             "render_pipelines": render_pipelines,
             "alt_render_pipelines": alt_render_pipelines,
+            "dynamic_render_pipelines": [
+                pinfo for pinfo in render_pipelines if pinfo["get_indices"] is not None
+            ],
         }
 
     def _compose_compute_pipeline(self, wobject, pipeline_info):
@@ -538,8 +1035,6 @@ class WgpuRenderer(Renderer):
         lower-level representation that can be consumed by wgpu.
         """
 
-        # todo: cache the pipeline with the shader (and entrypoint) as a hash
-
         device = self._device
 
         # Convert indices to args for the compute_pass.dispatch() call
@@ -556,15 +1051,20 @@ class WgpuRenderer(Renderer):
 
         # Get bind groups and pipeline layout from the buffers in pipeline_info.
         # This also makes sure the buffers and textures are up-to-date.
-        bind_groups, pipeline_layout = self._get_bind_groups(pipeline_info)
+        bind_groups, pipeline_layout, layout_key = self._get_bind_groups(pipeline_info)
 
-        # Compile shader and create pipeline object
+        # Compile shader and create pipeline object, or get it from the cache
         cshader = pipeline_info["compute_shader"]
-        cs_module = device.create_shader_module(code=cshader)
-        compute_pipeline = device.create_compute_pipeline(
-            layout=pipeline_layout,
-            compute={"module": cs_module, "entry_point": "main"},
-        )
+
+        def create_compute_pipeline():
+            cs_module = device.create_shader_module(code=cshader)
+            return device.create_compute_pipeline(
+                layout=pipeline_layout,
+                compute={"module": cs_module, "entry_point": "main"},
+            )
+
+        key = "compute", cshader, layout_key
+        compute_pipeline = self._pipeline_cache.get(key, create_compute_pipeline)
 
         return {
             "pipeline": compute_pipeline,  # wgpu object
@@ -577,9 +1077,6 @@ class WgpuRenderer(Renderer):
         lower-level representation that can be consumed by wgpu.
         """
 
-        # todo: cache the pipeline with a lot of things as the hash
-        # todo: cache vertex descriptors
-
         device = self._device
 
         # If an index buffer is present, update it, and get index_format.
@@ -592,37 +1089,18 @@ class WgpuRenderer(Renderer):
 
         # Convert and check high-level indices. Indices represent a range
         # of index id's, or define what indices in the index buffer are used.
-        indices = pipeline_info.get("indices", None)
+        # If indices is a callable, it is called in each frame, so that
+        # the number of items to draw can change without a rebuild.
+        indices = get_indices = pipeline_info.get("indices", None)
         if indices is None:
             if index_buffer is None:
                 raise RuntimeError("Need indices or index_buffer ")
             indices = range(index_buffer.data.size)
-        # Convert to 2-element tuple (vertex, instance)
-        if not isinstance(indices, tuple):
-            indices = (indices,)
-        if len(indices) == 1:
-            indices = indices + (1,)  # add instancing index
-        if len(indices) != 2:
-            raise RuntimeError("Render pipeline indices must be a 2-element tuple.")
-
-        # Convert indices to args for the render_pass.draw() or draw_indexed()
-        # draw(count_vertex, count_instance, first_vertex, first_instance)
-        # draw_indexed(count_v, count_i, first_vertex, base_vertex, first_instance)
-        index_args = [0, 0, 0, 0]
-        for i, index in enumerate(indices):
-            if isinstance(index, int):
-                index_args[i] = index
-            elif isinstance(index, range):
-                assert index.step == 1
-                index_args[i] = index.stop - index.start
-                index_args[i + 2] = index.start
-            else:
-                raise RuntimeError(
-                    "Render pipeline indices must be a 2-element tuple with ints or ranges."
-                )
-        if wgpu_index_buffer is not None:
-            base_vertex = 0  # A value added to each index before reading [...]
-            index_args.insert(-1, base_vertex)
+        elif callable(indices):
+            indices = get_indices()
+        else:
+            get_indices = None
+        index_args = self._get_index_args(indices, wgpu_index_buffer)
 
         # Process vertex buffers. Update the buffer, and produces a descriptor.
         vertex_buffers = {}
@@ -632,7 +1110,7 @@ class WgpuRenderer(Renderer):
         for slot, buffer in pipeline_info.get("vertex_buffers", {}).items():
             slot = int(slot)
             vbo_des = {
-                "array_stride": buffer.nbytes // buffer.nitems,
+                "array_stride": buffer.itemsize,
                 "step_mode": wgpu.InputStepMode.vertex,  # vertex or instance
                 "attributes": [
                     {
@@ -647,67 +1125,66 @@ class WgpuRenderer(Renderer):
 
         # Get bind groups and pipeline layout from the buffers in pipeline_info.
         # This also makes sure the buffers and textures are up-to-date.
-        bind_groups, pipeline_layout = self._get_bind_groups(pipeline_info)
+        bind_groups, pipeline_layout, layout_key = self._get_bind_groups(pipeline_info)
 
-        # Compile shaders
         vshader = pipeline_info["vertex_shader"]
         fshader = pipeline_info["fragment_shader"]
-        vs_module = device.create_shader_module(code=vshader)
-        fs_module = device.create_shader_module(code=fshader)
 
-        # Instantiate the pipeline object
         # todo: is this how strip_index_format is supposed to work?
         strip_index_format = 0
         if "strip" in pipeline_info["primitive_topology"]:
             strip_index_format = index_format
-        pipeline = device.create_render_pipeline(
-            layout=pipeline_layout,
-            vertex={
-                "module": vs_module,
-                "entry_point": "main",
-                "buffers": vertex_buffer_descriptors,
-            },
-            primitive={
-                "topology": pipeline_info["primitive_topology"],
-                "strip_index_format": strip_index_format,
-                "front_face": wgpu.FrontFace.ccw,
-                "cull_mode": wgpu.CullMode.none,
-            },
-            depth_stencil={
-                "format": self._depth_texture.format,
-                "depth_write_enabled": True,  # optional
-                "depth_compare": wgpu.CompareFunction.less,  # optional
-                "front": {},  # use defaults
-                "back": {},  # use defaults
-                "depth_bias": 0,
-                "depth_bias_slope_scale": 0.0,
-                "depth_bias_clamp": 0.0,
-            },
-            multisample={
-                "count": self._msaa,
-                "mask": 0xFFFFFFFF,
-                "alpha_to_coverage_enabled": False,
-            },
-            fragment={
-                "module": fs_module,
-                "entry_point": "main",
-                "targets": [
+
+        # The pipeline can be shared with other objects if all of its
+        # inputs match. The layouts are shared too, see _get_bind_groups().
+        key = (
+            "render",
+            vshader,
+            fshader,
+            pipeline_info["primitive_topology"],
+            strip_index_format,
+            make_hashable(vertex_buffer_descriptors),
+            layout_key,
+            self._render_textures[0].format,
+            self._pick_texture.format,
+            self._depth_texture.format,
+            self._msaa,
+        )
+
+        def create_render_pipeline(with_pick, depth_write, overdraw):
+            vs_module = device.create_shader_module(code=vshader)
+            if overdraw:
+                # Count the fragments instead of producing a color
+                fs_module = device.create_shader_module(code=overdraw_fragment_shader)
+                targets = [
                     {
-                        "format": self._render_textures[0].format,
-                        "blend": {
-                            "alpha": (
-                                wgpu.BlendFactor.one,
-                                wgpu.BlendFactor.zero,
-                                wgpu.BlendOperation.add,
-                            ),
-                            "color": (
-                                wgpu.BlendFactor.src_alpha,
-                                wgpu.BlendFactor.one_minus_src_alpha,
-                                wgpu.BlendOperation.add,
-                            ),
-                        },
+                        "format": self._overdraw_texture.format,
+                        "blend": overdraw_blend,
                         "write_mask": wgpu.ColorWrite.ALL,
+                    }
+                ]
+                return create_pipeline(vs_module, fs_module, targets, depth_write)
+            fs_module = device.create_shader_module(code=fshader)
+            targets = [
+                {
+                    "format": self._render_textures[0].format,
+                    "blend": {
+                        "alpha": (
+                            wgpu.BlendFactor.one,
+                            wgpu.BlendFactor.zero,
+                            wgpu.BlendOperation.add,
+                        ),
+                        "color": (
+                            wgpu.BlendFactor.src_alpha,
+                            wgpu.BlendFactor.one_minus_src_alpha,
+                            wgpu.BlendOperation.add,
+                        ),
                     },
+                    "write_mask": wgpu.ColorWrite.ALL,
+                }
+            ]
+            if with_pick:
+                targets.append(
                     {
                         "format": self._pick_texture.format,
                         "blend": {
@@ -723,26 +1200,108 @@ class WgpuRenderer(Renderer):
                             ),
                         },
                         "write_mask": wgpu.ColorWrite.ALL,
-                    },
-                ],
-            },
-        )
+                    }
+                )
+            return create_pipeline(vs_module, fs_module, targets, depth_write)
+
+        def create_pipeline(vs_module, fs_module, targets, depth_write):
+            return device.create_render_pipeline(
+                layout=pipeline_layout,
+                vertex={
+                    "module": vs_module,
+                    "entry_point": "main",
+                    "buffers": vertex_buffer_descriptors,
+                },
+                primitive={
+                    "topology": pipeline_info["primitive_topology"],
+                    "strip_index_format": strip_index_format,
+                    "front_face": wgpu.FrontFace.ccw,
+                    "cull_mode": wgpu.CullMode.none,
+                },
+                depth_stencil={
+                    "format": self._depth_texture.format,
+                    "depth_write_enabled": depth_write,  # optional
+                    "depth_compare": wgpu.CompareFunction.less,  # optional
+                    "front": {},  # use defaults
+                    "back": {},  # use defaults
+                    "depth_bias": 0,
+                    "depth_bias_slope_scale": 0.0,
+                    "depth_bias_clamp": 0.0,
+                },
+                multisample={
+                    "count": self._msaa,
+                    "mask": 0xFFFFFFFF,
+                    "alpha_to_coverage_enabled": False,
+                },
+                fragment={
+                    "module": fs_module,
+                    "entry_point": "main",
+                    "targets": targets,
+                },
+            )
+
+        # There are variants with and without the pick target, without
+        # depth writes (for transparent objects), and to measure overdraw.
+        # These are created on demand.
+        pipelines = {}
+
+        def get_pipeline(with_pick, depth_write=True, overdraw=False):
+            variant = with_pick, depth_write, overdraw
+            try:
+                return pipelines[variant]
+            except KeyError:
+                pipeline = self._pipeline_cache.get(
+                    key + variant, lambda: create_render_pipeline(*variant)
+                )
+                pipelines[variant] = pipeline
+                return pipeline
 
         return {
-            "pipeline": pipeline,  # wgpu object
+            "get_pipeline": get_pipeline,  # function that returns a wgpu object
             "index_args": index_args,  # tuple
+            "get_indices": get_indices,  # function that returns indices, or None
             "index_buffer": wgpu_index_buffer,  # Buffer
             "vertex_buffers": vertex_buffers,  # dict of slot -> Buffer
             "bind_groups": bind_groups,  # list of wgpu bind_group objects
         }
 
+    def _get_index_args(self, indices, index_buffer):
+        """Convert the high-level indices of a render pipeline to args
+        for the render_pass.draw() or draw_indexed() call.
+        """
+        # Convert to 2-element tuple (vertex, instance)
+        if not isinstance(indices, tuple):
+            indices = (indices,)
+        if len(indices) == 1:
+            indices = indices + (1,)  # add instancing index
+        if len(indices) != 2:
+            raise RuntimeError("Render pipeline indices must be a 2-element tuple.")
+
+        # draw(count_vertex, count_instance, first_vertex, first_instance)
+        # draw_indexed(count_v, count_i, first_vertex, base_vertex, first_instance)
+        index_args = [0, 0, 0, 0]
+        for i, index in enumerate(indices):
+            if isinstance(index, int):
+                index_args[i] = index
+            elif isinstance(index, range):
+                assert index.step == 1
+                index_args[i] = index.stop - index.start
+                index_args[i + 2] = index.start
+            else:
+                raise RuntimeError(
+                    "Render pipeline indices must be a 2-element tuple with ints or ranges."
+                )
+        if index_buffer is not None:
+            base_vertex = 0  # A value added to each index before reading [...]
+            index_args.insert(-1, base_vertex)
+        return index_args
+
     def _get_bind_groups(self, pipeline_info):
         """Given high-level information on bindings, create the corresponding
         wgpu objects. This assumes that all buffers and textures are up-to-date.
-        Returns (bind_groups, pipeline_layout).
+        Returns (bind_groups, pipeline_layout, layout_key), where the
+        layout_key is a hashable representation of the binding layouts.
         """
-        # todo: cache bind_group_layout objects
-        # todo: cache pipeline_layout objects
         # todo: can perhaps be more specific about visibility
 
         device = self._device
@@ -760,6 +1319,7 @@ class WgpuRenderer(Renderer):
         # Create bind groups and bind group layouts
         bind_groups = []
         bind_group_layouts = []
+        layout_keys = []
         for resources in resource_groups:
             if not isinstance(resources, dict):
                 resources = {slot: resource for slot, resource in enumerate(resources)}
@@ -779,7 +1339,7 @@ class WgpuRenderer(Renderer):
                             "resource": {
                                 "buffer": resource._wgpu_buffer[1],
                                 "offset": 0,
-                                "size": resource.nbytes,
+                                "size": resource._wgpu_buffer[1].size,
                             },
                         }
                     )
@@ -860,60 +1420,125 @@ class WgpuRenderer(Renderer):
                         }
                     )
 
-            # Create wgpu objects
-            bind_group_layout = device.create_bind_group_layout(entries=binding_layouts)
+            # Create wgpu objects. The layout is shared with other objects
+            # that have the same binding schema, only the bind group is ours.
+            layout_key = make_hashable(binding_layouts)
+            bind_group_layout = self._layout_cache.get(
+                ("bind_group_layout", layout_key),
+                lambda: device.create_bind_group_layout(entries=binding_layouts),
+            )
             bind_group = device.create_bind_group(
                 layout=bind_group_layout, entries=bindings
             )
             bind_groups.append(bind_group)
             bind_group_layouts.append(bind_group_layout)
-
-        # Create pipeline layout object from list of layouts
-        pipeline_layout = device.create_pipeline_layout(
-            bind_group_layouts=bind_group_layouts
+            layout_keys.append(layout_key)
+
+        # Get pipeline layout object from list of layouts
+        layout_key = tuple(layout_keys)
+        pipeline_layout = self._layout_cache.get(
+            ("pipeline_layout", layout_key),
+            lambda: device.create_pipeline_layout(
+                bind_group_layouts=bind_group_layouts
+            ),
         )
 
-        return bind_groups, pipeline_layout
+        return bind_groups, pipeline_layout, layout_key
+
+    def _get_upload_encoder(self):
+        """Get the command encoder in which the uploads for the current
+        frame are recorded. It is finished in _finish_uploads().
+        """
+        if self._upload_encoder is None:
+            self._upload_encoder = self._device.create_command_encoder()
+        return self._upload_encoder
+
+    def _finish_uploads(self):
+        """Finish the encoder with all uploads that were collected
+        since the last call. Returns a list of command buffers that
+        must be submitted before any commands that use the resources.
+        """
+        encoder, self._upload_encoder = self._upload_encoder, None
+        self._staging_belt.finish(encoder)
+        return [encoder.finish()] if encoder is not None else []
+
+    def _submit(self, command_buffers):
+        """Submit command buffers to the queue, and keep count."""
+        self._device.queue.submit(command_buffers)
+        self._frame_submits += 1
+        self._staging_belt.recall()
+        # Release replaced buffers (wgpu keeps them alive while in use)
+        for buffer in self._buffers_to_destroy:
+            buffer.destroy()
+        self._buffers_to_destroy = []
 
     def _update_buffer(self, resource):
         buffer = getattr(resource, "_wgpu_buffer", (-1, None))[1]
 
-        # todo: dispose an old buffer? / reuse an old buffer?
-
         pending_uploads = resource._pending_uploads
         resource._pending_uploads = []
-        bytes_per_item = resource.nbytes // resource.nitems
+        bytes_per_item = resource.itemsize
+
+        # The copy commands are recorded in the shared upload encoder
+        encoder = self._get_upload_encoder()
+
+        # The size on the GPU is based on the capacity. For a growable
+        # buffer that is more than nbytes, and a multiple of 4 for copying.
+        nbytes = resource.nbytes
+        if resource.growable:
+            nbytes = max(4, 4 * -(-bytes_per_item * resource.capacity // 4))
 
         # Create buffer if needed
-        if buffer is None or buffer.size != resource.nbytes:
+        if buffer is None or buffer.size != nbytes:
             usage = wgpu.BufferUsage.COPY_DST
             for u in resource.usage.split("|"):
                 usage |= getattr(wgpu.BufferUsage, u)
-            buffer = self._device.create_buffer(size=resource.nbytes, usage=usage)
-
-        queue = self._device.queue
-        encoder = self._device.create_command_encoder()
-
-        # Upload any pending data
-        for offset, size in pending_uploads:
-            subdata = resource._get_subdata(offset, size)
-            # A: map the buffer, writes to it, then unmaps. But we don't offer a mapping API in wgpu-py
-            # B: roll data in new buffer, copy from there to existing buffer
-            tmp_buffer = self._device.create_buffer_with_data(
-                data=subdata,
-                usage=wgpu.BufferUsage.COPY_SRC,
-            )
-            boffset, bsize = bytes_per_item * offset, bytes_per_item * size
-            encoder.copy_buffer_to_buffer(tmp_buffer, 0, buffer, boffset, bsize)
-            # C: using queue. This may be sugar for B, but it may also be optimized
-            # Unfortunately, this seems to crash the device :/
-            # queue.write_buffer(buffer, bytes_per_item * offset, subdata, 0, subdata.nbytes)
-            # D: A staging buffer/belt https://github.com/gfx-rs/wgpu-rs/blob/master/src/util/belt.rs
-            # todo: look into staging buffers?
+            if resource.growable:
+                usage |= wgpu.BufferUsage.COPY_SRC
+            new_buffer = self._device.create_buffer(size=nbytes, usage=usage)
+            if buffer is not None:
+                # A growable buffer got a larger capacity. Copy the data
+                # that is already on the GPU, and release the old buffer
+                # once the copy is submitted.
+                if resource.growable:
+                    copy_size = min(buffer.size, nbytes)
+                    self._staging_belt.flush(encoder)  # writes to the old buffer
+                    encoder.copy_buffer_to_buffer(buffer, 0, new_buffer, 0, copy_size)
+                self._buffers_to_destroy.append(buffer)
+            buffer = new_buffer
 
-        queue.submit([encoder.finish()])
         resource._wgpu_buffer = resource.rev, buffer
 
+        # Upload any pending data. Uniform buffers are small and are
+        # uploaded right away. Other data goes via the upload scheduler.
+        if "UNIFORM" in resource.usage:
+            for offset, size in pending_uploads:
+                self._write_buffer(resource, offset, size)
+        else:
+            self._upload_scheduler.add_buffer_uploads(resource, pending_uploads)
+
+    def _write_buffer(self, resource, offset, size):
+        buffer = resource._wgpu_buffer[1]
+        self._get_upload_encoder()  # the belt records the copies in it
+        subdata = resource._get_subdata(offset, size)
+        # A: map the buffer, writes to it, then unmaps. But we don't offer a mapping API in wgpu-py
+        # B: roll data in new buffer, copy from there to existing buffer
+        # C: using queue. This may be sugar for B, but it may also be optimized
+        # Unfortunately, this seems to crash the device :/
+        # queue.write_buffer(buffer, bytes_per_item * offset, subdata, 0, subdata.nbytes)
+        # D: A staging buffer/belt https://github.com/gfx-rs/wgpu-rs/blob/master/src/util/belt.rs
+        # We use D, which writes the data directly into mapped staging
+        # buffers that are re-used once the GPU is done with them. The
+        # copies are recorded in the upload encoder when the belt is flushed.
+        self._staging_belt.write(buffer, resource.itemsize * offset, subdata)
+
+    def _write_upload(self, kind, resource, offset, size):
+        """Write a slice of a resource's data, called by the upload scheduler."""
+        if kind == "buffer":
+            self._write_buffer(resource, offset, size)
+        else:
+            self._write_texture(resource, offset, size)
+
     def _update_texture_view(self, resource):
         if resource._is_default_view:
             texture_view = resource.texture._wgpu_texture[1].create_view()
@@ -938,10 +1563,9 @@ class WgpuRenderer(Renderer):
         pending_uploads = resource._pending_uploads
         resource._pending_uploads = []
 
-        format = resource.format
-        pixel_padding = None
-        if format in ALTTEXFORMAT:
-            format, pixel_padding, extra_bytes = ALTTEXFORMAT[format]
+        format, pixel_padding, bytes_per_pixel = self._get_texture_upload_format(
+            resource
+        )
 
         # Create texture if needed
         if texture is None:  # todo: or needs to be replaced (e.g. resized)
@@ -957,47 +1581,65 @@ class WgpuRenderer(Renderer):
                 sample_count=1,  # msaa?
             )  # todo: let resource specify mip_level_count and sample_count
 
+        resource._wgpu_texture = resource.rev, texture
+
+        # Upload any pending data, via the upload scheduler. The texture
+        # has merged the pending regions, so we need one write per region
+        # (unless the scheduler splits them). For 2D textures a region
+        # can span multiple layers.
+        self._upload_scheduler.add_texture_uploads(
+            resource, pending_uploads, bytes_per_pixel
+        )
+
+    def _get_texture_upload_format(self, resource):
+        """Get the wgpu format, the pixel padding (or None), and the
+        number of bytes per pixel for uploading the given texture.
+        """
+        format = resource.format
+        pixel_padding = None
         bytes_per_pixel = resource.nbytes // (
             resource.size[0] * resource.size[1] * resource.size[2]
         )
-        if pixel_padding is not None:
+        if format in ALTTEXFORMAT:
+            format, pixel_padding, extra_bytes = ALTTEXFORMAT[format]
             bytes_per_pixel += extra_bytes
+        return format, pixel_padding, bytes_per_pixel
 
-        queue = self._device.queue
-        encoder = self._device.create_command_encoder()
+    def _write_texture(self, resource, offset, size):
+        texture = resource._wgpu_texture[1]
+        _, pixel_padding, bytes_per_pixel = self._get_texture_upload_format(resource)
 
-        # Upload any pending data
-        for offset, size in pending_uploads:
-            subdata = resource._get_subdata(offset, size, pixel_padding)
-            # B: using a temp buffer
-            # tmp_buffer = self._device.create_buffer_with_data(data=subdata,
-            #     usage=wgpu.BufferUsage.COPY_SRC,
-            # )
-            # encoder.copy_buffer_to_texture(
-            #     {
-            #         "buffer": tmp_buffer,
-            #         "offset": 0,
-            #         "bytes_per_row": size[0] * bytes_per_pixel,  # multiple of 256
-            #         "rows_per_image": size[1],
-            #     },
-            #     {
-            #         "texture": texture,
-            #         "mip_level": 0,
-            #         "origin": offset,
-            #     },
-            #     copy_size=size,
-            # )
-            # C: using the queue, which may be doing B, but may also be optimized,
-            #    and the bytes_per_row limitation does not apply here
-            queue.write_texture(
-                {"texture": texture, "origin": offset, "mip_level": 0},
-                subdata,
-                {"bytes_per_row": size[0] * bytes_per_pixel, "rows_per_image": size[1]},
-                size,
-            )
+        # Note that writes to the queue are performed at the next submit,
+        # before the command buffers of that submit are executed.
+        queue = self._device.queue
 
-        queue.submit([encoder.finish()])
-        resource._wgpu_texture = resource.rev, texture
+        subdata = resource._get_subdata(offset, size, pixel_padding)
+        # B: using a temp buffer
+        # tmp_buffer = self._device.create_buffer_with_data(data=subdata,
+        #     usage=wgpu.BufferUsage.COPY_SRC,
+        # )
+        # encoder.copy_buffer_to_texture(
+        #     {
+        #         "buffer": tmp_buffer,
+        #         "offset": 0,
+        #         "bytes_per_row": size[0] * bytes_per_pixel,  # multiple of 256
+        #         "rows_per_image": size[1],
+        #     },
+        #     {
+        #         "texture": texture,
+        #         "mip_level": 0,
+        #         "origin": offset,
+        #     },
+        #     copy_size=size,
+        # )
+        # C: using the queue, which may be doing B, but may also be optimized,
+        #    and the bytes_per_row limitation does not apply here
+        queue.write_texture(
+            {"texture": texture, "origin": offset, "mip_level": 0},
+            subdata,
+            {"bytes_per_row": size[0] * bytes_per_pixel, "rows_per_image": size[1]},
+            size,
+        )
 
     def _update_sampler(self, resource):
         # A sampler's info (and raw object) are stored on a TextureView
@@ -1040,44 +1682,215 @@ class WgpuRenderer(Renderer):
         """
 
         # Make pos 0..1, so we can scale it to the render texture
-        if self._logical_size:
-            logical_size = self._logical_size
-        else:
-            logical_size = self._canvas.get_logical_size()
-        float_pos = pos[0] / logical_size[0], pos[1] / logical_size[1]
+        float_pos = self._get_float_pos(pos)
 
-        can_sample_color = self._render_textures[0].texture is not None
+        textures = self._get_pick_textures()
+        if textures is None:
+            return empty_pixel_info(float_pos)
+        depth_texture, color_texture, pick_texture = textures
+        can_sample_color = color_texture.texture is not None
 
         # Sample
         encoder = self._device.create_command_encoder()
-        self._copy_pixel(encoder, self._depth_texture, float_pos, 0)
+        self._copy_pixel(encoder, depth_texture, float_pos, 0)
         if can_sample_color:
-            self._copy_pixel(encoder, self._render_textures[0], float_pos, 8)
-        self._copy_pixel(encoder, self._pick_texture, float_pos, 16)
+            self._copy_pixel(encoder, color_texture, float_pos, 8)
+        self._copy_pixel(encoder, pick_texture, float_pos, 16)
         queue = self._device.queue
         queue.submit([encoder.finish()])
 
         # Collect data from the buffer
         data = self._pixel_info_buffer.map_read()
-        depth = data[0:4].cast("f")[0]
-        color = tuple(data[8:12].cast("B"))
-        pick_value = tuple(data[16:32].cast("i"))
-        wobject = self._pick_map.get(pick_value[0], None)
-        # Note: the position in world coordinates is not included because
-        # it depends on the camera, but we don't "own" the camera.
-
-        info = {
-            "ndc": (2 * float_pos[0] - 1, 2 * float_pos[1] - 1, depth),
-            "rgba": color if can_sample_color else (0, 0, 0, 0),
-            "world_object": wobject,
+        return decode_pixel_info(data, float_pos, can_sample_color, self._pick_map)
+
+    def request_pick_info(self, pos, key=None):
+        """Request information about the given window location, without
+        stalling the render loop. Returns a ``concurrent.futures.Future``
+        that resolves to the same dict as ``get_pick_info()``. Use
+        ``asyncio.wrap_future()`` to ``await`` it.
+
+        The pixel is copied after the next frame is rendered, and read
+        back at the start of the frame after that, before that frame is
+        submitted. Requests for the same pixel are combined. A request
+        with a key (e.g. "hover") cancels the unresolved request with the
+        same key.
+
+        Note that reading a buffer (``map_read()``) waits until the GPU
+        has finished all submitted work. Because the readback happens
+        before the new frame is submitted, this wait only covers the
+        previous frame (which is usually done by then), instead of the
+        full frame that ``get_pick_info()`` has to wait for.
+        """
+        future = self._pick_readback_queue.request(self._get_float_pos(pos), key)
+        if self._canvas is not None:
+            self._canvas.request_draw()
+        return future
+
+    def _resolve_pick_requests(self):
+        """Resolve the pick requests that were copied in the previous frame."""
+        queue = self._pick_readback_queue
+        if not len(queue):
+            return
+        can_sample_color = self._pick_readback_can_sample_color
+
+        def decode(data, float_pos):
+            return decode_pixel_info(data, float_pos, can_sample_color, self._pick_map)
+
+        queue.resolve(decode)
+
+    def _schedule_pick_requests(self):
+        """Copy the pixels for the new pick requests, to be resolved in
+        the next frame.
+        """
+        queue = self._pick_readback_queue
+        if not len(queue):
+            return
+        textures = self._get_pick_textures()
+        if textures is None:
+            return  # no frame yet, the requests remain pending
+        depth_texture, color_texture, pick_texture = textures
+        can_sample_color = color_texture.texture is not None
+        self._pick_readback_can_sample_color = can_sample_color
+
+        def copy_pixel(encoder, buffer, float_pos, offset):
+            self._copy_pixel(encoder, depth_texture, float_pos, offset, buffer)
+            if can_sample_color:
+                self._copy_pixel(encoder, color_texture, float_pos, offset + 8, buffer)
+            self._copy_pixel(encoder, pick_texture, float_pos, offset + 16, buffer)
+
+        command_buffers = queue.schedule(pick_texture.size, copy_pixel)
+        if command_buffers:
+            self._device.queue.submit(command_buffers)
+        # Make sure there is a next frame to resolve the requests
+        if len(queue) and self._canvas is not None:
+            self._canvas.request_draw()
+
+    def get_pick_info_region(self, pos1, pos2):
+        """Get information about a rectangular region of the window,
+        spanned by the two given positions (opposite corners, in logical
+        pixels with the origin at the top-left). The region of the depth,
+        color and pick textures is copied and read back in one go, so this
+        is much faster than calling ``get_pick_info()`` for each pixel.
+        Returns a dict with fields:
+
+        * "rect": The (x, y, w, h) of the region in physical pixels.
+        * "depth": The depth values, an (h, w) float32 array.
+        * "rgba": The colors, an (h, w, 4) uint8 array. All zero's when
+          rendering directly to the screen (bypassing post-processing).
+        * "pick_values": The raw values of the pick texture, an (h, w, 4)
+          int32 array, the first channel being the object id.
+        * "world_objects": A list of the unique objects in the region.
+        * "pick_info": A dict that maps each of these objects to a dict
+          with a "mask" ((h, w) bool array) and the material-specific
+          pick info (e.g. "face_index" or "vertex_index"), as arrays with
+          a value for each pixel in the mask.
+        """
+        float_pos1 = self._get_float_pos(pos1)
+        float_pos2 = self._get_float_pos(pos2)
+        textures = self._get_pick_textures()
+        if textures is None:
+            return empty_region_info()
+        can_sample_color = textures[1].texture is not None
+
+        rect = get_pixel_rect(float_pos1, float_pos2, textures[2].size)
+        layout = RegionReadbackLayout(rect, [4, 4, 16])
+
+        # Get a buffer that is large enough
+        buffer = self._region_readback_buffer
+        if buffer is None or buffer.size < layout.nbytes:
+            buffer = self._region_readback_buffer = self._device.create_buffer(
+                size=layout.nbytes,
+                usage=wgpu.BufferUsage.COPY_DST | wgpu.BufferUsage.MAP_READ,
+            )
+
+        # Copy the regions
+        encoder = self._device.create_command_encoder()
+        for render_texture, section in zip(textures, layout.sections):
+            if render_texture.texture is None:
+                continue
+            encoder.copy_texture_to_buffer(
+                {
+                    "texture": render_texture.texture,
+                    "mip_level": 0,
+                    "origin": (rect[0], rect[1], 0),
+                },
+                {
+                    "buffer": buffer,
+                    "offset": section[0],
+                    "bytes_per_row": section[1],
+                    "rows_per_image": rect[3],
+                },
+                copy_size=(rect[2], rect[3], 1),
+            )
+        self._device.queue.submit([encoder.finish()])
+
+        # Read back and decode
+        data = buffer.map_read()
+        depth = layout.unpack(data, 0, np.float32, 1)[:, :, 0]
+        rgba = layout.unpack(data, 1, np.uint8, 4)
+        if not can_sample_color:
+            rgba = np.zeros_like(rgba)
+        pick_values = layout.unpack(data, 2, np.int32, 4)
+        wobjects, pick_info = decode_pick_values(pick_values, self._pick_map)
+        return {
+            "rect": rect,
+            "depth": depth,
+            "rgba": rgba,
+            "pick_values": pick_values,
+            "world_objects": wobjects,
+            "pick_info": pick_info,
         }
 
-        if wobject and hasattr(wobject, "material"):
-            pick_info = wobject.material._wgpu_get_pick_info(pick_value)
-            info.update(pick_info)
-        return info
+    def _get_pick_textures(self):
+        """Get the depth, color and pick (render) textures to read pick
+        info from. If the pick target is not rendered along with each
+        frame, the pick pass is performed if needed. Returns None if there
+        is nothing to pick from, because no frame has been rendered yet.
+        """
+        if self._render_pick_target:
+            if self._pick_texture.texture is None:
+                return None
+            return self._depth_texture, self._render_textures[0], self._pick_texture
+        if self._pick_pass_state is not None:
+            self._render_pick_pass()
+        if self._pick_pass_frame < 0:
+            return None
+        return self._pick_depth_texture, self._pick_color_texture, self._pick_texture
+
+    def _render_pick_pass(self):
+        """Render the objects of the last frame into the pick texture
+        (and the pick pass' color and depth textures), at logical resolution.
+        """
+        device = self._device
+        if self._pick_pass_state is None:
+            return
+        q, camera, logical_size = self._pick_pass_state
+        # Do not keep the objects of the last frame alive
+        self._pick_pass_state = None
+        self._pick_pass_frame = self._frames_rendered
+        size = tuple(max(1, int(x)) for x in logical_size) + (1,)
+        for t in (self._pick_color_texture, self._pick_depth_texture):
+            t.ensure_size(device, size)
+        self._pick_texture.ensure_size(device, size)
+
+        # The physical size is used by some shaders (e.g. for line width)
+        self._update_stdinfo_buffer(camera, size[:2], logical_size)
+        command_buffers = self._finish_uploads()
+        command_encoder = device.create_command_encoder()
+        self._render_recording(command_encoder, q, pick_pass=True)
+        command_buffers.append(command_encoder.finish())
+        self._submit(command_buffers)
+        self._pick_passes += 1
+
+    def _get_float_pos(self, pos):
+        """Map a position in logical pixels to the range 0..1."""
+        if self._logical_size:
+            logical_size = self._logical_size
+        else:
+            logical_size = self._canvas.get_logical_size()
+        return pos[0] / logical_size[0], pos[1] / logical_size[1]
 
-    def _copy_pixel(self, encoder, render_texture, float_pos, buf_offset):
+    def _copy_pixel(self, encoder, render_texture, float_pos, buf_offset, buffer=None):
 
         # Map position to the texture index
         w, h, d = render_texture.size
@@ -1093,7 +1906,7 @@ class WgpuRenderer(Renderer):
                 "origin": (x, y, 0),
             },
             {
-                "buffer": self._pixel_info_buffer,
+                "buffer": buffer or self._pixel_info_buffer,
                 "offset": buf_offset,
                 "bytes_per_row": 0,  # render_texture.bytes_per_pixel,
                 "rows_per_image": 1,
@@ -3,8 +3,7 @@ import pyshader
 from pyshader import Struct, i32, f32, vec2, vec3, vec4, ivec4, Array
 
 from . import register_wgpu_render_function, stdinfo_uniform_type
-from ...utils import array_from_shadertype
-from ...resources import Buffer
+from ._cache import get_object_uniform, update_uniform
 from ...objects import Line
 from ...materials import (
     LineMaterial,
@@ -39,7 +38,9 @@ from ...materials import (
 # todo: we can learn about dashing, unfolding and more at http://jcgt.org/published/0002/02/08/paper.pdf
 
 
-renderer_uniform_type = Struct(last_i=i32)
+# The ring_start and ring_capacity are used to index the nodes, so that
+# ring buffers are supported. For other buffers they're 0 and nitems.
+renderer_uniform_type = Struct(last_i=i32, ring_start=i32, ring_capacity=i32)
 
 # %% Shaders
 
@@ -91,6 +92,46 @@ def vertex_shader_thin_vtxclr(
     v_clr = in_clr  # noqa
 
 
+@pyshader.python2shader
+def vertex_shader_thin_ring(
+    index: (pyshader.RES_INPUT, "VertexId", "i32"),
+    u_stdinfo: (pyshader.RES_UNIFORM, (0, 0), stdinfo_uniform_type),
+    u_wobject: (pyshader.RES_UNIFORM, (0, 1), Line.uniform_type),
+    u_renderer: (pyshader.RES_UNIFORM, (0, 3), renderer_uniform_type),
+    buf_pos: (pyshader.RES_BUFFER, (1, 0), Array(f32)),
+    out_pos: (pyshader.RES_OUTPUT, "Position", vec4),
+):
+    # Ring buffers cannot be drawn using vertex buffers, because the
+    # line starts in the middle of the buffer. Instead we use VertexId
+    # as the logical index, and read from the storage buffer.
+    i = (index + u_renderer.ring_start) % u_renderer.ring_capacity
+    pos = vec3(buf_pos[i * 3 + 0], buf_pos[i * 3 + 1], buf_pos[i * 3 + 2])
+    wpos = u_wobject.world_transform * vec4(pos.xyz, 1.0)
+    npos = u_stdinfo.projection_transform * u_stdinfo.cam_transform * wpos
+    out_pos = npos  # noqa
+
+
+@pyshader.python2shader
+def vertex_shader_thin_ring_vtxclr(
+    index: (pyshader.RES_INPUT, "VertexId", "i32"),
+    u_stdinfo: (pyshader.RES_UNIFORM, (0, 0), stdinfo_uniform_type),
+    u_wobject: (pyshader.RES_UNIFORM, (0, 1), Line.uniform_type),
+    u_renderer: (pyshader.RES_UNIFORM, (0, 3), renderer_uniform_type),
+    buf_pos: (pyshader.RES_BUFFER, (1, 0), Array(f32)),
+    buf_clr: (pyshader.RES_BUFFER, (1, 1), Array(f32)),
+    out_pos: (pyshader.RES_OUTPUT, "Position", vec4),
+    v_clr: (pyshader.RES_OUTPUT, 0, vec4),
+):
+    i = (index + u_renderer.ring_start) % u_renderer.ring_capacity
+    pos = vec3(buf_pos[i * 3 + 0], buf_pos[i * 3 + 1], buf_pos[i * 3 + 2])
+    wpos = u_wobject.world_transform * vec4(pos.xyz, 1.0)
+    npos = u_stdinfo.projection_transform * u_stdinfo.cam_transform * wpos
+    out_pos = npos  # noqa
+    v_clr = vec4(  # noqa
+        buf_clr[i * 4 + 0], buf_clr[i * 4 + 1], buf_clr[i * 4 + 2], buf_clr[i * 4 + 3]
+    )
+
+
 @pyshader.python2shader
 def fragment_shader_thin_vtxclr(
     v_clr: (pyshader.RES_INPUT, 0, vec4),
@@ -170,10 +211,16 @@ def vertex_shader(
     # What i in the node list (point on the line) is this?
     i = index // 5
 
+    # Get the indices in the buffer, which may be a ring buffer
+    cap = u_renderer.ring_capacity
+    j2 = (i + u_renderer.ring_start) % cap
+    j1 = (j2 + cap - 1) % cap
+    j3 = (j2 + 1) % cap
+
     # Sample the current node and it's two neighbours, and convert to NDC
-    pos1 = vec3(buf_pos[i * 3 - 3], buf_pos[i * 3 - 2], buf_pos[i * 3 - 1])
-    pos2 = vec3(buf_pos[i * 3 + 0], buf_pos[i * 3 + 1], buf_pos[i * 3 + 2])
-    pos3 = vec3(buf_pos[i * 3 + 3], buf_pos[i * 3 + 4], buf_pos[i * 3 + 5])
+    pos1 = vec3(buf_pos[j1 * 3 + 0], buf_pos[j1 * 3 + 1], buf_pos[j1 * 3 + 2])
+    pos2 = vec3(buf_pos[j2 * 3 + 0], buf_pos[j2 * 3 + 1], buf_pos[j2 * 3 + 2])
+    pos3 = vec3(buf_pos[j3 * 3 + 0], buf_pos[j3 * 3 + 1], buf_pos[j3 * 3 + 2])
     wpos1 = u_wobject.world_transform * vec4(pos1.xyz, 1.0)
     wpos2 = u_wobject.world_transform * vec4(pos2.xyz, 1.0)
     wpos3 = u_wobject.world_transform * vec4(pos3.xyz, 1.0)
@@ -544,15 +591,24 @@ def vertex_shader_vtxclr(
     # What i in the node list (point on the line) is this?
     i = index // 5
 
+    # Get the indices in the buffer, which may be a ring buffer
+    cap = u_renderer.ring_capacity
+    j2 = (i + u_renderer.ring_start) % cap
+    j1 = (j2 + cap - 1) % cap
+    j3 = (j2 + 1) % cap
+
     # Sample the current node's color
     color = vec4(
-        buf_clr[i * 4 + 0], buf_clr[i * 4 + 1], buf_clr[i * 4 + 2], buf_clr[i * 4 + 3]
+        buf_clr[j2 * 4 + 0],
+        buf_clr[j2 * 4 + 1],
+        buf_clr[j2 * 4 + 2],
+        buf_clr[j2 * 4 + 3],
     )
 
     # Sample the current node and it's two neighbours, and convert to NDC
-    pos1 = vec3(buf_pos[i * 3 - 3], buf_pos[i * 3 - 2], buf_pos[i * 3 - 1])
-    pos2 = vec3(buf_pos[i * 3 + 0], buf_pos[i * 3 + 1], buf_pos[i * 3 + 2])
-    pos3 = vec3(buf_pos[i * 3 + 3], buf_pos[i * 3 + 4], buf_pos[i * 3 + 5])
+    pos1 = vec3(buf_pos[j1 * 3 + 0], buf_pos[j1 * 3 + 1], buf_pos[j1 * 3 + 2])
+    pos2 = vec3(buf_pos[j2 * 3 + 0], buf_pos[j2 * 3 + 1], buf_pos[j2 * 3 + 2])
+    pos3 = vec3(buf_pos[j3 * 3 + 0], buf_pos[j3 * 3 + 1], buf_pos[j3 * 3 + 2])
     wpos1 = u_wobject.world_transform * vec4(pos1.xyz, 1.0)
     wpos2 = u_wobject.world_transform * vec4(pos2.xyz, 1.0)
     wpos3 = u_wobject.world_transform * vec4(pos3.xyz, 1.0)
@@ -757,6 +813,12 @@ def thin_line_renderer(wobject, render_info):
     vert_shader = vertex_shader_thin
     frag_shader = fragment_shader_thin
 
+    bindings0 = {
+        0: ("buffer/uniform", render_info.stdinfo_uniform),
+        1: ("buffer/uniform", wobject.uniform_buffer),
+        2: ("buffer/uniform", material.uniform_buffer),
+    }
+
     if material.vertex_colors:
         colors1 = geometry.colors
         if colors1.data.shape[1] != 4:
@@ -767,21 +829,34 @@ def thin_line_renderer(wobject, render_info):
         vert_shader = vertex_shader_thin_vtxclr
         frag_shader = fragment_shader_thin_vtxclr
 
-    return [
-        {
-            "vertex_shader": vert_shader,
-            "fragment_shader": frag_shader,
-            "primitive_topology": primitive,
-            "indices": (positions1.nitems, 1),
-            "vertex_buffers": vertex_buffers,
-            "bindings0": {
-                0: ("buffer/uniform", render_info.stdinfo_uniform),
-                1: ("buffer/uniform", wobject.uniform_buffer),
-                2: ("buffer/uniform", material.uniform_buffer),
-            },
-            "target": None,  # default
-        },
-    ]
+    pipeline_info = {
+        "vertex_shader": vert_shader,
+        "fragment_shader": frag_shader,
+        "primitive_topology": primitive,
+        "indices": lambda: (positions1.nitems, 1),
+        "vertex_buffers": vertex_buffers,
+        "bindings0": bindings0,
+        "target": None,  # default
+    }
+
+    # A ring buffer is read from a storage buffer, using the ring start
+    if positions1.ring:
+        if positions1.data.shape[1] != 3:
+            raise ValueError(
+                "For rendering lines from a ring buffer, the geometry.positions must be Nx3."
+            )
+        bindings1 = {0: ("buffer/read_only_storage", positions1)}
+        pipeline_info["vertex_shader"] = vertex_shader_thin_ring
+        if material.vertex_colors:
+            bindings1[1] = ("buffer/read_only_storage", colors1)
+            pipeline_info["vertex_shader"] = vertex_shader_thin_ring_vtxclr
+        uniform_buffer, update = _get_renderer_uniform(wobject, positions1)
+        bindings0[3] = "buffer/uniform", uniform_buffer
+        pipeline_info["update"] = update
+        pipeline_info["bindings1"] = bindings1
+        pipeline_info["vertex_buffers"] = {}
+
+    return [pipeline_info]
 
 
 @register_wgpu_render_function(Line, LineMaterial)
@@ -830,27 +905,35 @@ def line_renderer(wobject, render_info):
             )
         bindings1[1] = ("buffer/read_only_storage", colors1)
 
+    if positions1.ring and isinstance(material, LineSegmentMaterial):
+        raise ValueError(
+            f"{material.__class__.__name__} does not support ring buffers."
+        )
+
+    # The number of vertices per node. Segments and arrows use pairs of nodes.
+    update = None
     if isinstance(material, LineArrowMaterial):
         vert_shader = vertex_shader_arrow
         if material.vertex_colors:
             vert_shader = vertex_shader_arrow_vtxclr
-        n = (positions1.nitems // 2) * 2 * 4
+        n_per_node, n_per_group = 4, 2
     elif isinstance(material, LineSegmentMaterial):
         vert_shader = vertex_shader_segment
         if material.vertex_colors:
             vert_shader = vertex_shader_vtxclr_segment
-        n = (positions1.nitems // 2) * 2 * 5
+        n_per_node, n_per_group = 5, 2
     else:
         vert_shader = vertex_shader
         if material.vertex_colors:
             vert_shader = vertex_shader_vtxclr
-        n = positions1.nitems * 5
-        uniform_buffer = Buffer(
-            array_from_shadertype(renderer_uniform_type), usage="UNIFORM"
-        )
-        uniform_buffer.data["last_i"] = positions1.nitems - 1
+        n_per_node, n_per_group = 5, 1
+        uniform_buffer, update = _get_renderer_uniform(wobject, positions1)
         bindings0[3] = "buffer/uniform", uniform_buffer
 
+    def get_indices():
+        n = (positions1.nitems // n_per_group) * n_per_group * n_per_node
+        return n, 1
+
     frag_shader = fragment_shader
     if material.vertex_colors:
         frag_shader = fragment_shader_vtxclr
@@ -860,9 +943,29 @@ def line_renderer(wobject, render_info):
             "vertex_shader": vert_shader,
             "fragment_shader": frag_shader,
             "primitive_topology": wgpu.PrimitiveTopology.triangle_strip,
-            "indices": (n, 1),
+            "indices": get_indices,
             "bindings0": bindings0,
             "bindings1": bindings1,
             "target": None,  # default
+            "update": update,
         },
     ]
+
+
+def _get_renderer_uniform(wobject, positions):
+    """Get the renderer uniform of the given line, and a function to
+    update it. The uniform is kept per object, and updated in each frame,
+    because appending to a buffer does not re-run the render function.
+    """
+    uniform_buffer = get_object_uniform(wobject, renderer_uniform_type)
+
+    def update():
+        update_uniform(
+            uniform_buffer,
+            last_i=positions.nitems - 1,
+            ring_start=positions.ring_start,
+            ring_capacity=max(1, positions.capacity),
+        )
+
+    update()
+    return uniform_buffer, update
@@ -30,7 +30,6 @@ def mesh_renderer(wobject, render_info):
 
     # We're assuming the presence of an index buffer for now
     assert getattr(geometry, "index")
-    n = geometry.index.data.size
 
     # Normals. Usually it'd be given. If not, we'll calculate it from the vertices.
     if getattr(geometry, "normals", None) is not None:
@@ -85,7 +84,6 @@ def mesh_renderer(wobject, render_info):
         bindings1[3] = "buffer/read_only_storage", normal_buffer
         vertex_buffers = {}
         index_buffer = None
-        n = geometry.positions.nitems * 2
     elif isinstance(material, MeshSliceMaterial):
         topology = wgpu.PrimitiveTopology.triangle_list
         vertex_shader = vertex_shader_mesh_slice
@@ -94,8 +92,6 @@ def mesh_renderer(wobject, render_info):
         bindings1[3] = "buffer/read_only_storage", geometry.positions
         vertex_buffers = {}
         index_buffer = None
-        # n = (geometry.index.nitems // 3) * 6  # but what if data was nx3?
-        n = (geometry.index.data.size // 3) * 6
     elif isinstance(material, MeshPhongMaterial):
         fragment_shader = fragment_shader_phong
         if material.map is not None:
@@ -117,13 +113,26 @@ def mesh_renderer(wobject, render_info):
                 fragment_shader = fragment_shader_textured_gray_3dtex
 
     # Instanced meshes have their own vertex shader
-    n_instances = 1
     if isinstance(wobject, InstancedMesh):
         if vertex_shader is not vertex_shader_mesh:
             raise TypeError(f"Instanced mesh does not work with {material}")
         vertex_shader = vertex_shader_mesh_instanced
         bindings1[6] = "buffer/read_only_storage", wobject.matrices
-        n_instances = wobject.matrices.nitems
+
+    # The number of vertices and instances can change when appending to
+    # a (growable) buffer, so these are obtained in each frame.
+    def get_indices():
+        if isinstance(material, MeshNormalLinesMaterial):
+            n = geometry.positions.nitems * 2
+        elif isinstance(material, MeshSliceMaterial):
+            # n = (geometry.index.nitems // 3) * 6  # but what if data was nx3?
+            n = (geometry.index.data.size // 3) * 6
+        else:
+            n = geometry.index.data.size
+        n_instances = 1
+        if isinstance(wobject, InstancedMesh):
+            n_instances = wobject.matrices.nitems
+        return range(n), range(n_instances)
 
     # Use a version of the shader for float textures if necessary
     if material.map is not None:
@@ -142,7 +151,7 @@ def mesh_renderer(wobject, render_info):
             "vertex_shader": vertex_shader,
             "fragment_shader": fragment_shader,
             "primitive_topology": topology,
-            "indices": (range(n), range(n_instances)),
+            "indices": get_indices,
             "index_buffer": index_buffer,
             "vertex_buffers": vertex_buffers,
             "bindings0": bindings0,
@@ -1,12 +1,18 @@
 import wgpu  # only for flags/enums
 from pyshader import python2shader
-from pyshader import f32, i32, vec2, vec3, vec4, ivec4
+from pyshader import Struct, f32, i32, vec2, vec3, vec4, ivec4
 
 from . import register_wgpu_render_function, stdinfo_uniform_type
+from ._cache import get_object_uniform, update_uniform
 from ...objects import Points
 from ...materials import PointsMaterial, GaussianPointsMaterial
 
 
+# The ring_start and ring_capacity are used to turn the vertex index into
+# a logical index, so that ring buffers are supported.
+renderer_uniform_type = Struct(ring_start=i32, ring_capacity=i32)
+
+
 @python2shader
 def vertex_shader(
     index: ("input", "VertexId", "i32"),
@@ -14,6 +20,7 @@ def vertex_shader(
     u_stdinfo: ("uniform", (0, 0), stdinfo_uniform_type),
     u_wobject: ("uniform", (0, 1), Points.uniform_type),
     u_points: ("uniform", (0, 2), PointsMaterial.uniform_type),
+    u_renderer: ("uniform", (0, 3), renderer_uniform_type),
     out_pos: ("output", "Position", vec4),
     out_point_size: ("output", "PointSize", f32),
     v_size: ("output", 0, f32),
@@ -25,10 +32,15 @@ def vertex_shader(
     scale_factor = u_stdinfo.physical_size.x / u_stdinfo.logical_size.x
     size = u_points.size * scale_factor + 1.5  # plus some for aa
 
+    # The points in a ring buffer can be drawn in any order, but for
+    # picking we want the logical index.
+    cap = u_renderer.ring_capacity
+    i = (index + cap - u_renderer.ring_start) % cap
+
     out_pos = ndc_pos  # noqa - shader output
     out_point_size = size  # noqa - shader output
     v_size = size  # noqa - shader output
-    v_vertex_idx = vec2(index // 10000, index % 10000)  # noqa
+    v_vertex_idx = vec2(i // 10000, i % 10000)  # noqa
 
 
 @python2shader
@@ -92,14 +104,30 @@ def points_renderer(wobject, render_info):
     material = wobject.material
 
     # Collect vertex buffers
-    n = geometry.positions.nitems
-    vertex_buffers = {0: geometry.positions}
+    positions = geometry.positions
+    vertex_buffers = {0: positions}
+
+    # Info to support ring buffers. If a ring buffer is not full,
+    # the items in use are at the start of the buffer. Appending to
+    # a buffer does not re-run this function, so the info and the
+    # number of points are updated in each frame.
+    uniform_buffer = get_object_uniform(wobject, renderer_uniform_type)
+
+    def update():
+        update_uniform(
+            uniform_buffer,
+            ring_start=positions.ring_start,
+            ring_capacity=max(1, positions.capacity),
+        )
+
+    update()
 
     # Collect bindings
     bindings0 = {
         0: ("buffer/uniform", render_info.stdinfo_uniform),
         1: ("buffer/uniform", wobject.uniform_buffer),
         2: ("buffer/uniform", material.uniform_buffer),
+        3: ("buffer/uniform", uniform_buffer),
     }
 
     if isinstance(material, GaussianPointsMaterial):
@@ -113,8 +141,9 @@ def points_renderer(wobject, render_info):
             "vertex_shader": vertex_shader,
             "fragment_shader": fragment_shader,
             "primitive_topology": wgpu.PrimitiveTopology.point_list,
-            "indices": (range(n), range(1)),
+            "indices": lambda: (range(positions.nitems), range(1)),
             "vertex_buffers": vertex_buffers,
             "bindings0": bindings0,
+            "update": update,
         }
     ]
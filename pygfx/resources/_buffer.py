@@ -1,12 +1,38 @@
+import weakref
+from bisect import bisect_left
+
 import numpy as np
 
 import wgpu
 
 STRUCT_FORMAT_ALIASES = {"c": "B", "l": "i", "L": "I"}
 
+# The (approximate) number of updates that a buffer keeps track of
+UPDATE_LOG_SIZE = 64
+
 
 class Resource:
-    pass
+    """Base class for Buffer, Texture and TextureView."""
+
+    # A counter that is increased on each change of any resource (or of
+    # an object that uses resources). Renderers use it to cheaply detect
+    # that nothing has changed.
+    _global_rev = 0
+
+    @staticmethod
+    def _bump_global_rev():
+        Resource._global_rev += 1
+
+    def __init__(self):
+        # The objects (e.g. geometry) that this resource is attached to
+        self._resource_parents = weakref.WeakSet()
+
+    def _bump_parents_rev(self):
+        """Bump the rev of the objects that this resource is attached to.
+        Used for changes that affect how the resource is used, e.g. its size.
+        """
+        for x in self._resource_parents:
+            x._bump_rev()
 
 
 class Buffer(Resource):
@@ -24,13 +50,34 @@ class Buffer(Resource):
             "VERTEX", "UNIFORM". Multiple values can be given separated
             with "|". See wgpu.BufferUsage.
         nbytes (int): The number of bytes. If data is given, it is derived.
-        nitems (int): The number of items. If data is given, it is derived.
+        nitems (int): The number of items. If data is given, it is derived
+            (except for a ring buffer, where it can be used to specify the
+            initial number of items in use).
         format (str): The format to use when used as a vertex buffer.
             Must be a value from wgpu.VertexFormat. By default it is
             derived from the data. Set when data is not given or when
             you want to overload the derived value.
+        growable (bool): If True, items can be added with ``append()``.
+            The buffer then has a capacity that is doubled when needed,
+            and ``nitems`` is the number of items actually in use.
+            The data is copied into an internal array. Default False.
+        ring (bool): If True, the buffer is a ring buffer (a.k.a. circular
+            buffer) with a capacity that is the length of the given data.
+            Items added with ``append()`` overwrite the oldest items once
+            the buffer is full. The data is copied into an internal array,
+            and is in "physical" order; the oldest item is at ``ring_start``.
+            Default False.
     """
 
+    # Pending upload ranges that are less than this many bytes apart are
+    # merged. Each upload has an overhead, so it's cheaper to upload a
+    # few extra bytes. Can be set on the class or per buffer.
+    upload_merge_gap = 1024
+
+    # When more than this fraction of the buffer is pending, the whole
+    # buffer is uploaded instead. Can be set on the class or per buffer.
+    upload_full_fraction = 0.5
+
     def __init__(
         self,
         data=None,
@@ -39,7 +86,10 @@ class Buffer(Resource):
         nbytes=None,
         nitems=None,
         format=None,
+        growable=False,
+        ring=False,
     ):
+        super().__init__()
         self._rev = 0
         # To specify the buffer size
         self._nbytes = 0
@@ -47,7 +97,23 @@ class Buffer(Resource):
         self._format = format
         # The actual data (optional)
         self._data = None
-        self._pending_uploads = []  # list of (offset, size) tuples
+        self._pending_uploads = []  # sorted list of (offset, size) tuples
+        self._pending_nitems = 0
+        # A short log of updated ranges, e.g. to update bounds incrementally
+        self._update_log = []  # list of (rev, offset, size) tuples
+        self._update_log_rev = 0  # the log is complete from this rev on
+        self._growable = bool(growable)
+        self._ring = bool(ring)
+        self._storage = None
+        self._write_head = 0
+
+        # Growable and ring buffers copy the data into an internal array
+        if self._growable and self._ring:
+            raise ValueError("A buffer cannot be both growable and a ring buffer.")
+        elif self._growable or self._ring:
+            if data is None:
+                raise ValueError("A growable or ring buffer must be given data.")
+            data = self._storage = np.array(data, ndmin=1)
 
         # Get nbytes
         if data is not None:
@@ -63,14 +129,22 @@ class Buffer(Resource):
             self._mem = mem
             self._nbytes = mem.nbytes
             self._nitems = mem.shape[0] if mem.shape else 1
+            self._itemsize = mem.itemsize * int(np.prod(mem.shape[1:], dtype=int))
             self._pending_uploads.append((0, self._nitems))
+            self._pending_nitems = self._nitems
             if nbytes is not None and nbytes != self._nbytes:
                 raise ValueError("Given nbytes does not match size of given data.")
-            if nitems is not None and nitems != self._nitems:
+            if self._ring and nitems is not None:
+                if not 0 <= nitems <= self._nitems:
+                    raise ValueError("Given nitems exceeds the ring buffer capacity.")
+                self._nitems = int(nitems)
+                self._write_head = self._nitems % max(1, mem.shape[0])
+            elif nitems is not None and nitems != self._nitems:
                 raise ValueError("Given nitems does not match shape of given data.")
         elif nbytes is not None and nitems is not None:
             self._nbytes = int(nbytes)
             self._nitems = int(nitems)
+            self._itemsize = self._nbytes // max(1, self._nitems)
         else:
             raise ValueError(
                 "Buffer must be instantiated with either data or nbytes and nitems."
@@ -121,9 +195,52 @@ class Buffer(Resource):
 
     @property
     def nitems(self):
-        """The number of items in the buffer."""
+        """The number of items in the buffer. For a growable buffer
+        this is the number of items in use.
+        """
         return self._nitems
 
+    @property
+    def itemsize(self):
+        """The number of bytes per item."""
+        return self._itemsize
+
+    @property
+    def growable(self):
+        """Whether items can be added to this buffer using ``append()``."""
+        return self._growable
+
+    @property
+    def ring(self):
+        """Whether this buffer is a ring buffer."""
+        return self._ring
+
+    @property
+    def capacity(self):
+        """The number of items that the buffer can hold. For a growable
+        buffer, this is doubled when needed. For a ring buffer it's
+        fixed. Otherwise it's the same as ``nitems``.
+        """
+        if self._storage is not None:
+            return self._storage.shape[0]
+        return self._nitems
+
+    @property
+    def write_head(self):
+        """For a ring buffer, the (physical) index where the next item
+        will be written.
+        """
+        return self._write_head
+
+    @property
+    def ring_start(self):
+        """For a ring buffer, the (physical) index of the oldest item,
+        i.e. the item that is logically first. Zero for other buffers.
+        """
+        if self._ring:
+            return (self._write_head - self._nitems) % max(1, self.capacity)
+        return 0
+
     @property
     def format(self):
         """The vertex or index format (depending on the value of usage)."""
@@ -150,6 +267,12 @@ class Buffer(Resource):
     def update_range(self, offset=0, size=2 ** 50):
         """Mark a certain range of the data for upload to the GPU. The
         offset and size are expressed in integer number of elements.
+
+        Pending ranges that overlap or are near each-other (see
+        ``upload_merge_gap``) are merged, so that a few larger chunks
+        are uploaded instead of many small ones. If a large part of the
+        buffer is pending (see ``upload_full_fraction``), the whole
+        buffer is uploaded.
         """
         # See ThreeJS BufferAttribute.updateRange
         # Check input
@@ -162,20 +285,138 @@ class Buffer(Resource):
             raise ValueError("Update offset must not be negative")
         elif offset + size > self.nitems:
             size = self.nitems - offset
-        # Merge with current entry?
-        if self._pending_uploads:
-            cur_offset, cur_size = self._pending_uploads.pop(-1)
-            offset = min(offset, cur_offset)
-            size = max(size, cur_size)
-        # Limit and apply
-        self._pending_uploads.append((offset, size))
+            if size <= 0:
+                return
+        # Apply
+        self._add_pending_range(offset, size)
         self._rev += 1
-        # todo: this can be smarter, we have logic for chunking in the morph tool
+        self._bump_global_rev()
+        self._log_update(offset, size)
+
+    def _log_update(self, offset, size):
+        log = self._update_log
+        log.append((self._rev, offset, size))
+        if len(log) > 2 * UPDATE_LOG_SIZE:
+            self._update_log_rev = log[-UPDATE_LOG_SIZE - 1][0]
+            del log[:-UPDATE_LOG_SIZE]
+
+    def _get_ranges_updated_since(self, rev):
+        """Get a list of (offset, size) ranges that were updated after
+        the given rev, or None if this is not known (anymore).
+        """
+        if rev < self._update_log_rev or rev > self._rev:
+            return None
+        return [(offset, size) for r, offset, size in self._update_log if r > rev]
+
+    def _add_pending_range(self, offset, size):
+        """Add a range to the pending uploads. The pending uploads are
+        a sorted list of non-overlapping ranges. Ranges that overlap or
+        are near the new range are merged with it.
+        """
+        pending = self._pending_uploads
+        nitems = self.nitems
+        if not pending:  # the renderer has consumed the pending uploads
+            pending.append((offset, size))
+            self._pending_nitems = size
+            return
+        elif self._pending_nitems == nitems:  # the whole buffer is pending
+            return
+        # Get the gap in number of items
+        gap = self.upload_merge_gap // max(1, self.itemsize)
+        # Find the ranges that the new range touches. The ranges are
+        # sorted and do not overlap, so their ends are sorted too.
+        start, end = offset, offset + size
+        i1 = bisect_left(pending, (start,))
+        while i1 > 0 and sum(pending[i1 - 1]) + gap >= start:
+            i1 -= 1
+        i2 = i1
+        while i2 < len(pending) and pending[i2][0] - gap <= end:
+            i2 += 1
+        # Merge
+        if i2 > i1:
+            start = min(start, pending[i1][0])
+            end = max(end, sum(pending[i2 - 1]))
+            self._pending_nitems -= sum(s for _, s in pending[i1:i2])
+        pending[i1:i2] = [(start, end - start)]
+        self._pending_nitems += end - start
+        # Fall back to a full upload if a large part of the buffer is dirty
+        if len(pending) > 1 and (
+            self._pending_nitems > self.upload_full_fraction * nitems
+        ):
+            pending[:] = [(0, nitems)]
+            self._pending_nitems = nitems
+
+    def append(self, data):
+        """Append items to a growable or ring buffer. The data must have
+        the same dtype and item shape as the buffer (a single item is
+        allowed too). Only the new items are uploaded to the GPU.
+
+        For a growable buffer, the capacity is doubled (as many times as
+        needed) when it is insufficient. For a ring buffer, the items are
+        written at the write head, overwriting the oldest items when the
+        buffer is full.
+        """
+        if not (self._growable or self._ring):
+            raise RuntimeError("Can only append to a growable or ring buffer.")
+        item_shape = self._storage.shape[1:]
+        data = np.asarray(data, self._storage.dtype).reshape((-1,) + item_shape)
+        capacity = self.capacity
+        if self._ring:
+            self._append_ring(data)
+        else:
+            self._append_growable(data)
+        # If the capacity changed, the GPU buffer is replaced, so the objects
+        # that use it must be updated. Render functions obtain the number of
+        # items (and ring start) in each frame, so these need no update.
+        if self.capacity != capacity:
+            self._bump_parents_rev()
+
+    def _append_ring(self, data):
+        capacity = self.capacity
+        n = data.shape[0]
+        if n == 0 or capacity == 0:
+            return
+        elif n > capacity:
+            data, n = data[-capacity:], capacity
+        head = self._write_head
+        self._nitems = min(capacity, self._nitems + n)
+        self._write_head = (head + n) % capacity
+        # Write in one or two parts, and schedule only these for upload
+        n1 = min(n, capacity - head)
+        self._storage[head : head + n1] = data[:n1]
+        self.update_range(head, n1)
+        if n > n1:
+            self._storage[: n - n1] = data[n1:]
+            self.update_range(0, n - n1)
+
+    def _append_growable(self, data):
+        item_shape = self._storage.shape[1:]
+        n0 = self._nitems
+        n1 = n0 + data.shape[0]
+        if n1 == n0:
+            return
+        # Grow the storage if needed
+        capacity = max(1, self.capacity)
+        if n1 > self.capacity:
+            while capacity < n1:
+                capacity *= 2
+            storage = np.empty((capacity,) + item_shape, self._storage.dtype)
+            storage[:n0] = self._storage[:n0]
+            self._storage = storage
+        self._storage[n0:n1] = data
+        # Update the logical size
+        self._data = self._storage[:n1]
+        self._mem = memoryview(self._data)
+        self._nbytes = self._mem.nbytes
+        self._nitems = n1
+        self._vertex_byte_range = (0, self._nbytes)
+        # Schedule the upload of the new items
+        self.update_range(n0, n1 - n0)
 
     def _get_subdata(self, offset, size):
         """Return subdata as a contiguous array."""
         # If this is a full range, this is easy
-        if offset == 0 and size == self.nitems and self.mem.contiguous:
+        if offset == 0 and size * self.itemsize == self.nbytes and self.mem.contiguous:
             return self.mem
         # Get a numpy array, because memoryviews do not support nd slicing
         if isinstance(self.data, np.ndarray):
@@ -28,6 +28,7 @@ class Texture(Resource):
     """
 
     def __init__(self, data=None, *, dim, usage="SAMPLED", size=None, format=None):
+        super().__init__()
         self._rev = 0
         # The dim specifies the texture dimension
         assert dim in (1, 2, 3)
@@ -38,7 +39,7 @@ class Texture(Resource):
         self._nbytes = 0
         # The actual data (optional)
         self._data = None
-        self._pending_uploads = []  # list of (offset, size) tuples
+        self._pending_uploads = []  # list of (offset, size) boxes
 
         size = None if size is None else (int(size[0]), int(size[1]), int(size[2]))
 
@@ -135,6 +136,9 @@ class Texture(Resource):
         """Mark a certain range of the data for upload to the GPU.
         The offset and (sub) size should be (width, height, depth)
         tuples. Numpy users beware that an arrays shape is (height, width)!
+
+        Pending regions that overlap or are adjacent are merged, so that
+        the data is uploaded using as few writes as possible.
         """
         # Check input
         assert isinstance(offset, tuple) and len(offset) == 3
@@ -147,22 +151,44 @@ class Texture(Resource):
             raise ValueError("Update offset must not be negative")
         elif any(b + s > refsize for b, s, refsize in zip(offset, size, self.size)):
             raise ValueError("Update size out of range")
-        # Apply - consider that texture arrays want to be uploaded per-texture
-        # todo: avoid duplicates by merging with existing pending uploads
+        # Apply - 1D textures (with multiple rows/layers) are uploaded per row,
+        # because WebGPU does not allow copies of more than one row for these.
         if self.dim == 1:
-            for z in range(size[2]):
-                for y in range(size[1]):
-                    offset2 = offset[0], y, z
-                    size2 = size[0], 1, 1
-                    self._pending_uploads.append((offset2, size2))
-        elif self.dim == 2:
-            for z in range(size[2]):
-                offset2 = offset[0], offset[1], z
-                size2 = size[0], size[1], 1
-                self._pending_uploads.append((offset2, size2))
+            for z in range(offset[2], offset[2] + size[2]):
+                for y in range(offset[1], offset[1] + size[1]):
+                    self._add_pending_box((offset[0], y, z), (size[0], 1, 1))
         else:
-            self._pending_uploads.append((offset, size))
+            self._add_pending_box(offset, size)
         self._rev += 1
+        self._bump_global_rev()
+
+    def _add_pending_box(self, offset, size):
+        """Add a box to the pending uploads, merging it with pending
+        boxes where this does not increase the amount of data to upload,
+        i.e. with boxes that overlap, are adjacent, or are contained.
+        """
+        pending = self._pending_uploads
+        offset, size = tuple(offset), tuple(size)
+        i = 0
+        while i < len(pending):
+            offset2, size2 = pending[i]
+            # Get the bounding box of the two boxes
+            bb_offset = tuple(min(a, b) for a, b in zip(offset, offset2))
+            bb_end = tuple(
+                max(a + s1, b + s2)
+                for a, s1, b, s2 in zip(offset, size, offset2, size2)
+            )
+            bb_size = tuple(e - o for e, o in zip(bb_end, bb_offset))
+            # Merge if the bounding box is not larger than the two boxes combined
+            if self.dim == 1 and bb_size[1:] != (1, 1):
+                i += 1
+            elif _volume(bb_size) > _volume(size) + _volume(size2):
+                i += 1
+            else:
+                pending.pop(i)
+                offset, size = bb_offset, bb_size
+                i = 0  # the bigger box may now merge with other boxes
+        pending.append((offset, size))
 
     def _size_from_data(self, data, dim, size):
         # Check if shape matches dimension
@@ -217,6 +243,10 @@ class Texture(Resource):
         return memoryview(np.ascontiguousarray(sub_arr))
 
 
+def _volume(size):
+    return size[0] * size[1] * size[2]
+
+
 def format_from_memoryview(mem, size):
     format = str(mem.format)
     format = STRUCT_FORMAT_ALIASES.get(format, format)
@@ -302,6 +332,7 @@ class TextureView(Resource):
         mip_range=None,
         layer_range=None,
     ):
+        super().__init__()
         self._rev = 1
         assert isinstance(texture, Texture)
         self._texture = texture
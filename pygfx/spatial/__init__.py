@@ -0,0 +1,6 @@
+# flake8: noqa
+
+from ._frustum import get_frustum_planes, spheres_in_frustum, frustum_cull
+from ._bvh import BVH
+from ._raycaster import Raycaster, TriangleBVH, intersect_triangles
+from ._nearest import pick_nearest, PointIndex
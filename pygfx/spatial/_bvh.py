@@ -0,0 +1,378 @@
+import numpy as np
+
+from ._frustum import get_frustum_planes
+
+
+class BVH:
+    """A bounding volume hierarchy over the world-space bounding boxes
+    of world objects, to quickly find the objects that intersect a box,
+    a ray, or a view frustum.
+
+    The BVH is notified when the matrix_world of one of its objects is
+    updated (in ``update_matrix_world()``). Other changes that affect
+    the bounds, like changes to the geometry data, must be reported with
+    ``mark_dirty()``. Changes are processed lazily, on the next query or
+    call to ``update()``: if possible the tree is refitted, otherwise it is
+    rebuilt. Objects that have no (known) bounds are not part of the
+    tree; they are never returned by box and ray queries, and always by
+    frustum queries.
+
+    Parameters:
+        wobjects (iterable): The initial world objects.
+    """
+
+    # The max number of objects per leaf node
+    leaf_size = 8
+
+    # The tree is rebuilt when its surface area (a measure of its
+    # quality) has grown by this factor since it was built.
+    rebuild_factor = 1.5
+
+    # The tree is rebuilt when the number of added objects (which are
+    # tested one by one) or removed objects exceeds this fraction.
+    rebuild_fraction = 0.1
+
+    def __init__(self, wobjects=()):
+        self._objects = []  # index -> wobject or None (removed)
+        self._indices = {}  # wobject -> index
+        self._boxes = np.zeros((0, 2, 3))  # index -> world bounding box
+        self._unbounded = set()  # indices of objects without bounds
+        self._dirty = set()  # indices of objects with changed bounds
+        self._added = set()  # indices of objects that are not in the tree
+        self._nremoved = 0  # number of removed objects that are in the tree
+        self._tree = None
+        self._nrebuilds = self._nrefits = 0
+        for wobject in wobjects:
+            self.add(wobject)
+
+    @classmethod
+    def from_scene(cls, root):
+        """Create a BVH from the objects in the given scene (or other
+        world object) that have a geometry.
+        """
+        wobjects = []
+
+        def collect(ob):
+            if getattr(ob, "geometry", None) is not None:
+                wobjects.append(ob)
+
+        root.traverse(collect)
+        return cls(wobjects)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __contains__(self, wobject):
+        return wobject in self._indices
+
+    @property
+    def stats(self):
+        """A dict with the number of objects, the number of nodes in
+        the tree, and how many times the tree was rebuilt and refitted.
+        """
+        return {
+            "objects": len(self._indices),
+            "nodes": 0 if self._tree is None else len(self._tree.left),
+            "rebuilds": self._nrebuilds,
+            "refits": self._nrefits,
+        }
+
+    def add(self, wobject):
+        """Add a world object."""
+        if wobject in self._indices:
+            return
+        index = len(self._objects)
+        if index >= len(self._boxes):
+            boxes = _empty_boxes(max(16, 2 * len(self._boxes)))
+            boxes[: len(self._boxes)] = self._boxes
+            self._boxes = boxes
+        self._objects.append(wobject)
+        self._indices[wobject] = index
+        self._added.add(index)
+        self._dirty.add(index)
+        wobject._add_bounds_listener(self)
+
+    def remove(self, wobject):
+        """Remove a world object."""
+        index = self._indices.pop(wobject, None)
+        if index is None:
+            return
+        wobject._remove_bounds_listener(self)
+        self._objects[index] = None
+        self._boxes[index] = _empty_boxes(1)
+        self._unbounded.discard(index)
+        self._dirty.discard(index)
+        if index in self._added:
+            self._added.discard(index)
+        else:
+            self._nremoved += 1
+
+    def mark_dirty(self, wobject):
+        """Mark the bounds of the given world object as changed."""
+        index = self._indices.get(wobject, None)
+        if index is not None:
+            self._dirty.add(index)
+
+    def update(self):
+        """Process the changes since the last update. This is done
+        automatically on each query.
+        """
+        dirty, self._dirty = self._dirty, set()
+        for index in dirty:
+            bbox = self._objects[index].get_world_bounding_box()
+            if bbox is None:
+                self._boxes[index] = _empty_boxes(1)
+                self._unbounded.add(index)
+            else:
+                self._boxes[index] = bbox
+                self._unbounded.discard(index)
+                if not self._in_tree(index):
+                    self._added.add(index)
+
+        tree = self._tree
+        ntree = 0 if tree is None else len(tree.order)
+        max_changes = max(self.leaf_size, self.rebuild_fraction * ntree)
+        if tree is None or len(self._added) > max_changes:
+            self._rebuild()
+        elif self._nremoved > max_changes:
+            self._rebuild()
+        elif dirty:
+            dirty_in_tree = [i for i in dirty if self._in_tree(i)]
+            if dirty_in_tree:
+                tree.refit(self._boxes, dirty_in_tree)
+                self._nrefits += 1
+                if tree.get_area() > self.rebuild_factor * tree.build_area:
+                    self._rebuild()
+
+    def _in_tree(self, index):
+        if self._tree is None:
+            return False
+        leaf_of = self._tree.leaf_of
+        return index < len(leaf_of) and leaf_of[index] >= 0
+
+    def _rebuild(self):
+        # Compact the indices
+        objects = [ob for ob in self._objects if ob is not None]
+        old_indices = [self._indices[ob] for ob in objects]
+        unbounded = {i for i, j in enumerate(old_indices) if j in self._unbounded}
+        self._boxes = self._boxes[old_indices] if objects else _empty_boxes(0)
+        self._objects = objects
+        self._indices = {ob: i for i, ob in enumerate(objects)}
+        self._unbounded = unbounded
+        self._added = set()
+        self._nremoved = 0
+        # Build
+        bounded = np.array(
+            [i for i in range(len(objects)) if i not in unbounded], np.int64
+        )
+        self._tree = _Tree(self._boxes, bounded, self.leaf_size)
+        self._nrebuilds += 1
+
+    def _select(self, test):
+        """Get the indices of the objects for which the test, which
+        takes arrays of box minima and maxima, returns True.
+        """
+        self.update()
+        candidates = [self._tree.select(test)]
+        added = np.array(sorted(self._added), np.int64)
+        if len(added):
+            candidates.append(added)
+        candidates = np.concatenate(candidates)
+        if not len(candidates):
+            return candidates
+        boxes = self._boxes[candidates]
+        # Objects without bounds have an empty box, so they never pass
+        return np.sort(candidates[test(boxes[:, 0], boxes[:, 1])])
+
+    def query_box(self, bbox):
+        """Get the objects whose bounding box intersects the given
+        axis-aligned box, a (2, 3) array with the minimum and maximum.
+        Returns a list.
+        """
+        bbox = np.asarray(bbox, np.float64).reshape(2, 3)
+
+        def test(mins, maxs):
+            return np.all((mins <= bbox[1]) & (maxs >= bbox[0]), axis=1)
+
+        return [self._objects[i] for i in self._select(test)]
+
+    def query_ray(self, origin, direction, max_distance=np.inf):
+        """Get the objects whose bounding box is hit by the given ray,
+        sorted by the distance along the ray at which it enters the box.
+        The distance is expressed in units of the direction's length.
+        Returns a list.
+        """
+        origin = np.asarray(origin, np.float64).reshape(3)
+        direction = np.asarray(direction, np.float64).reshape(3)
+        with np.errstate(divide="ignore"):
+            inv_direction = 1 / direction
+
+        def test(mins, maxs):
+            tmin, tmax = _ray_box_intersect(origin, inv_direction, mins, maxs)
+            return (tmax >= np.maximum(tmin, 0)) & (tmin <= max_distance)
+
+        hits = self._select(test)
+        boxes = self._boxes[hits]
+        tmin, _ = _ray_box_intersect(origin, inv_direction, boxes[:, 0], boxes[:, 1])
+        return [self._objects[i] for i in hits[np.argsort(tmin, kind="stable")]]
+
+    def query_frustum(self, matrix):
+        """Get the objects that are (possibly) inside the view frustum
+        defined by the given Matrix4 (which maps world coordinates to
+        NDC). Objects without bounds are always included. Returns a list.
+        """
+        planes = get_frustum_planes(matrix)
+
+        def test(mins, maxs):
+            # Test the corner that is furthest along each plane's normal
+            positive = planes[:, :3] > 0
+            corners = np.where(positive, maxs[:, None], mins[:, None])
+            distances = (corners * planes[:, :3]).sum(2) + planes[:, 3]
+            return np.all(distances >= 0, axis=1)
+
+        hits = set(self._select(test).tolist()) | self._unbounded
+        return [self._objects[i] for i in sorted(hits)]
+
+
+class _Tree:
+    """The array-based tree of a BVH. Nodes are stored in depth-first
+    order, so that the root is node 0. Each node refers to a contiguous
+    range in the order array, which contains the object indices.
+    """
+
+    def __init__(self, boxes, indices, leaf_size):
+        self.order = order = indices.copy()
+        centers = 0.5 * (boxes[indices, 0] + boxes[indices, 1])
+        centers_by_index = np.zeros((len(boxes), 3))
+        centers_by_index[indices] = centers
+        start, count, left, right, parent, depth = [], [], [], [], [], []
+
+        def new_node(node_start, node_count, node_parent, node_depth):
+            for a, v in zip(
+                (start, count, left, right, parent, depth),
+                (node_start, node_count, -1, -1, node_parent, node_depth),
+            ):
+                a.append(v)
+            return len(start) - 1
+
+        # Split nodes at the median of the axis along which the centers
+        # of its objects are most spread out.
+        stack = [new_node(0, len(order), -1, 0)] if len(order) else []
+        while stack:
+            i = stack.pop()
+            s, n = start[i], count[i]
+            if n <= leaf_size:
+                continue
+            sub = order[s : s + n]
+            c = centers_by_index[sub]
+            axis = np.argmax(c.max(0) - c.min(0))
+            half = n // 2
+            order[s : s + n] = sub[np.argpartition(c[:, axis], half)]
+            left[i] = new_node(s, half, i, depth[i] + 1)
+            right[i] = new_node(s + half, n - half, i, depth[i] + 1)
+            stack += [right[i], left[i]]
+
+        self.start = np.array(start, np.int64)
+        self.count = np.array(count, np.int64)
+        self.left = np.array(left, np.int64)
+        self.right = np.array(right, np.int64)
+        self.parent = np.array(parent, np.int64)
+        self.depth = np.array(depth, np.int64)
+        self.leaves = np.flatnonzero(self.left < 0)
+        self.leaves = self.leaves[np.argsort(self.start[self.leaves])]
+        internal = np.flatnonzero(self.left >= 0)
+        self.levels = [
+            internal[self.depth[internal] == d]
+            for d in range(int(self.depth.max(initial=0)), -1, -1)
+        ]
+        # Map object index to leaf node
+        self.leaf_of = np.full(len(boxes), -1, np.int64)
+        for leaf in self.leaves:
+            self.leaf_of[order[start[leaf] : start[leaf] + count[leaf]]] = leaf
+
+        self.mins = np.zeros((len(start), 3))
+        self.maxs = np.zeros((len(start), 3))
+        self.refit(boxes)
+        self.build_area = self.get_area()
+
+    def refit(self, boxes, dirty=None):
+        """Update the node boxes. If dirty object indices are given,
+        and there are not too many, only the nodes that contain these
+        objects are updated.
+        """
+        if not len(self.start):
+            return
+        if dirty is not None and len(dirty) < len(self.leaves) // 8:
+            nodes = set()
+            for leaf in self.leaf_of[list(dirty)]:
+                while leaf >= 0 and leaf not in nodes:
+                    nodes.add(leaf)
+                    leaf = self.parent[leaf]
+            for i in sorted(nodes, key=lambda i: -self.depth[i]):
+                if self.left[i] < 0:
+                    sub = boxes[
+                        self.order[self.start[i] : self.start[i] + self.count[i]]
+                    ]
+                    self.mins[i] = sub[:, 0].min(0)
+                    self.maxs[i] = sub[:, 1].max(0)
+                else:
+                    l, r = self.left[i], self.right[i]
+                    self.mins[i] = np.minimum(self.mins[l], self.mins[r])
+                    self.maxs[i] = np.maximum(self.maxs[l], self.maxs[r])
+            return
+        # Refit all nodes, the leaves in one go, and then level by level
+        sorted_boxes = boxes[self.order]
+        starts = self.start[self.leaves]
+        self.mins[self.leaves] = np.minimum.reduceat(sorted_boxes[:, 0], starts)
+        self.maxs[self.leaves] = np.maximum.reduceat(sorted_boxes[:, 1], starts)
+        for nodes in self.levels:
+            l, r = self.left[nodes], self.right[nodes]
+            self.mins[nodes] = np.minimum(self.mins[l], self.mins[r])
+            self.maxs[nodes] = np.maximum(self.maxs[l], self.maxs[r])
+
+    def get_area(self):
+        """Get the sum of the surface areas of the nodes."""
+        size = np.clip(self.maxs - self.mins, 0, None)
+        area = size[:, 0] * size[:, 1] + size[:, 1] * size[:, 2]
+        area += size[:, 2] * size[:, 0]
+        return float(area.sum())
+
+    def select(self, test):
+        """Get the object indices in the leaves whose box passes the
+        test. The tree is traversed breadth-first, one level at a time.
+        """
+        selected = []
+        nodes = np.zeros((min(1, len(self.start)),), np.int64)
+        while len(nodes):
+            nodes = nodes[test(self.mins[nodes], self.maxs[nodes])]
+            is_leaf = self.left[nodes] < 0
+            for leaf in nodes[is_leaf]:
+                selected.append(
+                    self.order[self.start[leaf] : self.start[leaf] + self.count[leaf]]
+                )
+            nodes = nodes[~is_leaf]
+            nodes = np.concatenate([self.left[nodes], self.right[nodes]])
+        if not selected:
+            return np.zeros((0,), np.int64)
+        return np.concatenate(selected)
+
+
+def _empty_boxes(n):
+    """Get n boxes that contain nothing."""
+    boxes = np.empty((n, 2, 3))
+    boxes[:, 0] = np.inf
+    boxes[:, 1] = -np.inf
+    return boxes
+
+
+def _ray_box_intersect(origin, inv_direction, mins, maxs):
+    """Get the distances along the ray at which it enters and exits the
+    boxes. The ray misses a box when tmax < tmin.
+    """
+    with np.errstate(invalid="ignore"):
+        t1 = (mins - origin) * inv_direction
+        t2 = (maxs - origin) * inv_direction
+    # fmin/fmax ignore the nans for rays that lie in the plane of a face
+    tmin = np.fmax.reduce(np.fmin(t1, t2), axis=1)
+    tmax = np.fmin.reduce(np.fmax(t1, t2), axis=1)
+    return tmin, tmax
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def get_frustum_planes(matrix):
+    """Get the six planes of the view frustum from the given Matrix4,
+    which maps world coordinates to NDC (i.e. the projection matrix
+    times the inverse of the camera's world matrix). Returns a (6, 4)
+    array of normalized planes (a, b, c, d), ordered left, right, bottom,
+    top, near, far. A point p is inside the frustum when
+    ``a*p.x + b*p.y + c*p.z + d >= 0`` for all planes.
+    """
+    # Matrix4 is column-major, so the transpose gives us the rows
+    m = np.array(matrix.elements, np.float64).reshape(4, 4).T
+    planes = np.array(
+        [
+            m[3] + m[0],  # x >= -w
+            m[3] - m[0],  # x <= w
+            m[3] + m[1],  # y >= -w
+            m[3] - m[1],  # y <= w
+            m[2],  # z >= 0 (the depth is 0..1 in wgpu)
+            m[3] - m[2],  # z <= w
+        ]
+    )
+    norms = np.linalg.norm(planes[:, :3], axis=1)
+    norms[norms == 0] = 1
+    return planes / norms[:, np.newaxis]
+
+
+def spheres_in_frustum(planes, centers, radii):
+    """Test which spheres intersect the frustum defined by the given
+    planes. The centers are an (N, 3) array and the radii an (N,)
+    array. Returns a boolean array of length N. This test is
+    conservative: spheres near a corner of the frustum may be reported
+    inside even when they're not.
+    """
+    centers = np.asarray(centers, np.float64).reshape(-1, 3)
+    radii = np.asarray(radii, np.float64).reshape(-1)
+    distances = centers @ planes[:, :3].T + planes[:, 3]
+    return np.all(distances >= -radii[:, np.newaxis], axis=1)
+
+
+def frustum_cull(wobjects, matrix):
+    """Select the world objects that are (possibly) inside the view
+    frustum defined by the given Matrix4 (which maps world coordinates
+    to NDC). The test uses each object's world-space bounding sphere.
+    Objects without bounds are always selected. Returns a new list.
+    """
+    spheres = [wobject.get_world_bounding_sphere() for wobject in wobjects]
+    indices = [i for i, sphere in enumerate(spheres) if sphere is not None]
+    if not indices:
+        return list(wobjects)
+    centers = np.array([spheres[i][0] for i in indices])
+    radii = np.array([spheres[i][1] for i in indices])
+    inside = spheres_in_frustum(get_frustum_planes(matrix), centers, radii)
+    keep = [True] * len(wobjects)
+    for i, is_inside in zip(indices, inside):
+        keep[i] = is_inside
+    return [wobject for wobject, k in zip(wobjects, keep) if k]
@@ -0,0 +1,195 @@
+import weakref
+
+import numpy as np
+
+from ..objects import Points, Line
+from ..materials import LineSegmentMaterial, LineThinSegmentMaterial
+from ._bvh import _Tree
+from ._raycaster import _get_matrix
+
+
+def pick_nearest(wobjects, pos, camera, size, tolerance=5):
+    """Get the vertex of the given Points and Line objects that is nearest
+    to the given screen position, within a tolerance. This works also
+    when the position is in between the (small) points, where picking
+    via the renderer gives nothing.
+
+    Parameters:
+        wobjects (list): The world objects to consider. Objects other
+            than Points and Line are ignored.
+        pos (tuple): The (x, y) position in logical pixels, with the
+            origin at the top-left.
+        camera (Camera): The camera, with its matrix_world and projection
+            matrix up to date.
+        size (tuple): The (logical) size of the viewport.
+        tolerance (float): The max distance in logical pixels. Default 5.
+
+    Returns None if there is nothing within the tolerance. Otherwise
+    returns a dict with fields "world_object", "instance_index",
+    "vertex_index" and "distance" (in logical pixels). For points, the
+    vertex_index is an int, like the pick info of ``PointsMaterial``. For
+    lines, it's a float, representing the position along the nearest
+    segment, like the pick info of ``LineMaterial``.
+    """
+    view_proj = _get_matrix(camera.projection_matrix) @ _get_matrix(
+        camera.matrix_world_inverse
+    )
+    pos = np.array(pos, np.float64)
+    best = None
+    for wobject in wobjects:
+        if isinstance(wobject, Points):
+            func = _pick_nearest_point
+        elif isinstance(wobject, Line):
+            func = _pick_nearest_on_line
+        else:
+            continue
+        geometry = wobject.geometry
+        if getattr(geometry, "positions", None) is None:
+            continue
+        matrix = view_proj @ _get_matrix(wobject.matrix_world)
+        to_screen = _ScreenProjection(matrix, size)
+        result = func(wobject, to_screen, pos, tolerance)
+        if result is not None:
+            # Pick the nearest, and in case of a tie the one in front
+            if best is None or result[:2] < best[:2]:
+                best = result + (wobject,)
+    if best is None:
+        return None
+    distance, _, vertex_index, wobject = best
+    return {
+        "world_object": wobject,
+        "instance_index": 0,
+        "vertex_index": vertex_index,
+        "distance": distance,
+    }
+
+
+def _pick_nearest_point(wobject, to_screen, pos, tolerance):
+    index = get_point_index(wobject.geometry.positions)
+    candidates = index.select(to_screen, pos, tolerance)
+    xy, depth, valid = to_screen(index.vertices[candidates])
+    distances = np.linalg.norm(xy - pos, axis=1)
+    ok = valid & (distances <= tolerance)
+    if not ok.any():
+        return None
+    candidates, distances, depth = candidates[ok], distances[ok], depth[ok]
+    i = np.lexsort((depth, distances))[0]
+    return float(distances[i]), float(depth[i]), int(candidates[i])
+
+
+def _pick_nearest_on_line(wobject, to_screen, pos, tolerance):
+    pairs = isinstance(wobject.material, (LineSegmentMaterial, LineThinSegmentMaterial))
+    index = get_point_index(wobject.geometry.positions, pairs)
+    candidates = index.select(to_screen, pos, tolerance)
+    segments = index.segments[candidates]
+    xy1, depth1, valid1 = to_screen(index.vertices[segments[:, 0]])
+    xy2, depth2, valid2 = to_screen(index.vertices[segments[:, 1]])
+    # Distance to the segment, in screen space
+    d = xy2 - xy1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = ((pos - xy1) * d).sum(1) / (d * d).sum(1)
+    f = np.clip(np.nan_to_num(f), 0, 1)
+    distances = np.linalg.norm(xy1 + f[:, None] * d - pos, axis=1)
+    depth = depth1 + f * (depth2 - depth1)
+    ok = valid1 & valid2 & (distances <= tolerance)
+    if not ok.any():
+        return None
+    segments, f, distances, depth = segments[ok], f[ok], distances[ok], depth[ok]
+    i = np.lexsort((depth, distances))[0]
+    vertex_index = segments[i, 0] + f[i]
+    return float(distances[i]), float(depth[i]), float(vertex_index)
+
+
+class PointIndex:
+    """A KD-tree over the vertices (or line segments) of a positions
+    buffer, in local coordinates. The vertices are in logical order, so
+    for ring buffers the oldest vertex comes first.
+    """
+
+    def __init__(self, positions, pairs=None):
+        nitems = positions.nitems
+        if positions.ring:
+            start, capacity = positions.ring_start, positions.capacity
+            indices = (start + np.arange(nitems)) % capacity
+            data = np.asarray(positions.data, np.float64)[indices, :3]
+        else:
+            data = np.asarray(positions.data, np.float64)[:nitems, :3]
+        self.vertices = data
+        self.segments = None
+        if pairs is None:
+            boxes = np.stack([data, data], 1)
+            leaf_size = 256
+        else:
+            if pairs:
+                i1 = np.arange(0, nitems - 1, 2)
+            else:
+                i1 = np.arange(0, nitems - 1)
+            self.segments = np.stack([i1, i1 + 1], 1)
+            ends = data[self.segments]  # (S, 2, 3)
+            boxes = np.stack([ends.min(1), ends.max(1)], 1)
+            leaf_size = 64
+        # Leave out items with nans (e.g. gaps in lines)
+        finite = np.flatnonzero(np.isfinite(boxes).all(axis=(1, 2)))
+        self.tree = _Tree(boxes, finite, leaf_size)
+
+    def select(self, to_screen, pos, tolerance):
+        """Get the indices of the vertices (or segments) in the nodes
+        that are possibly within the tolerance of the screen position.
+        """
+
+        def test(mins, maxs):
+            corners = np.where(_CORNER_MASK, maxs[:, None], mins[:, None])
+            xy, _, valid = to_screen(corners.reshape(-1, 3), False)
+            xy, valid = xy.reshape(-1, 8, 2), valid.reshape(-1, 8)
+            # Nodes with corners behind the camera are kept
+            with np.errstate(invalid="ignore"):
+                lo = xy.min(1) - tolerance
+                hi = xy.max(1) + tolerance
+                inside = np.all((lo <= pos) & (hi >= pos), axis=1)
+            return inside | ~valid.all(1)
+
+        return self.tree.select(test)
+
+
+_CORNER_MASK = np.array(
+    [[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)], bool
+)
+
+
+class _ScreenProjection:
+    """Project local coordinates to logical pixels with the origin at
+    the top-left, using the given (row-major) local-to-NDC matrix.
+    """
+
+    def __init__(self, matrix, size):
+        self.matrix = matrix
+        self.size = np.array(size[:2], np.float64)
+
+    def __call__(self, points, clip_depth=True):
+        clip = points @ self.matrix[:, :3].T + self.matrix[:, 3]
+        w = clip[:, 3]
+        valid = w > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ndc = clip[:, :3] / w[:, None]
+        if clip_depth:
+            valid &= (ndc[:, 2] >= 0) & (ndc[:, 2] <= 1)
+        xy = np.empty((len(points), 2))
+        xy[:, 0] = (ndc[:, 0] + 1) * 0.5 * self.size[0]
+        xy[:, 1] = (1 - ndc[:, 1]) * 0.5 * self.size[1]
+        return xy, ndc[:, 2], valid
+
+
+_point_index_cache = weakref.WeakKeyDictionary()
+
+
+def get_point_index(positions, pairs=None):
+    """Get the PointIndex for the given positions buffer, for points
+    (pairs is None), a line strip (pairs is False) or line segments
+    (pairs is True). It is cached until the buffer changes.
+    """
+    key = positions.rev, positions.nitems, positions.ring_start
+    cache = _point_index_cache.setdefault(positions, {})
+    cached = cache.get(pairs, (None, None))
+    if cached[0] != key:
+        cached = cache[pairs] = key, PointIndex(positions, pairs)
+    return cached[1]
@@ -0,0 +1,211 @@
+import weakref
+
+import numpy as np
+
+from ..objects import Mesh, InstancedMesh
+from ._bvh import BVH, _Tree, _ray_box_intersect
+
+
+class Raycaster:
+    """Intersect a ray with world objects on the CPU. In contrast to the
+    renderer's ``get_pick_info()``, this does not need a rendered frame,
+    and also works for objects that are off screen or occluded.
+
+    Currently supports Mesh objects (but not InstancedMesh). To make the
+    intersection fast, a BVH of the triangles of each geometry is
+    created, and cached until the positions or index change.
+
+    Parameters:
+        origin (array): The origin of the ray in world coordinates.
+        direction (array): The direction of the ray. Is normalized.
+        near (float): Intersections closer than this are ignored. Default 0.
+        far (float): Intersections further than this are ignored. Default inf.
+    """
+
+    def __init__(self, origin=(0, 0, 0), direction=(0, 0, -1), near=0, far=np.inf):
+        self.set(origin, direction)
+        self.near = near
+        self.far = far
+
+    def set(self, origin, direction):
+        """Set the origin and direction of the ray."""
+        self.origin = np.asarray(origin, np.float64).reshape(3)
+        direction = np.asarray(direction, np.float64).reshape(3)
+        self.direction = direction / np.linalg.norm(direction)
+
+    def set_from_camera(self, ndc, camera):
+        """Set the ray from the camera through the given (x, y) position
+        in normalized device coordinates. The camera's matrix_world and
+        projection matrix must be up to date. For a perspective camera,
+        the ray starts at the camera, otherwise at the near plane.
+        """
+        matrix_world = _get_matrix(camera.matrix_world)
+        projection = _get_matrix(camera.projection_matrix)
+        m = matrix_world @ _get_matrix(camera.projection_matrix_inverse)
+        x, y = ndc
+        near = m @ (x, y, 0, 1)
+        far = m @ (x, y, 1, 1)
+        near, far = near[:3] / near[3], far[:3] / far[3]
+        if projection[3, 2] != 0:  # perspective
+            self.set(matrix_world[:3, 3], far - near)
+        else:
+            self.set(near, far - near)
+
+    def set_from_screen(self, pos, camera, size):
+        """Set the ray from the camera through the given position in
+        (logical) pixels, with the origin at the top-left, for a viewport
+        of the given (logical) size.
+        """
+        x = 2 * pos[0] / size[0] - 1
+        y = 1 - 2 * pos[1] / size[1]
+        self.set_from_camera((x, y), camera)
+
+    def intersect_object(self, wobject, recursive=False):
+        """Intersect the ray with the given world object (and optionally
+        its children). Returns a list of intersections sorted by distance.
+
+        Each intersection is a dict with fields "world_object", "distance",
+        and "point" (in world coordinates). For meshes, the fields
+        "instance_index", "face_index" and "face_coords" are included,
+        like the pick info of ``MeshBasicMaterial``, but with exact
+        barycentric coordinates.
+        """
+        return self.intersect_objects([wobject], recursive)
+
+    def intersect_objects(self, wobjects, recursive=False):
+        """Intersect the ray with the given world objects (and optionally
+        their children). The objects can also be given as a BVH, to
+        quickly select the objects whose bounds are hit by the ray.
+        Returns a list of intersections sorted by distance.
+        """
+        if isinstance(wobjects, BVH):
+            wobjects = wobjects.query_ray(self.origin, self.direction, self.far)
+        elif recursive:
+            all_wobjects = []
+            for wobject in wobjects:
+                wobject.traverse(all_wobjects.append)
+            wobjects = all_wobjects
+        intersections = []
+        for wobject in wobjects:
+            if isinstance(wobject, Mesh) and not isinstance(wobject, InstancedMesh):
+                intersections += self._intersect_mesh(wobject)
+        intersections.sort(key=lambda x: x["distance"])
+        return intersections
+
+    def _intersect_mesh(self, wobject):
+        geometry = wobject.geometry
+        if getattr(geometry, "index", None) is None:
+            return []
+        # Quick test against the world bounding box
+        bbox = wobject.get_world_bounding_box()
+        if bbox is None:
+            return []
+        inv_direction = _inverse(self.direction)
+        tmin, tmax = _ray_box_intersect(
+            self.origin, inv_direction, bbox[:1, :], bbox[1:, :]
+        )
+        if not (tmax[0] >= max(tmin[0], self.near) and tmin[0] <= self.far):
+            return []
+        # Transform the ray to local coordinates. The direction is not
+        # normalized, so that t is the distance in world coordinates.
+        inv_matrix = np.linalg.inv(_get_matrix(wobject.matrix_world))
+        origin = inv_matrix[:3, :3] @ self.origin + inv_matrix[:3, 3]
+        direction = inv_matrix[:3, :3] @ self.direction
+        # Intersect
+        bvh = get_triangle_bvh(geometry)
+        faces, t, u, v = bvh.intersect(origin, direction, self.near, self.far)
+        intersections = []
+        for i in range(len(faces)):
+            point = self.origin + t[i] * self.direction
+            intersections.append(
+                {
+                    "world_object": wobject,
+                    "distance": float(t[i]),
+                    "point": tuple(point.tolist()),
+                    "instance_index": 0,
+                    "face_index": int(faces[i]),
+                    "face_coords": (float(1 - u[i] - v[i]), float(u[i]), float(v[i])),
+                }
+            )
+        return intersections
+
+
+class TriangleBVH:
+    """A BVH over the triangles of a mesh geometry, in local coordinates."""
+
+    leaf_size = 8
+
+    def __init__(self, positions, faces):
+        self.faces = faces
+        self.triangles = triangles = positions[faces]  # (F, 3, 3)
+        boxes = np.stack([triangles.min(1), triangles.max(1)], 1)
+        self.tree = _Tree(boxes, np.arange(len(faces)), self.leaf_size)
+
+    def intersect(self, origin, direction, near=0, far=np.inf):
+        """Intersect the given ray with the triangles. Returns arrays
+        with the face indices, the distances (in units of the direction's
+        length), and the barycentric coordinates u and v of the hits.
+        """
+        inv_direction = _inverse(direction)
+
+        def test(mins, maxs):
+            tmin, tmax = _ray_box_intersect(origin, inv_direction, mins, maxs)
+            return (tmax >= np.maximum(tmin, near)) & (tmin <= far)
+
+        candidates = self.tree.select(test)
+        hit, t, u, v = intersect_triangles(
+            origin, direction, self.triangles[candidates]
+        )
+        hit &= (t >= near) & (t <= far)
+        return candidates[hit], t[hit], u[hit], v[hit]
+
+
+def intersect_triangles(origin, direction, triangles):
+    """Intersect a ray with an (N, 3, 3) array of triangles, using the
+    Moller-Trumbore algorithm. Both sides of the triangles are hit.
+    Returns a boolean hit array, and arrays with the distances along the
+    ray and the barycentric coordinates u and v (the weights of the
+    second and third vertex).
+    """
+    v0, v1, v2 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    e1, e2 = v1 - v0, v2 - v0
+    p = np.cross(direction, e2)
+    det = (e1 * p).sum(1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_det = 1 / det
+        s = origin - v0
+        u = (s * p).sum(1) * inv_det
+        q = np.cross(s, e1)
+        v = (q @ direction) * inv_det
+        t = (e2 * q).sum(1) * inv_det
+        hit = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1)
+    return hit, t, u, v
+
+
+_triangle_bvh_cache = weakref.WeakKeyDictionary()
+
+
+def get_triangle_bvh(geometry):
+    """Get the TriangleBVH for the given geometry. It is cached, and
+    rebuilt when the positions or index change.
+    """
+    positions, index = geometry.positions, geometry.index
+    key = positions, positions.rev, index, index.rev
+    cached = _triangle_bvh_cache.get(geometry, (None, None))
+    if cached[0] != key:
+        vertices = np.asarray(positions.data, np.float64)[: positions.nitems, :3]
+        faces = np.asarray(index.data)[: index.nitems].reshape(-1)
+        faces = faces[: len(faces) // 3 * 3].reshape(-1, 3).astype(np.int64)
+        cached = key, TriangleBVH(vertices, faces)
+        _triangle_bvh_cache[geometry] = cached
+    return cached[1]
+
+
+def _get_matrix(matrix):
+    """Get a Matrix4 as a numpy array (in row-major order)."""
+    return np.array(matrix.elements, np.float64).reshape(4, 4).T
+
+
+def _inverse(direction):
+    with np.errstate(divide="ignore"):
+        return 1 / direction
@@ -0,0 +1,60 @@
+import numpy as np
+
+import pygfx as gfx
+from pygfx.geometries import _base
+
+
+def test_bounding_box_and_sphere():
+    positions = np.array([[0, 0, 0], [2, 0, 0], [0, 4, np.nan]], np.float32)
+    geometry = gfx.Geometry(positions=positions)
+
+    bbox = geometry.bounding_box()
+    assert np.allclose(bbox, [[0, 0, 0], [2, 4, 0]])
+    center, radius = geometry.bounding_sphere()
+    assert np.allclose(center, [1, 2, 0])
+    assert np.isclose(radius, 5 ** 0.5)
+
+    # Cached
+    assert geometry.bounding_box() is bbox
+
+    # No (finite) positions
+    assert gfx.Geometry().bounding_box() is None
+    geometry = gfx.Geometry(positions=np.full((3, 3), np.nan, np.float32))
+    assert geometry.bounding_box() is None
+    assert geometry.bounding_sphere() is None
+
+
+def test_bounds_incremental_update(monkeypatch):
+    monkeypatch.setattr(_base, "BOUNDS_CHUNK_SIZE", 10)
+    positions = np.random.uniform(-1, 1, (100, 3)).astype(np.float32)
+    geometry = gfx.Geometry(positions=positions)
+    geometry.bounding_sphere()
+    bounds = geometry._bounds
+
+    # Update a range, only the affected chunks are dirty
+    geometry.positions.data[15] = 10
+    geometry.positions.data[95] = -10
+    geometry.positions.update_range(15, 1)
+    geometry.positions.update_range(95, 1)
+    bounds.update()
+    assert bounds.dirty == {1, 9}
+    assert np.allclose(geometry.bounding_box(), [[-10] * 3, [10] * 3])
+
+    # Shrinking works too
+    geometry.positions.data[95] = 0
+    geometry.positions.update_range(95, 1)
+    data = geometry.positions.data
+    assert np.allclose(geometry.bounding_box(), [data.min(0), data.max(0)])
+    center, radius = geometry.bounding_sphere()
+    assert np.isclose(radius, np.linalg.norm(data - center, axis=1).max())
+    assert geometry._bounds is bounds
+
+
+def test_bounds_growable():
+    geometry = gfx.Geometry()
+    geometry.positions = gfx.Buffer(
+        np.zeros((1, 3), np.float32), usage="vertex", growable=True
+    )
+    assert np.allclose(geometry.bounding_box(), [[0, 0, 0], [0, 0, 0]])
+    geometry.positions.append(np.array([[1, 2, 3]], np.float32))
+    assert np.allclose(geometry.bounding_box(), [[0, 0, 0], [1, 2, 3]])
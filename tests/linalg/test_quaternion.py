@@ -6,6 +6,7 @@ from pygfx.linalg import (
     Euler,
     Matrix4,
     Quaternion,
+    TrackedQuaternion,
 )
 
 
@@ -511,3 +512,26 @@ def test_multiply_vector3():
             mv = v0.clone().apply_matrix4(m)
 
             assert qv.distance_to(mv) < 0.001
+
+
+def test_tracked_quaternion():
+    changes = []
+
+    def callback():
+        changes.append(1)
+
+    a = TrackedQuaternion(x, y, z, w, callback=callback)
+    assert a == Quaternion(x, y, z, w)
+    assert changes == []
+
+    a.set_from_euler(Euler(1, 0, 0))
+    assert len(changes) == 1
+    a.normalize()
+    assert len(changes) == 1
+    a.on_change(callback)
+    a.normalize()
+    assert len(changes) == 2
+
+    # Without a callback
+    assert TrackedQuaternion()._callback is None
+    assert TrackedQuaternion.__new__(TrackedQuaternion)._callback is None
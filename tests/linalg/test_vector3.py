@@ -12,6 +12,7 @@ from pygfx.linalg import (
     Quaternion,
     Spherical,
     Cylindrical,
+    TrackedVector3,
 )
 
 
@@ -872,3 +873,32 @@ def test_lerp_vectors():
     assert Vector3().lerp_vectors(a, b, 0.0) == a
     assert Vector3().lerp_vectors(a, b, 0.5) == Vector3(x * 0.5, -y * 0.5, z * 0.5)
     assert Vector3().lerp_vectors(a, b, 1.0) == b
+
+
+def test_tracked_vector3():
+    changes = []
+
+    def callback():
+        changes.append(1)
+
+    a = TrackedVector3(x, y, z, callback=callback)
+    assert a == Vector3(x, y, z)
+    assert changes == []
+
+    # The callback is called once
+    a.set(1, 2, 3)
+    a.add_scalar(1)
+    assert a == Vector3(2, 3, 4)
+    assert len(changes) == 1
+
+    # Until it is set again
+    a.on_change(callback)
+    a.apply_quaternion(Quaternion(0.1, 0.2, 0.3, 0.4).normalize())
+    assert len(changes) == 2
+
+    # Clones are normal vectors
+    a.on_change(callback)
+    b = a.clone()
+    assert type(b) is Vector3
+    b.set(1, 2, 3)
+    assert len(changes) == 2
@@ -0,0 +1,300 @@
+from math import pi
+
+import numpy as np
+
+import pygfx as gfx
+from pygfx import WorldObject
+from pygfx.linalg import Euler, Matrix4, Vector3, Quaternion
+from pygfx.spatial import BVH
+
+
+def create_tree():
+    """Create two equal trees of objects with various transforms."""
+    trees = []
+    for i in range(2):
+        root = gfx.Scene()
+        parent = root
+        for depth in range(3):
+            for j in range(3):
+                ob = WorldObject()
+                ob.position.set(j, depth, 1)
+                ob.rotation.set_from_euler(Euler(0.1 * j, 0.2 * depth, 0.3))
+                ob.scale.set(1, 2, 1 + j)
+                parent.add(ob)
+            parent = ob
+        trees.append(root)
+    return trees
+
+
+def assert_same_world(tree1, tree2):
+    objects1, objects2 = [], []
+    tree1.traverse(objects1.append)
+    tree2.traverse(objects2.append)
+    assert len(objects1) == len(objects2)
+    for ob1, ob2 in zip(objects1, objects2):
+        m1, m2 = ob1.matrix_world.elements, ob2.matrix_world.elements
+        assert np.allclose(m1, m2, atol=1e-5)
+        data = ob1.uniform_buffer.data["world_transform"].ravel()
+        assert np.allclose(data, m2, atol=1e-5)
+
+
+def test_transform_store_matches():
+    tree1, tree2 = create_tree()
+    tree1.position.set(0, 0, -3)
+    tree2.position.set(0, 0, -3)
+    store = gfx.TransformStore(tree1)
+    assert len(store) == 10
+    tree1.update_matrix_world()
+    tree2.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+    # The transforms are views onto the arrays
+    ob1, ob2 = tree1.children[1], tree2.children[1]
+    ob1.position.x = 5
+    ob2.position.x = 5
+    ob1.rotation.copy(Quaternion().set_from_axis_angle(Vector3(0, 0, 1), pi / 2))
+    ob2.rotation.copy(Quaternion().set_from_axis_angle(Vector3(0, 0, 1), pi / 2))
+    slot = store.get_slots([ob1])[0]
+    assert store.positions[slot].tolist() == [5, 0, 1]
+    assert ob1.position.x == 5 and ob1.position.y == 0
+    tree1.update_matrix_world()
+    tree2.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+    # Modify the arrays directly
+    slots = store.get_slots(tree1.children)
+    store.positions[slots, 1] += 1
+    store.mark_changed(slots)
+    for ob in tree2.children:
+        ob.position.y += 1
+    tree1.update_matrix_world()
+    tree2.update_matrix_world()
+    assert_same_world(tree1, tree2)
+    assert np.allclose(
+        store.world_matrices[slots[2]], tree1.children[2].matrix_world.elements
+    )
+
+
+def test_transform_store_structure():
+    tree1, tree2 = create_tree()
+    store = gfx.TransformStore(tree1)
+    tree1.update_matrix_world()
+
+    # Objects are added to the store and released from it
+    ob1, ob2 = WorldObject(), WorldObject()
+    ob1.position.set(1, 2, 3)
+    ob2.position.set(1, 2, 3)
+    tree1.children[2].add(ob1)
+    tree2.children[2].add(ob2)
+    child1 = tree1.children[0]
+    tree1.remove(child1)
+    tree2.remove(tree2.children[0])
+    tree1.update_matrix_world()
+    tree2.update_matrix_world()
+    assert ob1 in store and child1 not in store
+    assert_same_world(tree1, tree2)
+
+    # A released object has a normal transform again
+    assert child1.position.to_array() == [0, 0, 1]
+    child1.position.x = 2
+    child1.update_matrix_world()
+    assert child1.matrix_world.elements[12] == 2
+
+    # Moving a subtree to another parent
+    tree1.children[0].add(tree1.children[1].children[0])
+    tree2.children[0].add(tree2.children[1].children[0])
+    tree1.update_matrix_world()
+    tree2.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+    store.close()
+    assert len(store) == 0
+    ob1.position.z = 4
+    tree1.update_matrix_world()
+    assert ob1.matrix_world.elements[14] != 0
+    ob2.position.z = 4
+    tree2.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+
+def test_transform_store_matrix():
+    tree1, tree2 = create_tree()
+    gfx.TransformStore(tree1)
+    tree1.update_matrix_world()
+
+    # Setting the matrix directly, without auto update
+    matrix = Matrix4().make_rotation_x(0.5).set_position(Vector3(1, 2, 3))
+    for tree in (tree1, tree2):
+        ob = tree.children[1]
+        ob.matrix_auto_update = False
+        ob.matrix.copy(matrix)
+        ob.matrix_world_dirty = True
+        tree.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+    # Applying a matrix
+    for tree in (tree1, tree2):
+        tree.children[2].children[0].apply_matrix(matrix)
+        tree.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+    # A store on a subtree uses the world matrix of its parent
+    tree1, tree2 = create_tree()
+    gfx.TransformStore(tree1.children[2])
+    for tree in (tree1, tree2):
+        tree.position.set(0, 1, 0)
+        tree.update_matrix_world()
+    assert_same_world(tree1, tree2)
+    for tree in (tree1, tree2):
+        tree.children[2].children[0].update_matrix_world(update_parents=True)
+        tree.position.set(3, 0, 0)
+        tree.update_matrix_world()
+    assert_same_world(tree1, tree2)
+
+
+def test_transform_store_batched_write(monkeypatch):
+    tree1, tree2 = create_tree()
+    store = gfx.TransformStore(tree1)
+    tree1.update_matrix_world()
+    objects = []
+    tree1.traverse(objects.append)
+    for ob in objects:
+        ob.uniform_buffer._pending_uploads = []  # as if uploaded
+    revs = [ob.uniform_buffer.rev for ob in objects]
+
+    # The results are not written back per object
+    written = []
+    original_set_matrix_world = WorldObject._set_matrix_world
+
+    def set_matrix_world(self, elements):
+        written.append(self)
+        original_set_matrix_world(self, elements)
+
+    monkeypatch.setattr(WorldObject, "_set_matrix_world", set_matrix_world)
+    slots = store.get_slots(tree1.children)
+    store.positions[slots, 0] += 2
+    store.mark_changed(slots)
+    for ob in tree2.children:
+        ob.position.x += 2
+    tree1.update_matrix_world()
+    tree2.update_matrix_world()
+    assert not set(written) & set(objects)
+    assert_same_world(tree1, tree2)
+
+    # But the uniform buffers are marked for upload
+    for ob, rev in zip(objects[1:], revs[1:]):
+        assert ob.uniform_buffer.rev > rev
+        assert ob.uniform_buffer._pending_uploads == [(0, 1)]
+        ob.uniform_buffer._pending_uploads = []
+        assert ob.uniform_buffer._pending_uploads == []
+    assert objects[0].uniform_buffer.rev == revs[0]
+
+    # The matrices are views
+    ob = tree1.children[1]
+    assert ob.matrix_world.elements[12] == ob.uniform_buffer.data["world_transform"][12]
+
+    # A released object gets a normal uniform buffer, with the same data
+    tree1.remove(ob)
+    tree1.update_matrix_world()
+    assert type(ob.uniform_buffer) is gfx.Buffer
+    assert type(ob.matrix_world) is Matrix4
+    assert ob.uniform_buffer.data["id"] == ob.id
+    data = ob.uniform_buffer.data["world_transform"].ravel()
+    assert np.allclose(data, ob.matrix_world.elements)
+
+
+def test_transform_store_bounds_listeners():
+    positions = np.array([(-0.5, -0.5, -0.5), (0.5, 0.5, 0.5)], np.float32)
+    scene = gfx.Scene()
+    objects = []
+    for i in range(10):
+        points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+        points.position.x = i
+        scene.add(points)
+        objects.append(points)
+    store = gfx.TransformStore(scene)
+    scene.update_matrix_world()
+    bvh = BVH(objects[:5])
+    bvh.add(objects[5])  # added after the store
+    assert bvh.query_box([(4.4, -1, -1), (4.6, 1, 1)]) == objects[4:6]
+
+    # Only the objects in the BVH are notified
+    slots = store.get_slots(objects)
+    assert store._tracked[slots].tolist() == [True] * 6 + [False] * 4
+    store.positions[slots, 1] = 10
+    store.mark_changed(slots)
+    scene.update_matrix_world()
+    assert bvh.query_box([(4.4, -1, -1), (4.6, 1, 1)]) == []
+    assert bvh.query_box([(4.4, 9, -1), (4.6, 11, 1)]) == objects[4:6]
+
+
+def test_transform_store_world_bounds():
+    positions = np.array([(-1, -1, -1), (1, 1, 1)], np.float32)
+    scene = gfx.Scene()
+    points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+    other = WorldObject()
+    scene.add(points)
+    scene.add(other)
+    points.position.x = 10
+    scene.update_matrix_world()
+    bbox = points.get_world_bounding_box()
+    assert np.allclose(bbox, [(9, -1, -1), (11, 1, 1)])
+
+    # Taking the object in the store invalidates the cache
+    store = gfx.TransformStore(scene)
+    scene.update_matrix_world()
+    bbox = points.get_world_bounding_box()
+    assert np.allclose(bbox, [(9, -1, -1), (11, 1, 1)])
+    assert points.get_world_bounding_box() is bbox
+
+    # Updates of other objects keep the cache
+    other.position.x = 3
+    scene.update_matrix_world()
+    assert points.get_world_bounding_box() is bbox
+
+    # Updates by the store are tracked, also when writing the arrays directly
+    points.position.x = 20
+    scene.update_matrix_world()
+    bbox = points.get_world_bounding_box()
+    assert np.allclose(bbox, [(19, -1, -1), (21, 1, 1)])
+    slots = store.get_slots([points])
+    store.positions[slots, 0] = 30
+    store.mark_changed(slots)
+    scene.update_matrix_world()
+    assert np.allclose(points.get_world_bounding_box(), [(29, -1, -1), (31, 1, 1)])
+
+    # And after releasing the object
+    bbox = points.get_world_bounding_box()
+    store.close()
+    assert points.get_world_bounding_box() is not bbox
+    points.position.x = 40
+    scene.update_matrix_world()
+    assert np.allclose(points.get_world_bounding_box(), [(39, -1, -1), (41, 1, 1)])
+
+
+def test_transform_store_on_subtree_updated_via_scene():
+    scene = gfx.Scene()
+    group = gfx.Group()
+    ob = WorldObject()
+    group.add(ob)
+    scene.add(gfx.Group())
+    scene.add(group)
+    store = gfx.TransformStore(group)
+    scene.update_matrix_world()
+
+    # Changes made via the views reach the store from the scene
+    ob.position.x = 5
+    assert group._subtree_dirty and scene._subtree_dirty
+    scene.update_matrix_world()
+    assert ob.matrix_world.elements[12] == 5
+
+    ob.position.set(1, 2, 3)
+    scene.update_matrix_world()
+    assert ob.matrix_world.elements[13] == 2
+
+    # Also when modifying the arrays directly
+    slots = store.get_slots([ob])
+    store.positions[slots, 2] = 7
+    store.mark_changed(slots)
+    scene.update_matrix_world()
+    assert ob.matrix_world.elements[14] == 7
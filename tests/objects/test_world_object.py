@@ -1,6 +1,9 @@
 from math import pi
 from unittest.mock import Mock, call
 
+import numpy as np
+
+import pygfx as gfx
 from pygfx import WorldObject
 from pygfx.linalg import Euler, Vector3, Quaternion
 
@@ -54,6 +57,41 @@ def test_remove():
     assert layer1_child1 in root.children
 
 
+def test_structure_rev():
+    root = WorldObject()
+    child = WorldObject()
+    grandchild = WorldObject()
+    child.add(grandchild)
+
+    # Changes are propagated to the root
+    rev = root.structure_rev
+    root.add(child)
+    assert root.structure_rev > rev
+
+    rev = root.structure_rev
+    grandchild.visible = False
+    assert root.structure_rev > rev
+    rev = root.structure_rev
+    grandchild.visible = False  # no change
+    assert root.structure_rev == rev
+
+    mesh = gfx.Mesh(gfx.BoxGeometry(1, 1, 1), gfx.MeshBasicMaterial())
+    grandchild.add(mesh)
+    rev = root.structure_rev
+    mesh.material = gfx.MeshNormalMaterial()
+    assert root.structure_rev > rev
+
+    rev = root.structure_rev
+    child.remove(grandchild)
+    assert root.structure_rev > rev
+
+    # Transforms do not affect the structure
+    rev = root.structure_rev
+    child.position.set(1, 2, 3)
+    root.update_matrix_world()
+    assert root.structure_rev == rev
+
+
 def test_update_matrix():
     root = WorldObject()
     root.position.set(3, 6, 8)
@@ -107,3 +145,109 @@ def test_update_matrix_world():
     assert not child1.matrix_world_dirty
     # child2 should be flagged as dirty again now
     assert child2.matrix_world_dirty
+
+
+def test_update_matrix_world_pruning():
+    root = WorldObject()
+    branches = []
+    for i in range(3):
+        branch = WorldObject()
+        root.add(branch)
+        for j in range(3):
+            branch.add(WorldObject())
+        branches.append(branch)
+    root.update_matrix_world()
+
+    visited = []
+    for branch in branches:
+        for obj in (branch,) + branch.children:
+            obj.update_matrix = (lambda o: lambda: visited.append(o))(obj)
+
+    # Nothing changed, so the children are not visited
+    root.update_matrix_world()
+    assert visited == []
+
+    # Changing an object flags the path to the root
+    leaf = branches[1].children[2]
+    leaf.position.x = 1
+    root.update_matrix_world()
+    assert visited == [branches[1], leaf]
+    visited.clear()
+
+    # Changing a world transform updates the whole subtree
+    branches[2].matrix_world_dirty = True
+    root.update_matrix_world()
+    assert visited == [branches[2]] + list(branches[2].children)
+    visited.clear()
+
+    # Unless forced
+    root.update_matrix_world()
+    assert visited == []
+    root.update_matrix_world(force=True)
+    assert len(visited) == 12
+
+
+def test_update_matrix_world_pruning_transforms():
+    root = WorldObject()
+    child = WorldObject()
+    grandchild = WorldObject()
+    root.add(child)
+    child.add(grandchild)
+    root.update_matrix_world()
+
+    child.position.set(1, 2, 3)
+    root.update_matrix_world()
+    assert grandchild.matrix_world.elements[12:15] == [1, 2, 3]
+
+    # Re-parenting
+    child.remove(grandchild)
+    root.add(grandchild)
+    root.update_matrix_world()
+    assert grandchild.matrix_world.elements[12:15] == [0, 0, 0]
+
+
+def test_transform_tracking():
+    obj = WorldObject()
+    obj.update_matrix_world()
+    assert not obj._transform_changed
+
+    # Reading does not mark the object
+    assert obj.position.x == 0
+    assert not obj._transform_changed and not obj._subtree_dirty
+
+    # But setting does, as does setting through any method
+    obj.rotation.set_from_euler(Euler(0, pi / 2, 0))
+    assert obj._transform_changed and obj._subtree_dirty
+    obj.update_matrix_world()
+    obj.scale.multiply_scalar(2)
+    assert obj._transform_changed
+    obj.update_matrix_world()
+
+    # Assigning copies the values
+    pos = Vector3(1, 2, 3)
+    obj.position = pos
+    assert obj.position == pos and obj.position is not pos
+    obj.update_matrix_world()
+    assert obj.matrix_world.elements[12:15] == [1, 2, 3]
+
+
+def test_world_bounds():
+    positions = np.array([[-1, -1, -1], [1, 1, 1]], np.float32)
+    obj = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+    obj.position.set(10, 0, 0)
+    obj.scale.set(2, 2, 2)
+    obj.update_matrix_world()
+
+    bbox = obj.get_world_bounding_box()
+    assert np.allclose(bbox, [[8, -2, -2], [12, 2, 2]])
+    assert obj.get_world_bounding_box() is bbox  # cached
+    center, radius = obj.get_world_bounding_sphere()
+    assert np.allclose(center, [10, 0, 0])
+    assert np.isclose(radius, 2 * 3 ** 0.5)
+
+    # Recalculated when the matrix changes
+    obj.position.set(0, 0, 0)
+    obj.update_matrix_world()
+    assert np.allclose(obj.get_world_bounding_box(), [[-2] * 3, [2] * 3])
+
+    assert WorldObject().get_world_bounding_box() is None
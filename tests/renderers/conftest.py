@@ -0,0 +1,22 @@
+from unittest.mock import Mock
+
+from pytest import fixture
+
+from pygfx.renderers.wgpu import WgpuRenderer
+
+
+@fixture
+def fake_renderer():
+    """Get a function to create a WgpuRenderer without a device. The
+    renderer has the real methods, and only the given attributes, e.g.
+    the state used by the method under test, or fakes and mocks of the
+    GPU objects and methods that it uses. The device is a Mock by default.
+    """
+
+    def create_fake_renderer(**attributes):
+        renderer = WgpuRenderer.__new__(WgpuRenderer)
+        renderer._device = Mock()
+        renderer.__dict__.update(attributes)
+        return renderer
+
+    return create_fake_renderer
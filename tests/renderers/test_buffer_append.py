@@ -0,0 +1,84 @@
+from unittest.mock import Mock
+
+import numpy as np
+from pytest import fixture
+
+import pygfx as gfx
+
+
+def create_pipeline_objects(wobject):
+    pinfos = [
+        {"get_indices": info["indices"], "index_buffer": None, "info": info}
+        for info in wobject._wgpu_pipeline_infos
+    ]
+    return {"render_pipelines": pinfos, "dynamic_render_pipelines": pinfos}
+
+
+@fixture
+def renderer(fake_renderer):
+    """A renderer that keeps track of the (fake) pipeline objects that
+    it creates.
+    """
+    return fake_renderer(
+        _wgpu_stdinfo_buffer=gfx.Buffer(np.zeros((4,), np.float32), usage="uniform"),
+        _update_buffer=Mock(),
+        _create_pipeline_objects=Mock(side_effect=create_pipeline_objects),
+    )
+
+
+def test_append_keeps_pipeline_objects(renderer):
+    positions = gfx.Buffer(
+        np.zeros((10, 3), np.float32), usage="vertex|storage", ring=True, nitems=0
+    )
+    geometry = gfx.Geometry()
+    geometry.positions = positions
+    line = gfx.Line(geometry, gfx.LineMaterial())
+
+    renderer._ensure_up_to_date(line)
+    pipeline_objects = line._wgpu_pipeline_objects
+    pinfo = pipeline_objects["render_pipelines"][0]
+    uniform_buffer = pinfo["info"]["bindings0"][3][1]
+    assert pinfo["index_args"][0] == 0
+
+    # Appending (and wrapping around) updates the uniform and the
+    # number of vertices, but keeps the pipeline objects.
+    for i in range(3):
+        positions.append(np.ones((4, 3), np.float32))
+        renderer._ensure_up_to_date(line)
+    assert line._wgpu_pipeline_objects is pipeline_objects
+    assert renderer._create_pipeline_objects.call_count == 1
+    assert pinfo["info"]["bindings0"][3][1] is uniform_buffer
+    assert uniform_buffer.data["ring_start"] == 2
+    assert uniform_buffer.data["last_i"] == 9
+    assert pinfo["index_args"][0] == 10 * 5
+
+    # Once the ring buffer is full and did not wrap, the uniform is not uploaded
+    rev = uniform_buffer.rev
+    positions.append(np.ones((10, 3), np.float32))
+    renderer._ensure_up_to_date(line)
+    assert uniform_buffer.rev == rev
+
+
+def test_append_growable(renderer):
+    positions = gfx.Buffer(np.zeros((2, 3), np.float32), usage="vertex", growable=True)
+    geometry = gfx.Geometry()
+    geometry.positions = positions
+    points = gfx.Points(geometry, gfx.PointsMaterial())
+
+    renderer._ensure_up_to_date(points)
+    pinfo = points._wgpu_pipeline_objects["render_pipelines"][0]
+    assert pinfo["index_args"][0] == 2
+
+    # When the capacity grows, the GPU buffer is replaced
+    positions.append(np.ones((1, 3), np.float32))
+    renderer._ensure_up_to_date(points)
+    assert positions.capacity == 4
+    assert renderer._create_pipeline_objects.call_count == 2
+    pinfo = points._wgpu_pipeline_objects["render_pipelines"][0]
+    assert pinfo["index_args"][0] == 3
+
+    # Appending within the capacity keeps the pipeline objects
+    positions.append(np.ones((1, 3), np.float32))
+    renderer._ensure_up_to_date(points)
+    assert renderer._create_pipeline_objects.call_count == 2
+    assert pinfo["index_args"][0] == 4
@@ -0,0 +1,39 @@
+import random
+
+import pygfx as gfx
+from pygfx.linalg import Matrix4, Vector3
+from pygfx.renderers._base import depth_sort
+
+
+def test_depth_sort():
+    random.seed(0)
+    camera = gfx.PerspectiveCamera(70, 1)
+    camera.position.set(1, 2, 30)
+    camera.update_matrix_world()
+    camera.update_projection_matrix()
+    matrix = Matrix4().multiply_matrices(
+        camera.projection_matrix, camera.matrix_world_inverse
+    )
+
+    scene = gfx.Scene()
+    wobjects = []
+    for i in range(50):
+        wobject = gfx.Mesh(gfx.BoxGeometry(1, 1, 1), gfx.MeshBasicMaterial())
+        wobject.position.set(*(random.uniform(-10, 10) for _ in range(3)))
+        wobject.render_order = random.choice([0, 0, 1, -1])
+        scene.add(wobject)
+        wobjects.append(wobject)
+    scene.update_matrix_world()
+
+    # Compare with the sort in pure Python (back-to-front is descending z)
+    def sort_func(wobject):
+        z = (
+            Vector3()
+            .set_from_matrix_position(wobject.matrix_world)
+            .apply_matrix4(matrix)
+            .z
+        )
+        return wobject.render_order, -z
+
+    assert depth_sort(wobjects, matrix) == sorted(wobjects, key=sort_func)
+    assert depth_sort([], matrix) == []
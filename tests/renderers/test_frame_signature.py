@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import numpy as np
+from pytest import fixture
+
+import pygfx as gfx
+
+
+@fixture
+def get_signature(fake_renderer):
+    # The signature does not need a device, so use a fake renderer
+    renderer = fake_renderer(_postfx=[])
+
+    def get_signature(scene, camera, size=(640, 480)):
+        camera.update_matrix_world()
+        scene.update_matrix_world()
+        return renderer._get_frame_signature(scene, camera, size)
+
+    return get_signature
+
+
+def test_frame_signature(get_signature):
+    scene = gfx.Scene()
+    geometry = gfx.Geometry(positions=np.zeros((10, 3), np.float32))
+    points = gfx.Points(geometry, gfx.PointsMaterial())
+    scene.add(points)
+    camera = gfx.OrthographicCamera(100, 100)
+
+    sig1 = get_signature(scene, camera)
+    assert get_signature(scene, camera) == sig1
+
+    # Transforms
+    points.position.x = 10
+    sig2 = get_signature(scene, camera)
+    assert sig2 != sig1
+    assert get_signature(scene, camera) == sig2
+
+    # Camera and size
+    camera.position.z = 10
+    sig3 = get_signature(scene, camera)
+    assert sig3 != sig2
+    assert get_signature(scene, camera, (640, 481)) != sig3
+
+    # Visibility and structure
+    points.visible = False
+    sig4 = get_signature(scene, camera)
+    assert sig4 != sig3
+    scene.add(gfx.Group())
+    assert get_signature(scene, camera) != sig4
+
+    # Resources, and the objects that use them
+    sig5 = get_signature(scene, camera)
+    geometry.positions.update_range(0, 1)
+    sig6 = get_signature(scene, camera)
+    assert sig6 != sig5
+    line = gfx.Line(geometry, gfx.LineMaterial())
+    scene.add(line)
+    sig7 = get_signature(scene, camera)
+    line.material.set_color((1, 0, 0, 1))
+    assert get_signature(scene, camera) != sig7
+    sig7 = get_signature(scene, camera)
+    points.render_order = 1
+    assert get_signature(scene, camera) != sig7
+
+
+def test_frame_signature_is_cheap(get_signature):
+    # The signature does not depend on the number of objects
+    scene = gfx.Scene()
+    for i in range(100):
+        scene.add(
+            gfx.Points(gfx.Geometry(positions=np.zeros((1, 3), np.float32)), None)
+        )
+    camera = gfx.OrthographicCamera(100, 100)
+    sig = get_signature(scene, camera)
+    assert len(sig) == 7
+    assert get_signature(scene, camera) == sig
+
+
+def test_frame_signature_reset_by_settings(fake_renderer):
+    # Changing a setting makes sure that the next frame is rendered
+    renderer = fake_renderer(_upload_scheduler=SimpleNamespace(budget=None))
+    settings = [
+        ("frustum_culling", False),
+        ("upload_budget", 2 ** 20),
+        ("draw_partially_uploaded", False),
+        ("render_pick_target", False),
+    ]
+    for name, value in settings:
+        renderer._frame_signature = ("a signature",)
+        setattr(renderer, name, value)
+        assert renderer._frame_signature is None, name
@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+import numpy as np
+
+import pygfx as gfx
+from pygfx.renderers.wgpu._cache import GpuObjectCache, make_hashable
+
+
+def test_gpu_object_cache():
+    cache = GpuObjectCache()
+    created = []
+
+    def create():
+        created.append(object())
+        return created[-1]
+
+    ob1 = cache.get(("render", "x"), create)
+    ob2 = cache.get(("render", "x"), create)
+    ob3 = cache.get(("render", "y"), create)
+
+    assert ob1 is ob2
+    assert ob1 is not ob3
+    assert len(created) == 2
+    assert len(cache) == 2
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get(("render", "x"), create) is not ob1
+    assert cache.misses == 3
+
+
+def test_make_hashable():
+    des1 = [{"binding": 0, "buffer": {"type": "uniform", "size": 0}}]
+    des2 = [{"buffer": {"size": 0, "type": "uniform"}, "binding": 0}]
+    des3 = [{"binding": 1, "buffer": {"type": "uniform", "size": 0}}]
+
+    key1, key2, key3 = make_hashable(des1), make_hashable(des2), make_hashable(des3)
+    assert hash(key1) == hash(key2)
+    assert key1 == key2
+    assert key1 != key3
+
+
+def test_layout_cache(fake_renderer):
+    # Bind groups need no real GPU objects, so use a fake renderer and device
+    renderer = fake_renderer(_layout_cache=GpuObjectCache())
+    device = renderer._device
+
+    def get_bind_groups(buffer_type):
+        buffer = gfx.Buffer(np.zeros((4,), np.float32), usage="uniform")
+        buffer._wgpu_buffer = 1, Mock(size=16)
+        info = {"bindings0": {0: (buffer_type, buffer)}}
+        return renderer._get_bind_groups(info)
+
+    # Objects with the same binding schema share the layouts
+    bind_groups1, pipeline_layout1, key1 = get_bind_groups("buffer/uniform")
+    bind_groups2, pipeline_layout2, key2 = get_bind_groups("buffer/uniform")
+    assert key1 == key2
+    assert pipeline_layout1 is pipeline_layout2
+    assert device.create_bind_group_layout.call_count == 1
+    assert device.create_pipeline_layout.call_count == 1
+    # But each object has its own bind group
+    assert device.create_bind_group.call_count == 2
+
+    # Another schema gets other layouts
+    bind_groups3, pipeline_layout3, key3 = get_bind_groups("buffer/read_only_storage")
+    assert key3 != key1
+    assert device.create_bind_group_layout.call_count == 2
+    assert device.create_pipeline_layout.call_count == 2
+    assert renderer._layout_cache.hits == 2
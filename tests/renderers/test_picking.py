@@ -0,0 +1,243 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import numpy as np
+
+import pygfx as gfx
+from pygfx.linalg import Matrix4
+from pygfx.resources import Resource
+from pygfx.renderers.wgpu._picking import (
+    get_pixel_rect,
+    RegionReadbackLayout,
+    decode_pick_values,
+    decode_pixel_info,
+    PickReadbackQueue,
+)
+
+
+def test_get_pixel_rect():
+    assert get_pixel_rect((0.1, 0.2), (0.5, 0.6), (100, 50)) == (10, 10, 40, 20)
+    assert get_pixel_rect((0.5, 0.6), (0.1, 0.2), (100, 50)) == (10, 10, 40, 20)
+    # At least one pixel, and clipped to the texture
+    assert get_pixel_rect((0.5, 0.5), (0.5, 0.5), (100, 50)) == (50, 25, 1, 1)
+    assert get_pixel_rect((-1, -1), (2, 2), (100, 50)) == (0, 0, 100, 50)
+
+
+def test_region_readback_layout():
+    layout = RegionReadbackLayout((0, 0, 3, 2), [4, 16])
+    assert layout.sections == [(0, 256, 4), (512, 256, 16)]
+    assert layout.nbytes == 1024
+
+    data = np.zeros(layout.nbytes, np.uint8)
+    depth = np.arange(6, dtype=np.float32).reshape(2, 3)
+    picks = np.arange(24, dtype=np.int32).reshape(2, 3, 4)
+    for y in range(2):
+        data[y * 256 : y * 256 + 12] = depth[y].view(np.uint8)
+        data[512 + y * 256 : 512 + y * 256 + 48] = picks[y].view(np.uint8).ravel()
+    assert (layout.unpack(data, 0, np.float32, 1)[:, :, 0] == depth).all()
+    assert (layout.unpack(data, 1, np.int32, 4) == picks).all()
+
+
+def test_decode_pick_values():
+    points = gfx.Points(gfx.Geometry(), gfx.PointsMaterial())
+    mesh = gfx.Mesh(gfx.Geometry(), gfx.MeshBasicMaterial())
+    pick_map = {points.id: points, mesh.id: mesh}
+
+    pick_values = np.zeros((2, 3, 4), np.int32)
+    pick_values[0, :2] = points.id, 0, 7, 0
+    pick_values[0, 1, 2] = 8
+    pick_values[1, 2] = mesh.id, 0, 5, 255 * 65536 + 255
+    wobjects, infos = decode_pick_values(pick_values, pick_map)
+
+    assert set(wobjects) == {points, mesh}
+    info = infos[points]
+    assert info["mask"].tolist() == [[True, True, False], [False, False, False]]
+    assert info["vertex_index"].tolist() == [7, 8]
+    info = infos[mesh]
+    assert info["face_index"].tolist() == [5]
+    assert [c.tolist() for c in info["face_coords"]] == [[1], [0], [1]]
+
+
+class FakeBuffer:
+    def __init__(self, size, usage):
+        self.size = size
+        self.data = bytearray(size)
+
+    def map_read(self):
+        return memoryview(bytes(self.data))
+
+
+def create_device():
+    device = Mock()
+    device.create_buffer.side_effect = lambda size, usage: FakeBuffer(size, usage)
+    return device
+
+
+def test_pick_readback_queue():
+    points = gfx.Points(gfx.Geometry(), gfx.PointsMaterial())
+    pick_map = {points.id: points}
+    device = create_device()
+    queue = PickReadbackQueue(device, pool_size=2)
+    queue.pixels_per_buffer = 2
+    copies = []
+
+    def copy_pixel(encoder, buffer, float_pos, offset):
+        copies.append(float_pos)
+        # Write a pick value for the object, with the x position as vertex
+        pick_value = np.array([points.id, 0, int(float_pos[0] * 10), 0], np.int32)
+        buffer.data[offset + 16 : offset + 32] = pick_value.tobytes()
+
+    def decode(data, float_pos):
+        return decode_pixel_info(data, float_pos, False, pick_map)
+
+    # Requests for the same pixel are combined, older hover requests dropped
+    f1 = queue.request((0.1, 0.1))
+    f2 = queue.request((0.101, 0.1))
+    f3 = queue.request((0.2, 0.1), "hover")
+    f4 = queue.request((0.3, 0.1), "hover")
+    assert f3.cancelled()
+    assert len(queue) == 3
+
+    # Copies are made after a frame, and read a frame later
+    assert len(queue.schedule((100, 100), copy_pixel)) == 1
+    assert copies == [(0.1, 0.1), (0.3, 0.1)]
+    assert not f1.done()
+    queue.resolve(decode)
+    assert f1.result()["world_object"] is points
+    assert f1.result()["vertex_index"] == 1
+    assert f2.result()["ndc"][0] == 2 * 0.101 - 1
+    assert f4.result()["vertex_index"] == 3
+    assert len(queue) == 0
+
+    # The pool is limited, requests that do not fit wait for the next frame
+    futures = [queue.request((i / 10, 0.5)) for i in range(6)]
+    assert len(queue.schedule((100, 100), copy_pixel)) == 2
+    assert device.create_buffer.call_count == 2
+    queue.resolve(decode)
+    assert [f.done() for f in futures] == [True] * 4 + [False] * 2
+    queue.schedule((100, 100), copy_pixel)
+    queue.resolve(decode)
+    assert all(f.done() for f in futures)
+    assert device.create_buffer.call_count == 2
+
+
+def test_pick_requests_resolved_before_next_frame(fake_renderer):
+    # The readback happens at the start of the next frame (before that
+    # frame is submitted), and does not need the pick textures.
+    points = gfx.Points(gfx.Geometry(), gfx.PointsMaterial())
+    texture = SimpleNamespace(texture=None, size=(100, 100, 1))
+    renderer = fake_renderer(
+        _device=create_device(),
+        _canvas=None,
+        _pick_map={points.id: points},
+        _pick_readback_can_sample_color=False,
+        _get_pick_textures=Mock(return_value=(texture, texture, texture)),
+        _copy_pixel=Mock(),
+    )
+    renderer._pick_readback_queue = PickReadbackQueue(renderer._device)
+    resolve = renderer._resolve_pick_requests
+    schedule = renderer._schedule_pick_requests
+
+    future = renderer._pick_readback_queue.request((0.5, 0.5))
+    resolve()
+    assert not future.done()
+    schedule()
+    assert renderer._device.queue.submit.call_count == 1
+    assert renderer._copy_pixel.call_count == 2  # no color
+    resolve()
+    assert future.result()["world_object"] is None
+    assert renderer._get_pick_textures.call_count == 1
+
+
+def test_pick_pass_on_demand(fake_renderer):
+    pick = SimpleNamespace(texture="pick")
+    renderer = fake_renderer(
+        _render_pick_target=True,
+        _depth_texture="depth",
+        _render_textures=["color"],
+        _pick_texture=pick,
+        _pick_depth_texture="pick_depth",
+        _pick_color_texture="pick_color",
+        _frames_rendered=1,
+        _pick_pass_frame=-1,
+        _pick_pass_state=("render list", "camera", (100, 100)),
+        _render_pick_pass=Mock(),
+    )
+
+    def render_pick_pass():
+        renderer._pick_pass_frame = renderer._frames_rendered
+        renderer._pick_pass_state = None
+
+    renderer._render_pick_pass.side_effect = render_pick_pass
+    get_pick_textures = renderer._get_pick_textures
+
+    # By default, the pick texture is rendered along with each frame
+    assert get_pick_textures() == ("depth", "color", pick)
+    assert renderer._render_pick_pass.call_count == 0
+
+    # Otherwise, the pick pass is done once per rendered frame
+    renderer._render_pick_target = False
+    assert get_pick_textures() == ("pick_depth", "pick_color", pick)
+    get_pick_textures()
+    assert renderer._render_pick_pass.call_count == 1
+    renderer._frames_rendered += 1
+    renderer._pick_pass_state = ("render list", "camera", (100, 100))
+    get_pick_textures()
+    assert renderer._render_pick_pass.call_count == 2
+
+
+def test_pick_pass_keeps_frame_signature(fake_renderer):
+    # The pick pass writes the stdinfo buffer, but that must not make the
+    # next frame look changed. It also drops the objects of the frame.
+    texture = Mock()
+    renderer = fake_renderer(
+        _frames_rendered=1,
+        _pick_pass_frame=-1,
+        _pick_passes=0,
+        _pick_pass_state=(
+            ([], []),
+            SimpleNamespace(
+                matrix_world_inverse=Matrix4(), projection_matrix=Matrix4()
+            ),
+            (100, 50),
+        ),
+        _pick_color_texture=texture,
+        _pick_depth_texture=texture,
+        _pick_texture=texture,
+        _update_buffer=Mock(),
+        _finish_uploads=Mock(return_value=[]),
+        _render_recording=Mock(),
+        _submit=Mock(),
+    )
+
+    global_rev = Resource._global_rev
+    renderer._render_pick_pass()
+    assert Resource._global_rev == global_rev
+    assert renderer._update_buffer.call_count == 1
+    assert renderer._wgpu_stdinfo_buffer._pending_uploads == [(0, 1)]
+    assert renderer._wgpu_stdinfo_buffer.data["physical_size"].tolist() == [100, 50]
+    assert renderer._submit.call_count == 1
+    assert renderer._pick_pass_state is None
+    assert renderer._pick_pass_frame == 1
+
+
+def test_pick_before_first_render(fake_renderer):
+    renderer = fake_renderer(
+        _render_pick_target=True,
+        _pick_texture=SimpleNamespace(texture=None, size=(0, 0, 0)),
+        _pick_pass_state=None,
+        _pick_pass_frame=-1,
+        _logical_size=(100, 50),
+        _render_pick_pass=Mock(),
+    )
+
+    for render_pick_target in (True, False):
+        renderer._render_pick_target = render_pick_target
+        info = renderer.get_pick_info((50, 25))
+        assert info["world_object"] is None
+        assert info["ndc"] == (0, 0, 1)
+        assert info["rgba"] == (0, 0, 0, 0)
+        info = renderer.get_pick_info_region((0, 0), (10, 10))
+        assert info["world_objects"] == []
+        assert info["pick_values"].shape == (0, 0, 4)
+    assert renderer._render_pick_pass.call_count == 0
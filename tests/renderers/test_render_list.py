@@ -0,0 +1,42 @@
+import pygfx as gfx
+
+
+def test_render_list_cache(fake_renderer):
+    renderer = fake_renderer(
+        _renderables_cache=(None, None, None),
+        _frustum_culling=False,
+    )
+    get_render_list = renderer.get_render_list
+
+    camera = gfx.OrthographicCamera(100, 100)
+    camera.position.z = 50
+    scene = gfx.Scene()
+    group = gfx.Group()
+    scene.add(group)
+    meshes = []
+    for i in range(3):
+        mesh = gfx.Mesh(gfx.BoxGeometry(1, 1, 1), gfx.MeshBasicMaterial())
+        mesh.position.z = i
+        group.add(mesh)
+        meshes.append(mesh)
+    scene.update_matrix_world()
+    camera.update_matrix_world()
+    camera.update_projection_matrix()
+
+    assert get_render_list(scene, camera) == meshes
+    renderables = renderer._renderables_cache[2]
+
+    # Moving objects only affects the sort
+    meshes[0].position.z = 10
+    scene.update_matrix_world()
+    assert get_render_list(scene, camera) == meshes[1:] + meshes[:1]
+    assert renderer._renderables_cache[2] is renderables
+
+    # Changing the structure re-collects the objects
+    meshes[1].visible = False
+    assert get_render_list(scene, camera) == [meshes[2], meshes[0]]
+    assert renderer._renderables_cache[2] is not renderables
+
+    # As does rendering another scene
+    assert get_render_list(group, camera) == [meshes[2], meshes[0]]
+    assert renderer._renderables_cache[0]() is group
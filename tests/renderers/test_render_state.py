@@ -0,0 +1,130 @@
+from unittest.mock import Mock
+
+import numpy as np
+import wgpu
+
+import pygfx as gfx
+from pygfx.renderers.wgpu._cache import GpuObjectCache
+from pygfx.renderers.wgpu._renderstate import (
+    RenderPassState,
+    is_transparent,
+    split_render_list,
+    sort_by_state,
+    sort_by_depth,
+    sort_render_list,
+)
+from pygfx.renderers.wgpu._overdraw import (
+    OVERDRAW_FORMAT,
+    overdraw_fragment_shader,
+    summarize_overdraw,
+)
+from pygfx.renderers.wgpu.postprocessing import RenderTexture
+
+
+def test_render_pass_state():
+    render_pass = Mock()
+    state = RenderPassState(render_pass)
+    pipeline1, pipeline2 = object(), object()
+    buffer1, buffer2 = object(), object()
+    group1, group2 = object(), object()
+
+    # Draw three objects, the first two share everything but a bind group
+    for pipeline, buffer, group in [
+        (pipeline1, buffer1, group1),
+        (pipeline1, buffer1, group2),
+        (pipeline2, buffer2, group2),
+    ]:
+        state.set_pipeline(pipeline)
+        state.set_vertex_buffer(0, buffer, 0, 64)
+        state.set_bind_group(0, group)
+        state.set_index_buffer(buffer, 0, 12)
+        state.draw_indexed(3, 1, 0, 0, 0)
+
+    assert render_pass.set_pipeline.call_count == 2
+    assert render_pass.set_vertex_buffer.call_count == 2
+    assert render_pass.set_bind_group.call_count == 2
+    assert render_pass.set_index_buffer.call_count == 2
+    assert render_pass.draw_indexed.call_count == 3
+    assert state.changes == 8
+    assert state.skipped == 4
+
+    # A different range of the same buffer is a change
+    state.set_vertex_buffer(0, buffer2, 64, 64)
+    assert render_pass.set_vertex_buffer.call_count == 3
+
+
+def test_sort_render_list():
+    def create(color, render_order=0):
+        material = gfx.MeshBasicMaterial(color=color)
+        wobject = gfx.Mesh(gfx.BoxGeometry(1, 1, 1), material)
+        wobject.render_order = render_order
+        return wobject
+
+    red = (1, 0, 0, 1)
+    glass = (1, 1, 1, 0.5)
+    assert not is_transparent(create(red))
+    assert is_transparent(create(glass))
+
+    # Back to front
+    q = [create(red), create(glass), create(red), create(glass), create(red)]
+    q.append(create(red, -1))
+    q[4].material = q[0].material
+    pipelines = {q[0]: "a", q[1]: "a", q[2]: "b", q[3]: "b", q[4]: "a", q[5]: "a"}
+
+    # Transparent objects keep the back-to-front order
+    opaque, transparent = split_render_list(q)
+    assert opaque == [q[0], q[2], q[4], q[5]]
+    assert transparent == [q[1], q[3]]
+
+    # The render_order goes first, then opaque objects are grouped by
+    # pipeline and material, front-to-back within a group.
+    sorted_q = sort_render_list(opaque, sort_by_state, pipelines.get)
+    assert sorted_q[0] is q[5]
+    assert sorted_q[1:] in ([q[4], q[0], q[2]], [q[2], q[4], q[0]])
+
+    # Or all front-to-back
+    sorted_q = sort_render_list(opaque, sort_by_depth, pipelines.get)
+    assert sorted_q == [q[5], q[4], q[2], q[0]]
+
+
+def test_summarize_overdraw():
+    counts = np.zeros((4, 5), np.float16)
+    counts[1:3, 1:4] = 2
+    counts[0, 0] = 1
+    assert summarize_overdraw(counts) == (13, 7)
+
+
+def test_overdraw_pipeline_of_points(fake_renderer):
+    renderer = fake_renderer(
+        _layout_cache=GpuObjectCache(),
+        _pipeline_cache=GpuObjectCache(),
+        _render_textures=[RenderTexture(wgpu.TextureFormat.rgba8unorm)],
+        _pick_texture=RenderTexture(wgpu.TextureFormat.rgba32sint),
+        _depth_texture=RenderTexture(wgpu.TextureFormat.depth32float),
+        _overdraw_texture=RenderTexture(OVERDRAW_FORMAT),
+        _msaa=1,
+        _wgpu_stdinfo_buffer=gfx.Buffer(np.zeros((4,), np.float32), usage="uniform"),
+    )
+
+    positions = np.zeros((10, 3), np.float32)
+    points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+    pipeline_info = renderer._create_pipeline_infos(points)[0]
+    for key, bindings in pipeline_info.items():
+        if key.startswith("bindings"):
+            for _, buffer in bindings.values():
+                buffer._wgpu_buffer = 1, Mock(size=16)
+
+    # The points discard the fragments outside of a circle. The overdraw
+    # shader replaces the fragment shader, and thus counts the full quads.
+    pinfo = renderer._compose_render_pipeline(points, pipeline_info)
+    device = renderer._device
+    pinfo["get_pipeline"](False)
+    assert device.create_shader_module.call_args[1]["code"] is (
+        pipeline_info["fragment_shader"]
+    )
+    pinfo["get_pipeline"](False, False, True)
+    assert device.create_shader_module.call_args[1]["code"] is (
+        overdraw_fragment_shader
+    )
+    fragment = device.create_render_pipeline.call_args[1]["fragment"]
+    assert [target["format"] for target in fragment["targets"]] == [OVERDRAW_FORMAT]
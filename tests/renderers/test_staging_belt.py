@@ -0,0 +1,185 @@
+from unittest.mock import Mock
+
+import numpy as np
+from pytest import fixture, raises
+
+from pygfx.renderers.wgpu import _staging
+from pygfx.renderers.wgpu._staging import StagingBelt
+
+
+class FakeBuffer:
+    def __init__(self, size):
+        self.size = size
+        self.memory = bytearray(size)
+        self.mapped = True
+        self.destroyed = False
+
+    def destroy(self):
+        self.destroyed = True
+
+
+class FakeGPU:
+    """Replaces the native mapping functions of the staging module.
+    Map requests are completed on a poll, once the GPU is idle.
+    """
+
+    def __init__(self):
+        self.buffers = []
+        self.map_requests = []
+        self.busy = False
+
+    def create_mapped_buffer(self, device, size):
+        buffer = FakeBuffer(size)
+        self.buffers.append(buffer)
+        return buffer, self.get_mapped_memory(buffer)
+
+    def get_mapped_memory(self, buffer):
+        assert buffer.mapped
+        return memoryview(buffer.memory)
+
+    def unmap_buffer(self, buffer):
+        assert buffer.mapped
+        buffer.mapped = False
+
+    def map_buffer_async(self, buffer, callback):
+        self.map_requests.append((buffer, callback))
+        return callback
+
+    def poll_device(self, device):
+        if not self.busy:
+            for buffer, callback in self.map_requests:
+                buffer.mapped = True
+                callback(True)
+            self.map_requests = []
+
+
+@fixture
+def gpu(monkeypatch):
+    gpu = FakeGPU()
+    for name in [
+        "create_mapped_buffer",
+        "get_mapped_memory",
+        "unmap_buffer",
+        "map_buffer_async",
+        "poll_device",
+    ]:
+        monkeypatch.setattr(_staging, name, getattr(gpu, name))
+    return gpu
+
+
+def test_staging_belt_suballocation(gpu):
+    belt = StagingBelt(Mock(), chunk_size=64)
+    encoder = Mock()
+    dst = object()
+
+    belt.write(dst, 0, np.arange(3, dtype=np.uint8))
+    belt.write(dst, 100, np.arange(8, dtype=np.uint8))
+    assert encoder.copy_buffer_to_buffer.call_count == 0
+    belt.finish(encoder)
+
+    # Both uploads are written in one mapped chunk, aligned to 4 bytes
+    assert len(gpu.buffers) == 1
+    staging_buffer = gpu.buffers[0]
+    calls = encoder.copy_buffer_to_buffer.call_args_list
+    assert calls[0][0] == (staging_buffer, 0, dst, 0, 3)
+    assert calls[1][0] == (staging_buffer, 4, dst, 100, 8)
+    assert staging_buffer.memory[:3] == bytes([0, 1, 2])
+    assert staging_buffer.memory[4:12] == bytes(range(8))
+
+    # The chunk is unmapped so the GPU can copy from it
+    assert not staging_buffer.mapped
+
+    stats = belt.stats
+    assert stats["chunks"] == 1
+    assert stats["nbytes"] == 64
+    assert stats["bytes_uploaded"] == 12
+    assert stats["utilization"] == 12 / 64
+
+    # After the submit, the chunk is mapped again, and not released
+    belt.recall()
+    assert len(gpu.map_requests) == 1
+    assert not staging_buffer.destroyed
+
+
+def test_staging_belt_recycling(gpu):
+    belt = StagingBelt(Mock(), chunk_size=64)
+    encoder = Mock()
+
+    # An upload larger than the chunk size gets a chunk of its own
+    belt.write(object(), 0, np.zeros(100, np.uint8))
+    belt.write(object(), 0, np.zeros(40, np.uint8))
+    assert sorted(c.size for c in belt._active_chunks) == [64, 128]
+    belt.finish(encoder)
+    belt.recall()
+    assert len(gpu.buffers) == 2
+    assert belt.stats["bytes_uploaded"] == 140
+
+    # Once the GPU is done with them, the same buffers are re-used
+    belt.write(object(), 0, np.arange(10, dtype=np.uint8))
+    chunk = belt._active_chunks[0]
+    assert chunk.buffer in gpu.buffers
+    assert chunk.buffer.memory[:10] == bytes(range(10))
+    belt.finish(encoder)
+    belt.recall()
+    assert len(gpu.buffers) == 2
+    assert belt.stats["bytes_uploaded"] == 12
+
+    # Chunks that were not used in the last frame are released
+    assert belt.stats["chunks"] == 1
+    assert [b.destroyed for b in gpu.buffers].count(True) == 1
+    assert not chunk.buffer.destroyed
+
+
+def test_staging_belt_gpu_busy(gpu):
+    belt = StagingBelt(Mock(), chunk_size=64)
+    encoder = Mock()
+
+    belt.write(object(), 0, np.zeros(10, np.uint8))
+    belt.finish(encoder)
+    belt.recall()
+
+    # While the GPU still uses the chunk, a new one is created (no waiting)
+    gpu.busy = True
+    belt.write(object(), 0, np.zeros(10, np.uint8))
+    assert len(gpu.buffers) == 2
+    belt.finish(encoder)
+    belt.recall()
+    assert belt.stats["chunks"] == 2
+
+    # When the GPU is done, the chunks are re-used
+    gpu.busy = False
+    belt.write(object(), 0, np.zeros(10, np.uint8))
+    belt.write(object(), 0, np.zeros(60, np.uint8))
+    assert len(gpu.buffers) == 2
+    belt.finish(encoder)
+
+
+def test_staging_belt_flush(gpu):
+    belt = StagingBelt(Mock(), chunk_size=64)
+    encoder = Mock()
+    dst = object()
+
+    # A flush records the copies so far, e.g. before copying dst
+    belt.write(dst, 0, np.zeros(8, np.uint8))
+    belt.flush(encoder)
+    assert encoder.copy_buffer_to_buffer.call_count == 1
+    encoder.copy_buffer_to_buffer(dst, 0, object(), 0, 8)
+
+    # The flushed chunk is unmapped, so new writes go to another chunk
+    belt.write(dst, 0, np.zeros(4, np.uint8))
+    belt.finish(encoder)
+    assert encoder.copy_buffer_to_buffer.call_count == 3
+    assert len(gpu.buffers) == 2
+    assert belt.stats["chunks"] == 2
+    assert belt.stats["bytes_uploaded"] == 12
+
+
+def test_staging_belt_chunk_size(gpu):
+    belt = StagingBelt(Mock())
+    assert belt.chunk_size == 2 ** 20
+    belt.chunk_size = 1024
+    assert belt.chunk_size == 1024
+    with raises(ValueError):
+        belt.chunk_size = 0
+    with raises(ValueError):
+        belt.chunk_size = 1023
@@ -0,0 +1,145 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import numpy as np
+from pytest import raises
+
+import pygfx as gfx
+from pygfx import Buffer, Texture
+from pygfx.renderers.wgpu._uploads import UploadScheduler, split_range, split_box
+
+
+def test_split_range():
+    assert split_range(0, 10, 4, None) == [(0, 10, 40)]
+    assert split_range(5, 10, 4, 16) == [(5, 4, 16), (9, 4, 16), (13, 2, 8)]
+    # At least one item per slice
+    assert split_range(0, 2, 4, 1) == [(0, 1, 4), (1, 1, 4)]
+
+
+def test_split_box():
+    assert split_box((0, 0, 0), (4, 4, 4), 1, None) == [((0, 0, 0), (4, 4, 4), 64)]
+    # Split along the depth
+    slices = split_box((0, 0, 0), (4, 4, 4), 1, 32)
+    assert slices == [((0, 0, 0), (4, 4, 2), 32), ((0, 0, 2), (4, 4, 2), 32)]
+    # Split along the rows
+    slices = split_box((0, 0, 1), (4, 4, 1), 1, 8)
+    assert slices == [((0, 0, 1), (4, 2, 1), 8), ((0, 2, 1), (4, 2, 1), 8)]
+
+
+def test_upload_scheduler_budget():
+    scheduler = UploadScheduler()
+    scheduler.budget = 400
+    with raises(ValueError):
+        scheduler.budget = 0
+
+    buffer1 = Buffer(np.zeros((100, 4), np.float32), usage="vertex")
+    buffer2 = Buffer(np.zeros((10, 4), np.float32), usage="vertex")
+    texture = Texture(np.zeros((10, 10), np.float32), dim=2)
+
+    scheduler.add_buffer_uploads(buffer1, [(0, 100)])
+    scheduler.add_buffer_uploads(buffer2, [(0, 10)])
+    scheduler.add_texture_uploads(texture, [((0, 0, 0), (10, 10, 1))], 4)
+    assert scheduler.stats["pending_bytes"] == 1600 + 160 + 400
+
+    # The resources that are used go first
+    scheduler.touch(texture)
+    scheduler.touch(buffer2)
+    writes = []
+    scheduler.flush(lambda *args: writes.append(args))
+    assert writes == [("texture", texture, (0, 0, 0), (10, 10, 1))]
+    assert not scheduler.is_resident(buffer2)
+
+    writes = []
+    scheduler.touch(buffer2)
+    scheduler.flush(lambda *args: writes.append(args))
+    assert writes == [("buffer", buffer2, 0, 10)]
+    assert scheduler.is_resident(texture)
+    assert scheduler.is_resident(buffer2)
+    assert scheduler.stats["bytes_uploaded"] == 160
+
+    # Slices are of at most the budget
+    writes = []
+    scheduler.flush(lambda *args: writes.append(args))
+    assert writes == [("buffer", buffer1, 0, 25)]
+
+    # Progress
+    assert scheduler.get_progress([buffer1]) == 0.25
+    assert scheduler.get_progress([buffer2]) == 1.0
+
+    # Without budget, everything is uploaded
+    scheduler.budget = None
+    writes = []
+    scheduler.flush(lambda *args: writes.append(args))
+    assert len(writes) == 3
+    assert scheduler.get_progress() == 1.0
+    assert scheduler.stats["pending_resources"] == 0
+
+
+def test_uploads_in_one_submit(fake_renderer):
+    # All uploads of a frame are recorded in one command buffer, which
+    # is submitted together with the render commands.
+    renderer = fake_renderer(
+        _render_textures=[],
+        _postfx=[],
+        _pick_map={},
+        _render_pick_target=True,
+        _overdraw_debug=False,
+        _sort_key=None,
+        _upload_scheduler=UploadScheduler(),
+        _draw_partially_uploaded=True,
+        _upload_encoder=None,
+        _staging_belt=Mock(),
+        _buffers_to_destroy=[],
+        _frame_submits=0,
+        _last_frame_submits=0,
+        _render_recording=Mock(),
+    )
+    device = renderer._device
+    device.create_command_encoder.side_effect = lambda: Mock()
+
+    # Objects of which the pipelines exist, with new (dirty) resources
+    q = []
+    for i in range(10):
+        resources = [
+            ("buffer", Buffer(np.zeros((4,), np.float32), usage="uniform")),
+            ("buffer", Buffer(np.zeros((100, 4), np.float32), usage="storage")),
+            ("texture", Texture(np.zeros((10, 10), np.float32), dim=2)),
+        ]
+        wobject = SimpleNamespace(
+            id=i + 1,
+            rev=0,
+            material=None,
+            _wgpu_pipeline_infos=[{}],
+            _wgpu_pipeline_updates=[],
+            _wgpu_pipeline_res=resources,
+            _wgpu_pipeline_objects={"dynamic_render_pipelines": []},
+        )
+        q.append(wobject)
+    renderer.get_render_list = Mock(return_value=q)
+
+    camera = gfx.OrthographicCamera(100, 100)
+    camera.update_matrix_world()
+    renderer._render_frame(gfx.Scene(), camera, (100, 100), (100, 100))
+
+    # Every resource got uploaded: the uniform buffers (and the stdinfo
+    # buffer) via the staging belt, the others via the upload scheduler.
+    assert renderer._staging_belt.write.call_count == 10 + 1 + 10
+    assert device.queue.write_texture.call_count == 10
+    assert device.queue.submit.call_count == 1
+    (command_buffers,), _ = device.queue.submit.call_args
+    assert len(command_buffers) == 2  # uploads + render
+    assert device.create_command_encoder.call_count == 2
+    assert renderer._last_frame_submits == 1
+
+    # Same for updates of the existing resources
+    for wobject in q:
+        for _, resource in wobject._wgpu_pipeline_res:
+            if isinstance(resource, Texture):
+                resource.update_range((0, 0, 0), (10, 10, 1))
+            else:
+                resource.update_range(0, 1)
+    renderer._render_frame(gfx.Scene(), camera, (100, 100), (100, 100))
+    assert renderer._staging_belt.write.call_count == 2 * 21
+    assert device.queue.write_texture.call_count == 2 * 10
+    assert device.queue.submit.call_count == 2
+    assert renderer._last_frame_submits == 1
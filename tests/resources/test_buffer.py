@@ -0,0 +1,164 @@
+import numpy as np
+from pytest import raises
+
+from pygfx import Buffer, Geometry
+
+
+def test_buffer_update_range_merging():
+    data = np.zeros((10000, 4), np.float32)  # 16 bytes per item
+    buffer = Buffer(data, usage="vertex")
+    buffer.upload_merge_gap = 160  # 10 items
+    buffer.upload_full_fraction = 1.0
+    assert buffer._pending_uploads == [(0, 10000)]
+    buffer._pending_uploads = []  # as if uploaded
+
+    # Sparse updates are kept apart
+    buffer.update_range(0, 1)
+    buffer.update_range(9999, 1)
+    buffer.update_range(5000, 10)
+    assert buffer._pending_uploads == [(0, 1), (5000, 10), (9999, 1)]
+
+    # Overlapping, adjacent and nearby ranges are merged
+    buffer.update_range(5005, 10)
+    assert buffer._pending_uploads == [(0, 1), (5000, 15), (9999, 1)]
+    buffer.update_range(5015, 5)
+    assert buffer._pending_uploads == [(0, 1), (5000, 20), (9999, 1)]
+    buffer.update_range(4985, 5)
+    assert buffer._pending_uploads == [(0, 1), (4985, 35), (9999, 1)]
+    buffer.update_range(10, 1)
+    assert buffer._pending_uploads == [(0, 11), (4985, 35), (9999, 1)]
+
+    # A range can bridge multiple ranges
+    buffer.update_range(11, 4980)
+    assert buffer._pending_uploads == [(0, 5020), (9999, 1)]
+
+    # Not merged when the gap is zero
+    buffer._pending_uploads = []
+    buffer.upload_merge_gap = 0
+    buffer.update_range(0, 1)
+    buffer.update_range(2, 1)
+    buffer.update_range(1, 1)
+    buffer.update_range(5, 1)
+    assert buffer._pending_uploads == [(0, 3), (5, 1)]
+
+
+def test_buffer_update_range_full():
+    buffer = Buffer(np.zeros((100, 4), np.float32), usage="vertex")
+    buffer.upload_merge_gap = 0
+    buffer.upload_full_fraction = 0.5
+    buffer._pending_uploads = []  # as if uploaded
+
+    buffer.update_range(0, 20)
+    buffer.update_range(40, 20)
+    assert buffer._pending_uploads == [(0, 20), (40, 20)]
+    rev = buffer.rev
+    buffer.update_range(80, 20)
+    assert buffer._pending_uploads == [(0, 100)]
+    assert buffer.rev == rev + 1
+
+    # Once consumed, the bookkeeping starts anew
+    buffer._pending_uploads = []
+    buffer.update_range(0, 20)
+    buffer.update_range(40, 20)
+    assert buffer._pending_uploads == [(0, 20), (40, 20)]
+
+
+def test_buffer_growable():
+    buffer = Buffer(np.zeros((0, 3), np.float32), usage="vertex", growable=True)
+    assert buffer.growable
+    assert buffer.nitems == 0
+    assert buffer.itemsize == 12
+
+    # Appending increases the capacity by doubling
+    buffer.append(np.ones((3, 3), np.float32))
+    assert buffer.nitems == 3
+    assert buffer.capacity == 4
+    assert buffer.nbytes == 36
+    assert buffer.vertex_byte_range == (0, 36)
+    buffer._pending_uploads = []  # as if uploaded
+
+    # A single item can be appended, only the tail is uploaded
+    buffer.append([2, 2, 2])
+    assert buffer.nitems == 4
+    assert buffer.capacity == 4
+    assert buffer._pending_uploads == [(3, 1)]
+    buffer._pending_uploads = []  # as if uploaded
+
+    buffer.append(np.full((5, 3), 3, np.float32))
+    assert buffer.nitems == 9
+    assert buffer.capacity == 16
+    assert buffer._pending_uploads == [(4, 5)]
+    assert buffer.data.shape == (9, 3)
+    assert buffer.data[:, 0].tolist() == [1, 1, 1, 2, 3, 3, 3, 3, 3]
+
+    # Non-growable buffers cannot be appended to
+    buffer = Buffer(np.zeros((10, 3), np.float32), usage="vertex")
+    assert not buffer.growable
+    assert buffer.capacity == 10
+    with raises(RuntimeError):
+        buffer.append([1, 2, 3])
+
+
+def test_buffer_growable_bumps_parent_rev():
+    geometry = Geometry()
+    buffer = Buffer(np.zeros((4, 3), np.float32), usage="vertex", growable=True)
+    geometry.positions = buffer
+    rev = geometry.rev
+    buffer.append([1, 2, 3])
+    assert geometry.rev > rev
+
+    # Only when the capacity changes, i.e. the GPU buffer is replaced
+    assert buffer.capacity == 8
+    rev = geometry.rev
+    buffer.append([1, 2, 3])
+    assert geometry.rev == rev
+
+    # The capacity of a ring buffer does not change
+    buffer = Buffer(np.zeros((4, 3), np.float32), usage="vertex", ring=True)
+    geometry.positions = buffer
+    rev = geometry.rev
+    buffer.append(np.ones((6, 3), np.float32))
+    assert geometry.rev == rev
+
+
+def test_buffer_ring():
+    data = np.zeros((10, 3), np.float32)
+    buffer = Buffer(data, usage="vertex", ring=True, nitems=0)
+    assert buffer.ring
+    assert buffer.capacity == 10
+    assert buffer.nitems == 0
+    buffer._pending_uploads = []  # as if uploaded
+
+    # Fill it up partially
+    buffer.append(np.ones((6, 3), np.float32))
+    assert buffer.nitems == 6
+    assert buffer.write_head == 6
+    assert buffer.ring_start == 0
+    assert buffer._pending_uploads == [(0, 6)]
+    buffer._pending_uploads = []  # as if uploaded
+
+    # Wrap around, only the new samples are uploaded
+    buffer.upload_merge_gap = 0
+    buffer.upload_full_fraction = 1.0
+    buffer.append(np.full((6, 3), 2, np.float32))
+    assert buffer.nitems == 10
+    assert buffer.write_head == 2
+    assert buffer.ring_start == 2
+    assert buffer._pending_uploads == [(0, 2), (6, 4)]
+    assert buffer.data[:, 0].tolist() == [2, 2, 1, 1, 1, 1, 2, 2, 2, 2]
+    buffer._pending_uploads = []  # as if uploaded
+
+    # Appending more than the capacity keeps the last samples
+    buffer.append(np.arange(36, dtype=np.float32).reshape(12, 3))
+    assert buffer.write_head == 2
+    assert buffer.ring_start == 2
+    assert buffer.data[buffer.ring_start, 0] == 6
+
+    # A ring buffer is full by default, and cannot also be growable
+    buffer = Buffer(data, usage="vertex", ring=True)
+    assert buffer.nitems == 10
+    assert buffer.ring_start == 0
+    with raises(ValueError):
+        Buffer(data, usage="vertex", ring=True, growable=True)
+    with raises(ValueError):
+        Buffer(data, usage="vertex", ring=True, nitems=11)
@@ -0,0 +1,59 @@
+import numpy as np
+
+from pygfx import Texture
+
+
+def test_texture_update_range_2d_array():
+    data = np.zeros((2048, 16, 16), np.float32)
+    tex = Texture(data, dim=2, size=(16, 16, 2048))
+    assert tex._pending_uploads == [((0, 0, 0), (16, 16, 2048))]
+
+    # Updating all layers again does not add uploads
+    tex.update_range((0, 0, 0), (16, 16, 2048))
+    assert len(tex._pending_uploads) == 1
+
+    # Adjacent layers are merged, other layers are not
+    tex._pending_uploads = []  # as if uploaded
+    tex.update_range((0, 0, 3), (16, 16, 2))
+    tex.update_range((0, 0, 5), (16, 16, 1))
+    tex.update_range((0, 0, 10), (16, 16, 1))
+    assert tex._pending_uploads == [
+        ((0, 0, 3), (16, 16, 3)),
+        ((0, 0, 10), (16, 16, 1)),
+    ]
+
+    # Contained regions are dropped
+    tex.update_range((2, 2, 4), (4, 4, 1))
+    assert len(tex._pending_uploads) == 2
+
+    # A region that bridges the gap merges all
+    tex.update_range((0, 0, 6), (16, 16, 4))
+    assert tex._pending_uploads == [((0, 0, 3), (16, 16, 8))]
+
+
+def test_texture_update_range_partial():
+    tex = Texture(np.zeros((100, 100), np.float32), dim=2)
+    tex._pending_uploads = []  # as if uploaded
+
+    # Boxes that are far apart are not merged
+    tex.update_range((0, 0, 0), (10, 10, 1))
+    tex.update_range((50, 50, 0), (10, 10, 1))
+    assert len(tex._pending_uploads) == 2
+
+    # Overlapping boxes are merged if that does not increase the upload size
+    tex.update_range((5, 0, 0), (10, 10, 1))
+    assert ((0, 0, 0), (15, 10, 1)) in tex._pending_uploads
+    assert len(tex._pending_uploads) == 2
+
+
+def test_texture_update_range_1d():
+    tex = Texture(np.zeros((4, 100), np.float32), dim=1, size=(100, 4, 1))
+    tex._pending_uploads = []  # as if uploaded
+
+    # 1D textures are uploaded per row, but rows are merged
+    tex.update_range((0, 1, 0), (10, 2, 1))
+    tex.update_range((10, 1, 0), (10, 1, 1))
+    assert sorted(tex._pending_uploads) == [
+        ((0, 1, 0), (20, 1, 1)),
+        ((0, 2, 0), (10, 1, 1)),
+    ]
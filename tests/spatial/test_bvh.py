@@ -0,0 +1,117 @@
+import numpy as np
+
+import pygfx as gfx
+from pygfx.spatial import BVH
+from pygfx.spatial._bvh import _Tree
+
+
+def create_points(x, y=0, z=0):
+    positions = np.array([(-0.5, -0.5, -0.5), (0.5, 0.5, 0.5)], np.float32)
+    points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+    points.position.set(x, y, z)
+    points.update_matrix_world()
+    return points
+
+
+def brute_force_box(objects, bbox):
+    result = []
+    for ob in objects:
+        b = ob.get_world_bounding_box()
+        if np.all(b[0] <= bbox[1]) and np.all(b[1] >= bbox[0]):
+            result.append(ob)
+    return result
+
+
+def test_bvh_query_box():
+    objects = [create_points(*xyz) for xyz in np.random.uniform(-50, 50, (500, 3))]
+    bvh = BVH(objects)
+    assert len(bvh) == 500
+    for bbox in ([(-10, -10, -10), (10, 10, 10)], [(20, -50, 0), (50, 0, 30)]):
+        assert set(bvh.query_box(bbox)) == set(brute_force_box(objects, bbox))
+    assert bvh.query_box([(100, 100, 100), (200, 200, 200)]) == []
+
+
+def test_bvh_query_ray():
+    objects = [create_points(x, 0, 0) for x in (10, 5, 20)]
+    objects.append(create_points(5, 5, 0))
+    bvh = BVH(objects)
+    hits = bvh.query_ray((0, 0, 0), (1, 0, 0))
+    assert hits == [objects[1], objects[0], objects[2]]
+    assert bvh.query_ray((0, 0, 0), (1, 0, 0), max_distance=7) == [objects[1]]
+    assert bvh.query_ray((0, 0, 0), (-1, 0, 0)) == []
+
+
+def test_bvh_query_frustum():
+    camera = gfx.OrthographicCamera(100, 100)
+    camera.position.z = 10
+    camera.update_matrix_world()
+    camera.update_projection_matrix()
+    matrix = gfx.linalg.Matrix4().multiply_matrices(
+        camera.projection_matrix, camera.matrix_world_inverse
+    )
+    p1, p2, p3 = create_points(0), create_points(49), create_points(60)
+    mesh = gfx.InstancedMesh(gfx.BoxGeometry(1, 1, 1), gfx.MeshBasicMaterial(), 2)
+    bvh = BVH([p1, p2, p3, mesh])
+    assert bvh.query_frustum(matrix) == [p1, p2, mesh]
+
+
+def test_bvh_incremental_updates():
+    objects = [create_points(x) for x in range(100)]
+    bvh = BVH(objects)
+    bvh.update()
+    assert bvh.stats["rebuilds"] == 1
+
+    # Moving an object refits the tree
+    objects[0].position.x = 0.2
+    objects[0].update_matrix_world()
+    assert bvh.query_box([(0.6, -1, -1), (0.65, 1, 1)]) == [objects[0], objects[1]]
+    assert bvh.stats["rebuilds"] == 1
+    assert bvh.stats["refits"] == 1
+
+    # Moving objects far away degrades the tree, so it is rebuilt
+    for ob in objects[:50]:
+        ob.position.x += 1000
+        ob.update_matrix_world()
+    assert bvh.query_box([(999, -1, -1), (1001, 1, 1)]) == objects[:2]
+    assert bvh.stats["rebuilds"] == 2
+
+    # Added and removed objects
+    extra = create_points(-10)
+    bvh.add(extra)
+    bvh.remove(objects[99])
+    assert bvh.query_box([(-11, -1, -1), (0, 1, 1)]) == [extra]
+    assert bvh.query_box([(98.9, -1, -1), (200, 1, 1)]) == []
+    assert objects[99] not in bvh
+    assert bvh.stats["rebuilds"] == 2
+
+    # Geometry changes must be reported
+    extra.geometry.positions.data[:] = 5
+    extra.geometry.positions.update_range(0, 2)
+    bvh.mark_dirty(extra)
+    assert bvh.query_box([(-11, -1, -1), (-9, 1, 1)]) == []
+
+
+def test_bvh_from_scene():
+    scene = gfx.Scene()
+    group = gfx.Group()
+    scene.add(group)
+    p1, p2 = create_points(0), create_points(10)
+    scene.add(p1)
+    group.add(p2)
+    bvh = BVH.from_scene(scene)
+    assert len(bvh) == 2
+    assert p2 in bvh
+
+
+def test_tree_refit_matches_build():
+    boxes = np.random.uniform(0, 10, (100, 2, 3))
+    boxes[:, 1] += boxes[:, 0]
+    tree = _Tree(boxes, np.arange(100), 4)
+    assert np.allclose(tree.mins[0], boxes[:, 0].min(0))
+    assert np.allclose(tree.maxs[0], boxes[:, 1].max(0))
+    boxes[3] += 100
+    tree.refit(boxes, [3])
+    partial = tree.mins.copy(), tree.maxs.copy()
+    tree.refit(boxes)
+    assert np.allclose(partial[0], tree.mins)
+    assert np.allclose(partial[1], tree.maxs)
@@ -0,0 +1,54 @@
+import numpy as np
+
+import pygfx as gfx
+from pygfx.linalg import Matrix4
+from pygfx.spatial import get_frustum_planes, spheres_in_frustum, frustum_cull
+
+
+def get_proj_screen_matrix(camera):
+    camera.update_matrix_world()
+    camera.update_projection_matrix()
+    return Matrix4().multiply_matrices(
+        camera.projection_matrix, camera.matrix_world_inverse
+    )
+
+
+def test_spheres_in_frustum():
+    # The NDC camera sees -1..1 in x and y, and 0..1 in z
+    planes = get_frustum_planes(get_proj_screen_matrix(gfx.NDCCamera()))
+    centers = [(0, 0, 0.5), (0.9, 0.9, 0.5), (2, 0, 0.5), (1.5, 0, 0.5), (0, 0, 2)]
+    radii = [0.1, 0.5, 0.5, 0.6, 0.5]
+    inside = spheres_in_frustum(planes, centers, radii)
+    assert inside.tolist() == [True, True, False, True, False]
+
+
+def test_frustum_cull():
+    camera = gfx.OrthographicCamera(100, 100)
+    camera.position.z = 10
+    matrix = get_proj_screen_matrix(camera)
+
+    def create_points(x):
+        positions = np.array([(-1, -1, 0), (1, 1, 0)], np.float32)
+        points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+        points.position.x = x
+        points.update_matrix_world()
+        return points
+
+    p1, p2, p3 = create_points(0), create_points(49), create_points(60)
+    volume = gfx.Volume((10, 10, 10), gfx.VolumeSliceMaterial())
+    volume.position.x = -58
+    volume.update_matrix_world()
+    mesh = gfx.InstancedMesh(gfx.BoxGeometry(1, 1, 1), gfx.MeshBasicMaterial(), 2)
+    mesh.position.x = 1000
+    mesh.update_matrix_world()
+
+    assert frustum_cull([p1, p2, p3, volume, mesh], matrix) == [p1, p2, volume, mesh]
+
+    # Bounds follow the transform and the data
+    p3.position.x = 0
+    p3.update_matrix_world()
+    volume.position.x = -70
+    volume.update_matrix_world()
+    p1.geometry.positions.data[:] = 200
+    p1.geometry.positions.update_range(0, 2)
+    assert frustum_cull([p1, p2, p3, volume], matrix) == [p2, p3]
@@ -0,0 +1,83 @@
+import numpy as np
+
+import pygfx as gfx
+from pygfx.spatial import pick_nearest, PointIndex
+
+
+def create_camera():
+    # A camera that maps world x and y (-50..50) to a 100x100 viewport
+    camera = gfx.OrthographicCamera(100, 100)
+    camera.position.z = 10
+    camera.update_matrix_world()
+    camera.update_projection_matrix()
+    return camera
+
+
+def test_pick_nearest_points():
+    camera = create_camera()
+    positions = np.array([(0, 0, 0), (10, 10, 0), (12, 10, 0)], np.float32)
+    points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+    points.update_matrix_world()
+
+    # The screen position (50, 50) is at the origin, y is flipped
+    info = pick_nearest([points], (52, 51), camera, (100, 100))
+    assert info["world_object"] is points
+    assert info["vertex_index"] == 0
+    assert np.isclose(info["distance"], 5 ** 0.5)
+    info = pick_nearest([points], (61.5, 40), camera, (100, 100))
+    assert info["vertex_index"] == 2
+    assert pick_nearest([points], (70, 50), camera, (100, 100)) is None
+    assert pick_nearest([points], (70, 50), camera, (100, 100), 20) is not None
+
+    # Follows the transform
+    points.position.x = 20
+    points.update_matrix_world()
+    info = pick_nearest([points], (70, 50), camera, (100, 100))
+    assert info["vertex_index"] == 0
+
+
+def test_pick_nearest_many_points():
+    camera = create_camera()
+    positions = np.random.uniform(-50, 50, (10000, 3)).astype(np.float32)
+    points = gfx.Points(gfx.Geometry(positions=positions), gfx.PointsMaterial())
+    points.update_matrix_world()
+    pos = 30, 60
+    info = pick_nearest([points], pos, camera, (100, 100), 10)
+    xy = positions[:, :2] * (1, -1) + 50
+    distances = np.linalg.norm(xy - pos, axis=1)
+    assert info["vertex_index"] == np.argmin(distances)
+    assert np.isclose(info["distance"], distances.min())
+
+
+def test_pick_nearest_line():
+    camera = create_camera()
+    positions = np.array([(0, 0, 0), (10, 0, 0), (10, 10, 0)], np.float32)
+    line = gfx.Line(gfx.Geometry(positions=positions), gfx.LineMaterial())
+    line.update_matrix_world()
+    info = pick_nearest([line], (52.5, 48), camera, (100, 100))
+    assert info["world_object"] is line
+    assert np.isclose(info["vertex_index"], 0.25)
+    assert np.isclose(info["distance"], 2)
+    info = pick_nearest([line], (60, 45), camera, (100, 100))
+    assert np.isclose(info["vertex_index"], 1.5)
+
+    # With segments, there is no segment between vertex 1 and 2
+    line.material = gfx.LineSegmentMaterial()
+    assert pick_nearest([line], (60, 45), camera, (100, 100), 3) is None
+
+
+def test_point_index_cached_and_ring():
+    positions = gfx.Buffer(
+        np.zeros((4, 3), np.float32), usage="vertex", nitems=0, ring=True
+    )
+    geometry = gfx.Geometry()
+    geometry.positions = positions
+    positions.append(np.array([(i, 0, 0) for i in range(6)], np.float32))
+    index = gfx.spatial._nearest.get_point_index(positions)
+    assert index is gfx.spatial._nearest.get_point_index(positions)
+    assert isinstance(index, PointIndex)
+    # The vertices are in logical order
+    assert index.vertices[:, 0].tolist() == [2, 3, 4, 5]
+    positions.append(np.array([(6, 0, 0)], np.float32))
+    index = gfx.spatial._nearest.get_point_index(positions)
+    assert index.vertices[:, 0].tolist() == [3, 4, 5, 6]
@@ -0,0 +1,81 @@
+import numpy as np
+
+import pygfx as gfx
+from pygfx.spatial import BVH, Raycaster, intersect_triangles
+
+
+def create_plane(z=0):
+    # A 2x2 plane with two triangles, at the given z
+    positions = np.array([(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)], np.float32)
+    index = np.array([(0, 1, 2), (0, 2, 3)], np.uint32)
+    geometry = gfx.Geometry(positions=positions, index=index)
+    mesh = gfx.Mesh(geometry, gfx.MeshBasicMaterial())
+    mesh.position.z = z
+    mesh.update_matrix_world()
+    return mesh
+
+
+def test_intersect_triangles():
+    triangles = np.array([[(0, 0, 0), (1, 0, 0), (0, 1, 0)]], np.float64)
+    hit, t, u, v = intersect_triangles(
+        np.array([0.25, 0.5, 5]), np.array([0, 0, -1]), triangles
+    )
+    assert hit.tolist() == [True]
+    assert np.allclose([t[0], u[0], v[0]], [5, 0.25, 0.5])
+    hit, *_ = intersect_triangles(
+        np.array([0.75, 0.5, 5]), np.array([0, 0, -1]), triangles
+    )
+    assert hit.tolist() == [False]
+
+
+def test_raycaster_mesh():
+    mesh1, mesh2 = create_plane(0), create_plane(-3)
+    raycaster = Raycaster((0.5, -0.5, 10), (0, 0, -1))
+    intersections = raycaster.intersect_objects([mesh2, mesh1])
+    assert [x["world_object"] for x in intersections] == [mesh1, mesh2]
+    x = intersections[0]
+    assert x["distance"] == 10
+    assert np.allclose(x["point"], (0.5, -0.5, 0))
+    assert x["instance_index"] == 0
+    assert x["face_index"] == 0
+    assert np.allclose(x["face_coords"], (0.25, 0.5, 0.25))
+    assert intersections[1]["distance"] == 13
+
+    # Near, far and misses
+    raycaster.far = 12
+    assert len(raycaster.intersect_objects([mesh1, mesh2])) == 1
+    raycaster.set((0.5, 1.5, 10), (0, 0, -1))
+    assert raycaster.intersect_object(mesh1) == []
+
+
+def test_raycaster_transform_and_updates():
+    scene = gfx.Scene()
+    mesh = create_plane()
+    scene.add(mesh)
+    mesh.scale.set(2, 2, 2)
+    mesh.position.z = -5
+    scene.update_matrix_world()
+
+    raycaster = Raycaster((-1.5, 1.5, 0), (0, 0, -1))
+    intersections = raycaster.intersect_object(scene, recursive=True)
+    assert len(intersections) == 1
+    assert intersections[0]["distance"] == 5
+    assert intersections[0]["face_index"] == 1
+
+    # The triangle BVH is updated when the positions change
+    mesh.geometry.positions.data[:, 2] = 1
+    mesh.geometry.positions.update_range(0, 4)
+    intersections = raycaster.intersect_objects(BVH([mesh]))
+    assert intersections[0]["distance"] == 3
+
+
+def test_raycaster_from_camera():
+    camera = gfx.PerspectiveCamera(60, 1)
+    camera.position.z = 10
+    camera.update_matrix_world()
+    camera.update_projection_matrix()
+    raycaster = Raycaster()
+    raycaster.set_from_screen((50, 50), camera, (100, 100))
+    assert np.allclose(raycaster.direction, (0, 0, -1))
+    intersections = raycaster.intersect_object(create_plane())
+    assert np.isclose(intersections[0]["distance"], 10)